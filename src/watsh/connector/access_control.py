@@ -1,8 +1,34 @@
 from bson import ObjectId
 from motor.core import AgnosticClient, AgnosticClientSession
 
+from . import caches
 from .crud import members as crud_members
-from src.watsh.lib.exceptions import UnauthorizedException
+from src.watsh.lib.cache import MISSING
+from src.watsh.lib.exceptions import UnauthorizedException, MemberNotFound
+from src.watsh.lib.models import Member
+
+
+async def get_membership(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    project_id: ObjectId, 
+    user_id: ObjectId,
+) -> Member | None:
+    """
+    Read-through the membership cache: the user's membership of a project, or None.
+    """
+    key = (user_id, project_id)
+    member = caches.memberships.get(key)
+    if member is MISSING:
+        version = caches.memberships.version
+        try:
+            member = await crud_members.get_member(
+                client=client, session=session, project_id=project_id, user_id=user_id
+            )
+        except MemberNotFound:
+            member = None
+        caches.memberships.set(key, member, version)
+    return member
 
 
 async def user_authorization(
@@ -11,10 +37,10 @@ async def user_authorization(
     project_id: ObjectId, 
     user_id: ObjectId,
 ) -> None:
-    if not await crud_members.is_user_member_of_project(
+    if await get_membership(
         client=client, 
         session=session, 
         project_id=project_id, 
         user_id=user_id
-    ):
+    ) is None:
         raise UnauthorizedException('You do not have access to this project.')
@@ -1,7 +1,7 @@
 from bson import ObjectId
-from motor.core import AgnosticClient
+from motor.core import AgnosticClient, AgnosticClientSession
 
-from . import workflows, access_control, validation
+from . import workflows, access_control, validation, sessions
 from .crud import branches as crud_branches
 from src.watsh.lib.models import Branch
 from src.watsh.lib.exceptions import BadRequest
@@ -14,34 +14,23 @@ async def create(
     slug: str,
 ) -> ObjectId:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
+    async def transaction(session: AgnosticClientSession) -> ObjectId:
 
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
+        # Access control and validation of the project and environment
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, check_is_not_archive=True,
+        )
 
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
+        # Create the branch
+        branch_id = await crud_branches.create_branch(
+            client=client, session=session, project_id=project_id, 
+            environment_id=environment_id, slug=slug, default=False,
+        )
 
-            # Create the branch
-            branch_id = await crud_branches.create_branch(
-                client=client, session=session, project_id=project_id, 
-                environment_id=environment_id, slug=slug, default=False,
-            )
+        return branch_id
 
-            # Commit the transaction
-            await session.commit_transaction()
-    
-    return branch_id
+    return await sessions.run_transaction(client, transaction)
 
 
 
@@ -52,28 +41,16 @@ async def get(
     environment_id: ObjectId,
     branch_id: ObjectId,
 ) -> Branch:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Get branch
-            branch = await crud_branches.get_branch(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-            )
-
-            # Commit the transaction
-            await session.commit_transaction()
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Access control and validation of the environment and branch
+        context = await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id,
+        )
 
-    return branch
+    return context.branch
 
 
 async def list_branches(
@@ -82,30 +59,22 @@ async def list_branches(
     project_id: ObjectId,
     environment_id: ObjectId,
 ) -> list[Branch]:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Environment id validation
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Get branches
-            branches = await crud_branches.list_branches_per_environment(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-            )
-
-            # Commit the transaction
-            await session.commit_transaction()
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Access control and validation of the environment
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id,
+        )
+
+        # Get branches
+        branches = await crud_branches.list_branches_per_environment(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+        )
 
     return branches
 
@@ -119,37 +88,21 @@ async def slug_update(
     slug: str,
 ) -> None:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
+    async def transaction(session: AgnosticClientSession) -> None:
 
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
+        # Access control and validation of the project, environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, check_is_not_archive=True,
+        )
 
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
+        # Update the slug
+        await crud_branches.update_slug(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, slug=slug
+        )
 
-            # Update the slug
-            await crud_branches.update_slug(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-                branch_id=branch_id, slug=slug
-            )
-
-            # Commit the transaction
-            await session.commit_transaction()
+    await sessions.run_transaction(client, transaction)
 
 
 async def delete(
@@ -160,43 +113,28 @@ async def delete(
     branch_id: ObjectId,
 ) -> None:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
+    async def transaction(session: AgnosticClientSession) -> None:
 
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
+        # Access control and validation of the project, environment and branch
+        context = await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, check_is_not_archive=True,
+        )
+        branch = context.branch
 
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
+        if branch.default:
+            raise BadRequest('Default branch cannot be deleted.')
 
-            # Verify branch ID
-            branch = await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
+        # Delete branch
+        await workflows.delete_branch(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+        )
 
-            if branch.default:
-                raise BadRequest('Default branch cannot be deleted.')
-
-            # Delete branch
-            await workflows.delete_branch(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-            )
-
-            # Commit the transaction
-            await session.commit_transaction()
+    await sessions.run_transaction(client, transaction)
 
 
 # async def archive_update(
@@ -291,51 +229,35 @@ async def default_update(
     branch_id: ObjectId,
 ) -> None:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
-
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Verify branch ID 
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id,
-            )
-
-            # Get old default branch
-            old_default_branch = await crud_branches.get_default_branch(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-            )
-
-            # Check if branch is not already default
-            if old_default_branch.id == branch_id:
-                raise BadRequest('This branch is already set as default.')
-
-            # Update the branch
-            await crud_branches.update_default(
-                client=client, session=session, project_id=project_id,
-                environment_id=environment_id, branch_id=old_default_branch.id, default=False
-            )
-
-            await crud_branches.update_default(
-                client=client, session=session, project_id=project_id,
-                environment_id=environment_id, branch_id=branch_id, default=True
-            )
-        
-            # Commit the transaction
-            await session.commit_transaction()
\ No newline at end of file
+    async def transaction(session: AgnosticClientSession) -> None:
+
+        # Access control and validation of the project, environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, check_is_not_archive=True,
+        )
+
+        # Get old default branch
+        old_default_branch = await crud_branches.get_default_branch(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+        )
+
+        # Check if branch is not already default
+        if old_default_branch.id == branch_id:
+            raise BadRequest('This branch is already set as default.')
+
+        # Update the branch
+        await crud_branches.update_default(
+            client=client, session=session, project_id=project_id,
+            environment_id=environment_id, branch_id=old_default_branch.id, default=False
+        )
+
+        await crud_branches.update_default(
+            client=client, session=session, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, default=True
+        )
+
+    await sessions.run_transaction(client, transaction)
\ No newline at end of file
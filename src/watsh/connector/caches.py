@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from motor.core import AgnosticClient
+from pymongo.errors import PyMongoError
+
+from .crud.collections import (
+    DATABASE, MEMBERS_COLLECTION, PROJECTS_COLLECTION, ENVIRONMENTS_COLLECTION, BRANCHES_COLLECTION
+)
+from src.watsh.lib.cache import TTLCache
+
+# Seconds to wait before reopening a failed change stream
+WATCH_RETRY_DELAY = 5
+
+# Caches are disabled until configured by the server, which also runs their invalidation stream
+# (user, project) -> Member, or None if the user is not a member of the project
+memberships = TTLCache(max_size=10000, ttl=60, enabled=False)
+
+# _id -> Project, Environment and Branch
+projects = TTLCache(max_size=10000, ttl=300, enabled=False)
+environments = TTLCache(max_size=10000, ttl=300, enabled=False)
+branches = TTLCache(max_size=10000, ttl=300, enabled=False)
+
+# sha256(token) -> decoded token payload, until the token expires
+tokens = TTLCache(max_size=10000, ttl=3600, enabled=False)
+
+# (project, environment, branch, commit) -> JSONSnapshot of the branch at this commit.
+# Snapshots hold decrypted values: they are only kept as long as subscribers may resume from them.
+snapshots = TTLCache(max_size=64, ttl=60, enabled=False)
+
+# (base commit or 'snapshot', commit) -> websocket message of the patch protocol, see json_value.patch_message
+patches = TTLCache(max_size=64, ttl=60, enabled=False)
+
+ALL = {
+    'memberships': memberships,
+    'projects': projects,
+    'environments': environments,
+    'branches': branches,
+    'tokens': tokens,
+    'snapshots': snapshots,
+    'patches': patches,
+}
+
+
+def configure(
+    enabled: bool, membership_size: int, membership_ttl: float, metadata_size: int, metadata_ttl: float,
+    token_size: int, snapshot_size: int, snapshot_ttl: float,
+) -> None:
+    """
+    Configure the per-process caches. Disabled caches always miss.
+    """
+    memberships.max_size, memberships.ttl = membership_size, membership_ttl
+    for cache in [projects, environments, branches]:
+        cache.max_size, cache.ttl = metadata_size, metadata_ttl
+    tokens.max_size = token_size
+    for cache in [snapshots, patches]:
+        cache.max_size, cache.ttl = snapshot_size, snapshot_ttl
+    for cache in ALL.values():
+        cache.enabled = enabled
+        cache.clear()
+
+
+def disable() -> None:
+    """
+    Turn every cache off, e.g. for tests that write to the database behind the server's back.
+    """
+    for cache in ALL.values():
+        cache.enabled = False
+        cache.clear()
+
+
+def metrics() -> dict[str, dict]:
+    return {name: cache.metrics() for name, cache in ALL.items()}
+
+
+def clear() -> None:
+    for cache in ALL.values():
+        cache.clear()
+
+
+def _on_member_change(change: dict) -> None:
+    member_id = change['documentKey']['_id']
+    memberships.invalidate_where(lambda key, member: member is not None and member.id == member_id)
+
+    # Inserts may turn a cached "not a member" into a membership
+    document = change.get('fullDocument')
+    if document:
+        memberships.invalidate((document['user'], document['project']))
+
+
+def _on_project_change(change: dict) -> None:
+    project_id = change['documentKey']['_id']
+    projects.invalidate(project_id)
+    if change['operationType'] == 'delete':
+        memberships.invalidate_where(lambda key, member: key[1] == project_id)
+
+
+def _on_environment_change(change: dict) -> None:
+    environments.invalidate(change['documentKey']['_id'])
+
+
+def _on_branch_change(change: dict) -> None:
+    # Every commit moves the branch sequence and head, which are not part of the cached Branch model
+    updated_fields = change.get('updateDescription', {}).get('updatedFields', {})
+    if change['operationType'] == 'update' and updated_fields and set(updated_fields) <= {'sequence', 'head'}:
+        return
+    branches.invalidate(change['documentKey']['_id'])
+
+
+HANDLERS = {
+    MEMBERS_COLLECTION: _on_member_change,
+    PROJECTS_COLLECTION: _on_project_change,
+    ENVIRONMENTS_COLLECTION: _on_environment_change,
+    BRANCHES_COLLECTION: _on_branch_change,
+}
+
+
+async def watch(client: AgnosticClient) -> None:
+    """
+    Invalidate the caches from a change stream on the cached collections, until cancelled.
+    The caches are cleared every time the stream (re)opens, so no change is missed in between:
+    staleness is bounded by the stream latency, or by the TTL if change streams are unavailable.
+    Events that cannot be handled clear the caches, any other error reopens the stream.
+    """
+    pipeline = [{'$match': {'ns.coll': {'$in': list(HANDLERS)}}}]
+
+    while True:
+        try:
+            async with client[DATABASE].watch(pipeline) as stream:
+                clear()
+                async for change in stream:
+                    # Drops, renames and invalidations have no document: any cached entry may be stale
+                    if 'documentKey' not in change:
+                        clear()
+                        continue
+                    try:
+                        HANDLERS[change['ns']['coll']](change)
+                    except (KeyError, TypeError) as err:
+                        logging.warning(f'Clearing the caches on malformed change event {change.get("_id")}: {err}')
+                        clear()
+
+        except PyMongoError as err:
+            logging.warning(f'Cache invalidation stream failed, retrying in {WATCH_RETRY_DELAY}s: {err}')
+            clear()
+            await asyncio.sleep(WATCH_RETRY_DELAY)
+
+        except Exception:
+            logging.exception(f'Cache invalidation stream crashed, retrying in {WATCH_RETRY_DELAY}s.')
+            clear()
+            await asyncio.sleep(WATCH_RETRY_DELAY)
@@ -1,10 +1,11 @@
 from bson import ObjectId
 from motor.core import AgnosticClient, AgnosticClientSession
+from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError
 
 from src.watsh.lib.exceptions import BranchNotFound, BranchSlugTaken
 from src.watsh.lib.models import Branch
-from .collections import DATABASE, BRANCHES_COLLECTION
+from .collections import DATABASE, BRANCHES_COLLECTION, COMMITS_COLLECTION
 
 async def create_branch(
     client: AgnosticClient, 
@@ -25,10 +26,11 @@ async def create_branch(
         ObjectId of the newly created branch.
     """
     branch = Branch(project=project_id, environment=environment_id, slug=slug, default=default)
+
+    # The commit counter and head are internal, see `next_sequence`: they are not part of the model
+    doc = {**branch.model_dump(exclude_none=True, by_alias=True), 'sequence': 0}
     try:
-        result = await client[DATABASE][BRANCHES_COLLECTION].insert_one(
-            branch.model_dump(exclude_none=True, by_alias=True), session=session
-        )
+        result = await client[DATABASE][BRANCHES_COLLECTION].insert_one(doc, session=session)
         return result.inserted_id
     except DuplicateKeyError:
         raise BranchSlugTaken()
@@ -110,6 +112,98 @@ async def list_branches_per_environment(
     )
     return [Branch(**doc) for doc in await cursor.to_list(None)]
 
+async def list_all_branches(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+) -> list[Branch]:
+    """
+    List all branches, across every project environment.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+    Returns:
+        List of Branch instances.
+    """
+    cursor = client[DATABASE][BRANCHES_COLLECTION].find({}, session=session)
+    return [Branch(**doc) for doc in await cursor.to_list(None)]
+
+
+async def next_sequence(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    project_id: ObjectId, 
+    environment_id: ObjectId,
+    branch_id: ObjectId,
+    commit_id: ObjectId,
+) -> int:
+    """
+    Allocate the sequence number of a new commit on a branch, and make it the branch head.
+    The update is atomic: inside transactions, concurrent commits on a branch conflict here
+    instead of racing on their position in the history.
+    Branches committed to before the sequences have no counter: it is seeded after their legacy commits,
+    which `backfill_sequences` numbers from 1.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        project_id: ObjectId of the project.
+        environment_id: ObjectId of the environment.
+        branch_id: ObjectId of the branch.
+        commit_id: ObjectId of the new commit.
+    Returns:
+        Sequence number of the new commit.
+    Raises:
+        NotFoundException: If the branch is not found.
+    """
+    query = {'_id': branch_id, 'project': project_id, 'environment': environment_id}
+    doc = await client[DATABASE][BRANCHES_COLLECTION].find_one_and_update(
+        {**query, 'sequence': {'$exists': True}},
+        {'$inc': {'sequence': 1}, '$set': {'head': commit_id}},
+        projection={'sequence': 1},
+        return_document=ReturnDocument.AFTER,
+        session=session,
+    )
+    if not doc:
+        legacy_commits = await client[DATABASE][COMMITS_COLLECTION].count_documents(
+            {'project': project_id, 'environment': environment_id, 'branch': branch_id}, session=session
+        )
+        doc = await client[DATABASE][BRANCHES_COLLECTION].find_one_and_update(
+            {**query, 'sequence': {'$exists': False}},
+            {'$set': {'sequence': legacy_commits + 1, 'head': commit_id}},
+            projection={'sequence': 1},
+            return_document=ReturnDocument.AFTER,
+            session=session,
+        )
+    if not doc:
+        raise BranchNotFound()
+    return doc['sequence']
+
+async def get_head(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    project_id: ObjectId, 
+    environment_id: ObjectId,
+    branch_id: ObjectId,
+) -> ObjectId | None:
+    """
+    Retrieve the last commit of a branch, as recorded on the branch itself.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        project_id: ObjectId of the project.
+        environment_id: ObjectId of the environment.
+        branch_id: ObjectId of the branch.
+    Returns:
+        ObjectId of the head commit, or None if the branch did not record one.
+    Raises:
+        NotFoundException: If the branch is not found.
+    """
+    doc = await client[DATABASE][BRANCHES_COLLECTION].find_one(
+        {'_id': branch_id, 'project': project_id, 'environment': environment_id},
+        {'head': 1}, session=session
+    )
+    if not doc:
+        raise BranchNotFound()
+    return doc.get('head')
 
 async def update_branch_attribute(
     client: AgnosticClient, 
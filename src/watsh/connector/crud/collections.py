@@ -5,4 +5,7 @@ MEMBERS_COLLECTION = 'members'
 ENVIRONMENTS_COLLECTION = 'environments'
 BRANCHES_COLLECTION = 'branches'
 COMMITS_COLLECTION = 'commits'
-ITEMS_COLLECTION = 'items'
\ No newline at end of file
+ITEMS_COLLECTION = 'items'
+HEADS_COLLECTION = 'heads'
+ROTATIONS_COLLECTION = 'rotations'
+REVOCATIONS_COLLECTION = 'revocations'
\ No newline at end of file
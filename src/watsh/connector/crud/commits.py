@@ -1,5 +1,6 @@
 from bson import ObjectId
 from motor.core import AgnosticClient, AgnosticClientSession
+from pymongo import UpdateOne
 
 from src.watsh.lib.exceptions import CommitNotFound
 from src.watsh.lib.models import Commit
@@ -54,14 +55,38 @@ async def list_commits(
         environment_id: ObjectId of the environment.
         branch_id: ObjectId of the branch.
     Returns:
-        List of Commit instances.
+        List of Commit instances, in history order.
     """
     cursor = client[DATABASE][COMMITS_COLLECTION].find(
         {'project': project_id, 'environment': environment_id, 'branch': branch_id},
         session=session
-    )
+    ).sort([('sequence', 1), ('timestamp', 1), ('_id', 1)])
     return [Commit(**doc) for doc in await cursor.to_list(None)]
 
+async def get_last_commit(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    project_id: ObjectId, 
+    environment_id: ObjectId,
+    branch_id: ObjectId
+) -> Commit | None:
+    """
+    Retrieve the most recent commit of a branch within a project environment.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        project_id: ObjectId of the project.
+        environment_id: ObjectId of the environment.
+        branch_id: ObjectId of the branch.
+    Returns:
+        Commit instance, or None if the branch has no commit.
+    """
+    doc = await client[DATABASE][COMMITS_COLLECTION].find_one(
+        {'project': project_id, 'environment': environment_id, 'branch': branch_id},
+        sort=[('sequence', -1), ('timestamp', -1), ('_id', -1)], session=session
+    )
+    return Commit(**doc) if doc else None
+
 async def create_commit(
     client: AgnosticClient, 
     session: AgnosticClientSession, 
@@ -70,7 +95,12 @@ async def create_commit(
     environment_id: ObjectId,
     branch_id: ObjectId,
     commit_message: str,
-    timestamp: int
+    timestamp: int,
+    sequence: int,
+    commit_id: ObjectId | None = None,
+    added: int | None = None,
+    changed: int | None = None,
+    removed: int | None = None,
 ) -> ObjectId:
     """
     Create a new commit in a branch within a project environment.
@@ -83,19 +113,46 @@ async def create_commit(
         branch_id: ObjectId of the branch.
         commit_message: Message associated with the commit.
         timestamp: Timestamp of the commit.
+        sequence: Sequence number of the commit, allocated on its branch.
+        commit_id: ObjectId of the commit, if already referenced by its item versions.
+        added: Number of items added by the commit.
+        changed: Number of items changed by the commit.
+        removed: Number of items removed by the commit.
     Returns:
         ObjectId of the newly created commit.
     """
     commit = Commit(
         project=project_id, environment=environment_id, branch=branch_id,
-        author=current_user_id, message=commit_message, timestamp=timestamp
+        author=current_user_id, message=commit_message, timestamp=timestamp, sequence=sequence,
+        added=added, changed=changed, removed=removed,
     )
+    if commit_id is not None:
+        commit.id = commit_id
     result = await client[DATABASE][COMMITS_COLLECTION].insert_one(
         commit.model_dump(exclude_none=True, by_alias=True), session=session
     )
     return result.inserted_id
 
 
+async def set_commit_sequences(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    sequences: list[tuple[ObjectId, int]],
+) -> None:
+    """
+    Set the sequence number of existing commits in bulk.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        sequences: List of (commit ObjectId, sequence number).
+    """
+    if not sequences:
+        return
+    await client[DATABASE][COMMITS_COLLECTION].bulk_write(
+        [UpdateOne({'_id': commit_id}, {'$set': {'sequence': sequence}}) for commit_id, sequence in sequences],
+        ordered=False, session=session,
+    )
+
 
 async def delete_commit(
     client: AgnosticClient, 
@@ -1,9 +1,10 @@
 from bson import ObjectId
 from motor.core import AgnosticClient, AgnosticClientSession
+from pymongo import UpdateOne, UpdateMany, ReplaceOne, DeleteOne
 from typing import Any
 
-from .collections import DATABASE, ITEMS_COLLECTION
-from src.watsh.lib.models import Item, ItemType
+from .collections import DATABASE, ITEMS_COLLECTION, HEADS_COLLECTION
+from src.watsh.lib.models import Commit, Item, ItemType
 from src.watsh.lib.exceptions import ItemNotFound
 
 async def _aggregate_items(
@@ -20,7 +21,7 @@ async def _aggregate_items(
     Returns:
         List of Item instances.
     """
-    sort_stage = {"$sort": {"timestamp": -1}}
+    sort_stage = {"$sort": {"sequence": -1, "timestamp": -1}}
     group_stage = {
         "$group": {
             "_id": "$item",
@@ -35,23 +36,96 @@ async def _aggregate_items(
     
     return [Item(**doc) for doc in await cursor.to_list(None)]
 
+def _head_document(item: Item) -> dict:
+    """
+    Build the head document of an item version.
+    The head keeps its own `_id`, the version ObjectId is stored under `version`.
+    Args:
+        item: Item version.
+    Returns:
+        Head document.
+    """
+    doc = item.model_dump(exclude_none=True, by_alias=True)
+    doc['version'] = doc.pop('_id')
+    return doc
+
+def _head_to_item(doc: dict) -> Item:
+    """
+    Convert a head document back to its Item version.
+    Args:
+        doc: Head document.
+    Returns:
+        Item instance.
+    """
+    doc['_id'] = doc.pop('version')
+    return Item(**doc)
+
+def _head_query(project_id: ObjectId, environment_id: ObjectId, branch_id: ObjectId, item_id: ObjectId) -> dict:
+    """
+    Build the query matching the head of an item, the key of the unique heads index.
+    Args:
+        project_id: ObjectId of the project.
+        environment_id: ObjectId of the environment.
+        branch_id: ObjectId of the branch.
+        item_id: ObjectId of the item.
+    Returns:
+        Query on the heads collection.
+    """
+    return {
+        "project": project_id,
+        "environment": environment_id,
+        'branch': branch_id,
+        'item': item_id,
+    }
+
+async def _find_heads(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    query: dict
+) -> list[Item]:
+    """
+    Helper function to find the live items of a branch.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        query: Query on the heads collection.
+    Returns:
+        List of Item instances, sorted by slug.
+    """
+    cursor = client[DATABASE][HEADS_COLLECTION].find(query, session=session).sort('slug', 1)
+    return [_head_to_item(doc) for doc in await cursor.to_list(None)]
+
+def _history_query(commit: Commit) -> dict:
+    """
+    Build the query matching the item versions at or before a commit.
+    Versions committed before the sequences were backfilled have none: they precede every numbered commit,
+    and are ordered by timestamp between themselves.
+    Args:
+        commit: Commit instance.
+    Returns:
+        Query on the items collection.
+    """
+    if commit.sequence is None:
+        return {'sequence': None, 'timestamp': {'$lte': commit.timestamp}}
+    return {'$or': [{'sequence': {'$lte': commit.sequence}}, {'sequence': None}]}
+
 async def list_items_per_commit(
     client: AgnosticClient, 
     session: AgnosticClientSession, 
     project_id: ObjectId, 
     environment_id: ObjectId,
     branch_id: ObjectId,
-    commit_timestamp: int
+    commit: Commit,
 ) -> list[Item]:
     """
-    List items for a project environment's branch at or before a specific commit timestamp.
+    List items for a project environment's branch at or before a specific commit.
     Args:
         client: MongoDB client.
         session: MongoDB client session.
         project_id: ObjectId of the project.
         environment_id: ObjectId of the environment.
         branch_id: ObjectId of the branch.
-        commit_timestamp: The timestamp of the commit.
+        commit: The commit.
     Returns:
         List of Item instances.
     """
@@ -60,7 +134,7 @@ async def list_items_per_commit(
             "project": project_id,
             "environment": environment_id,
             'branch': branch_id,
-            'timestamp': {'$lte': commit_timestamp}
+            **_history_query(commit),
         }
     }
     return await _aggregate_items(client, session, match_stage)
@@ -72,10 +146,10 @@ async def list_items_per_commit_per_parent(
     environment_id: ObjectId,
     branch_id: ObjectId,
     parent_id: ObjectId,
-    commit_timestamp: int
+    commit: Commit,
 ) -> list[Item]:
     """
-    List items for a project environment's branch at or before a specific commit timestamp, filtered by parent.
+    List items for a project environment's branch at or before a specific commit, filtered by parent.
     Args:
         client: MongoDB client.
         session: MongoDB client session.
@@ -83,7 +157,7 @@ async def list_items_per_commit_per_parent(
         environment_id: ObjectId of the environment.
         branch_id: ObjectId of the branch.
         parent_id: ObjectId of the parent item.
-        commit_timestamp: The timestamp of the commit.
+        commit: The commit.
     Returns:
         List of Item instances.
     """
@@ -93,7 +167,7 @@ async def list_items_per_commit_per_parent(
             "environment": environment_id,
             'branch': branch_id,
             'parent': parent_id,
-            'timestamp': {'$lte': commit_timestamp}
+            **_history_query(commit),
         }
     }
     return await _aggregate_items(client, session, match_stage)
@@ -102,18 +176,69 @@ async def create_item(
     client: AgnosticClient, session: AgnosticClientSession, 
     project_id: ObjectId, environment_id: ObjectId, branch_id: ObjectId, 
     parent_id: ObjectId, item_id: ObjectId, item_slug: str | None, item_type: ItemType, item_active: bool, 
-    secret_value: Any, secret_active: bool, commit_id: ObjectId, timestamp: int
+    secret_value: Any, secret_active: bool, commit_id: ObjectId, timestamp: int, sequence: int
 ) -> ObjectId:
     item = Item(
         project=project_id, environment=environment_id, branch=branch_id, 
         item=item_id, parent=parent_id, slug=item_slug, type=item_type,
-        active=item_active, secret_value=secret_value, secret_active=secret_active, commit=commit_id, timestamp=timestamp
+        active=item_active, secret_value=secret_value, secret_active=secret_active, commit=commit_id,
+        timestamp=timestamp, sequence=sequence,
     )
     result = await client[DATABASE][ITEMS_COLLECTION].insert_one(
         item.model_dump(exclude_none=True, by_alias=True), session=session
     )
+
+    # Keep the branch head in sync, in the same session
+    head_query = _head_query(project_id, environment_id, branch_id, item_id)
+    if item_active:
+        await client[DATABASE][HEADS_COLLECTION].replace_one(
+            head_query, _head_document(item), upsert=True, session=session
+        )
+    else:
+        await client[DATABASE][HEADS_COLLECTION].delete_one(head_query, session=session)
+
     return result.inserted_id
 
+def _head_request(item: Item) -> ReplaceOne | DeleteOne:
+    """
+    Build the bulk write request keeping the head of an item in sync with a new version.
+    Args:
+        item: Item version.
+    Returns:
+        Upsert of the head if the version is active, deletion of the head otherwise.
+    """
+    head_query = _head_query(item.project, item.environment, item.branch, item.item)
+    if item.active:
+        return ReplaceOne(head_query, _head_document(item), upsert=True)
+    return DeleteOne(head_query)
+
+async def create_items(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    items: list[Item],
+    chunk_size: int,
+) -> list[ObjectId]:
+    """
+    Insert item versions and keep the branch heads in sync, in ordered chunks of `chunk_size` documents.
+    Versions of the same item are applied in list order, the last one is the head.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        items: Item versions, with their secret already encrypted.
+        chunk_size: Maximum number of documents per `insert_many` and `bulk_write`.
+    Returns:
+        List of the ObjectIds of the item versions.
+    """
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        await client[DATABASE][ITEMS_COLLECTION].insert_many(
+            [item.model_dump(exclude_none=True, by_alias=True) for item in chunk], ordered=True, session=session
+        )
+        await client[DATABASE][HEADS_COLLECTION].bulk_write(
+            [_head_request(item) for item in chunk], ordered=True, session=session
+        )
+    return [item.id for item in items]
+
 async def delete_item(
     client: AgnosticClient, 
     session: AgnosticClientSession, 
@@ -134,13 +259,9 @@ async def delete_item(
     Returns:
         None
     """
-    query = {
-        "project": project_id,
-        "environment": environment_id,
-        'branch': branch_id,
-        'item': item_id
-    }
+    query = _head_query(project_id, environment_id, branch_id, item_id)
     await client[DATABASE][ITEMS_COLLECTION].delete_many(query, session=session)
+    await client[DATABASE][HEADS_COLLECTION].delete_many(query, session=session)
 
 async def delete_item_per_branch(
     client: AgnosticClient, 
@@ -167,6 +288,7 @@ async def delete_item_per_branch(
         'branch': branch_id,
     }
     await client[DATABASE][ITEMS_COLLECTION].delete_many(query, session=session)
+    await client[DATABASE][HEADS_COLLECTION].delete_many(query, session=session)
 
 
 async def list_items(
@@ -176,15 +298,23 @@ async def list_items(
     environment_id: ObjectId,
     branch_id: ObjectId,
 ) -> list[Item]:
-    match_stage = {
-        "$match": {
-            "project": project_id,
-            "environment": environment_id,
-            'branch': branch_id,
-            'timestamp': {'$lte': 9999999999999999}
-        }
+    """
+    List the live items of a project environment's branch.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        project_id: ObjectId of the project.
+        environment_id: ObjectId of the environment.
+        branch_id: ObjectId of the branch.
+    Returns:
+        List of Item instances.
+    """
+    query = {
+        "project": project_id,
+        "environment": environment_id,
+        'branch': branch_id,
     }
-    return await _aggregate_items(client, session, match_stage)
+    return await _find_heads(client, session, query)
 
 async def list_items_per_parent(
     client: AgnosticClient, 
@@ -194,16 +324,25 @@ async def list_items_per_parent(
     branch_id: ObjectId,
     parent_id: ObjectId,
 ) -> list[Item]:
-    match_stage = {
-        "$match": {
-            "project": project_id,
-            "environment": environment_id,
-            'branch': branch_id,
-            'parent': parent_id,
-            'timestamp': {'$lte': 9999999999999999}
-        }
+    """
+    List the live items of a project environment's branch, filtered by parent.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        project_id: ObjectId of the project.
+        environment_id: ObjectId of the environment.
+        branch_id: ObjectId of the branch.
+        parent_id: ObjectId of the parent item.
+    Returns:
+        List of Item instances.
+    """
+    query = {
+        "project": project_id,
+        "environment": environment_id,
+        'branch': branch_id,
+        'parent': parent_id,
     }
-    return await _aggregate_items(client, session, match_stage)
+    return await _find_heads(client, session, query)
 
 async def get_item(
     client: AgnosticClient, 
@@ -213,21 +352,25 @@ async def get_item(
     branch_id: ObjectId,
     item_id: ObjectId
 ) -> Item:
-    match_stage = {
-        "$match": {
-            "project": project_id,
-            "environment": environment_id,
-            'branch': branch_id,
-            'item': item_id,
-            'timestamp': {'$lte': 9999999999999999}
-        }
-    }
-    items = await _aggregate_items(client, session, match_stage)
-    if len(items) > 1:
-        raise RuntimeError('More than 1 item returned.')
-    if len(items) == 0:
+    """
+    Retrieve the live version of an item.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        project_id: ObjectId of the project.
+        environment_id: ObjectId of the environment.
+        branch_id: ObjectId of the branch.
+        item_id: ObjectId of the item.
+    Returns:
+        Item instance.
+    Raises:
+        ItemNotFound: If the item does not exist or is not active.
+    """
+    query = _head_query(project_id, environment_id, branch_id, item_id)
+    doc = await client[DATABASE][HEADS_COLLECTION].find_one(query, session=session)
+    if not doc:
         raise ItemNotFound()
-    return items[0]
+    return _head_to_item(doc)
 
 
 
@@ -240,30 +383,181 @@ async def get_item_by_slug(
     parent_id: ObjectId,
     slug: str
 ) -> Item:
-    match_stage = {
-        "$match": {
-            "project": project_id,
-            "environment": environment_id,
-            'branch': branch_id,
-            'timestamp': {'$lte': 9999999999999999}
-        }
-    }
-    sort_stage = {"$sort": {"timestamp": -1}}
-    group_stage = {
-        "$group": {
-            "_id": "$item",
-            "item": {"$first": "$$ROOT"},
-        }
+    """
+    Retrieve the live version of an item by its slug within a parent.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        project_id: ObjectId of the project.
+        environment_id: ObjectId of the environment.
+        branch_id: ObjectId of the branch.
+        parent_id: ObjectId of the parent item.
+        slug: Slug of the item.
+    Returns:
+        Item instance.
+    Raises:
+        ItemNotFound: If no live item has this slug.
+    """
+    query = {
+        "project": project_id,
+        "environment": environment_id,
+        'branch': branch_id,
+        'parent': parent_id,
+        'slug': slug,
     }
-    replace_root_stage = {"$replaceRoot": {"newRoot": "$item"}}
-    filter_active_stage = {"$match": {"active": True, "slug": slug, "parent": parent_id}}
-    sort_slug_stage = {"$sort": {"slug": 1}}
-    pipeline = [match_stage, sort_stage, group_stage, replace_root_stage, filter_active_stage, sort_slug_stage]
-    cursor = client[DATABASE][ITEMS_COLLECTION].aggregate(pipeline, session=session)
-    
-    items = [Item(**doc) for doc in await cursor.to_list(None)]
+    items = await _find_heads(client, session, query)
     if len(items) > 1:
         raise RuntimeError('More than 1 item returned.')
     if len(items) == 0:
         raise ItemNotFound()
-    return items[0]
\ No newline at end of file
+    return items[0]
+
+
+async def rebuild_heads(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    project_id: ObjectId, 
+    environment_id: ObjectId,
+    branch_id: ObjectId,
+) -> int:
+    """
+    Rebuild the heads of a project environment's branch from its item history.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        project_id: ObjectId of the project.
+        environment_id: ObjectId of the environment.
+        branch_id: ObjectId of the branch.
+    Returns:
+        Number of live items written to the heads collection.
+    """
+    query = {
+        "project": project_id,
+        "environment": environment_id,
+        'branch': branch_id,
+    }
+    items = await _aggregate_items(client, session, {"$match": query})
+
+    await client[DATABASE][HEADS_COLLECTION].delete_many(query, session=session)
+    if items:
+        await client[DATABASE][HEADS_COLLECTION].insert_many(
+            [_head_document(item) for item in items], session=session
+        )
+    return len(items)
+
+
+async def set_item_sequences(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    sequences: list[tuple[ObjectId, int]],
+) -> None:
+    """
+    Set the sequence number of the item versions and heads of existing commits in bulk.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        sequences: List of (commit ObjectId, sequence number).
+    """
+    if not sequences:
+        return
+    requests = [
+        UpdateMany({'commit': commit_id}, {'$set': {'sequence': sequence}}) for commit_id, sequence in sequences
+    ]
+    for collection in [ITEMS_COLLECTION, HEADS_COLLECTION]:
+        await client[DATABASE][collection].bulk_write(requests, ordered=False, session=session)
+
+
+async def _find_secrets(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    collection: str,
+    query: dict,
+    last_id: ObjectId | None,
+    limit: int,
+) -> list[dict]:
+    """
+    Helper function to list a batch of documents and their secret, in `_id` order.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        collection: Name of the collection (items or heads).
+        query: Query on the secret value.
+        last_id: Last `_id` of the previous batch, None for the first batch.
+        limit: Maximum number of documents returned.
+    Returns:
+        List of documents with their `_id` and `secret_value`.
+    """
+    if last_id is not None:
+        query = {**query, '_id': {'$gt': last_id}}
+    cursor = client[DATABASE][collection].find(
+        query, {'secret_value': 1}, session=session
+    ).sort('_id', 1).limit(limit)
+    return await cursor.to_list(None)
+
+async def list_string_secrets(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    collection: str,
+    last_id: ObjectId | None,
+    limit: int,
+) -> list[dict]:
+    """
+    List a batch of documents whose secret is still stored as a base64 string, in `_id` order.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        collection: Name of the collection (items or heads).
+        last_id: Last `_id` of the previous batch, None for the first batch.
+        limit: Maximum number of documents returned.
+    Returns:
+        List of documents with their `_id` and `secret_value`.
+    """
+    query = {'secret_value': {'$type': 'string'}}
+    return await _find_secrets(client, session, collection, query, last_id, limit)
+
+async def list_encrypted_secrets(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    collection: str,
+    last_id: ObjectId | None,
+    limit: int,
+) -> list[dict]:
+    """
+    List a batch of documents with an encrypted secret, binary or legacy string, in `_id` order.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        collection: Name of the collection (items or heads).
+        last_id: Last `_id` of the previous batch, None for the first batch.
+        limit: Maximum number of documents returned.
+    Returns:
+        List of documents with their `_id` and `secret_value`.
+    """
+    query = {'$or': [{'secret_value': {'$type': 'binData'}}, {'secret_value': {'$type': 'string'}}]}
+    return await _find_secrets(client, session, collection, query, last_id, limit)
+
+async def replace_secret_values(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    collection: str,
+    updates: list[tuple[ObjectId, Any, Any]],
+) -> int:
+    """
+    Replace secret values in bulk. A document is only updated if its secret is still the expected one,
+    so concurrent writes are never overwritten.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        collection: Name of the collection (items or heads).
+        updates: List of (`_id`, current secret value, new secret value).
+    Returns:
+        Number of documents updated.
+    """
+    if not updates:
+        return 0
+    requests = [
+        UpdateOne({'_id': _id, 'secret_value': current}, {'$set': {'secret_value': new}})
+        for _id, current, new in updates
+    ]
+    result = await client[DATABASE][collection].bulk_write(requests, ordered=False, session=session)
+    return result.modified_count
@@ -4,7 +4,7 @@ from pymongo.errors import DuplicateKeyError
 
 from src.watsh.lib.exceptions import MemberNotFound, MemberAlreadyExist
 from src.watsh.lib.models import Member
-from .collections import DATABASE, MEMBERS_COLLECTION
+from .collections import DATABASE, MEMBERS_COLLECTION, PROJECTS_COLLECTION, ENVIRONMENTS_COLLECTION, BRANCHES_COLLECTION
 
 async def create_member(
     client: AgnosticClient, 
@@ -143,4 +143,38 @@ async def is_user_member_of_project(
     doc = await client[DATABASE][MEMBERS_COLLECTION].find_one(
         {'project': project_id, 'user': user_id}, session=session
     )
-    return doc is not None
\ No newline at end of file
+    return doc is not None
+
+async def get_member_context(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    user_id: ObjectId, 
+    project_id: ObjectId, 
+    environment_id: ObjectId | None = None,
+    branch_id: ObjectId | None = None,
+) -> dict | None:
+    """
+    Load a user's membership of a project, with the project, environment and branch, in one aggregation.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        user_id: ObjectId of the user.
+        project_id: ObjectId of the project.
+        environment_id: ObjectId of the environment, None to skip it.
+        branch_id: ObjectId of the branch, None to skip it.
+    Returns:
+        Member document with `projects`, `environments` and `branches` lists (empty when not found),
+        or None if the user is not a member of the project.
+    """
+    pipeline = [
+        {'$match': {'project': project_id, 'user': user_id}},
+        {'$limit': 1},
+        {'$addFields': {'_environment': environment_id, '_branch': branch_id}},
+        {'$lookup': {'from': PROJECTS_COLLECTION, 'localField': 'project', 'foreignField': '_id', 'as': 'projects'}},
+        {'$lookup': {'from': ENVIRONMENTS_COLLECTION, 'localField': '_environment', 'foreignField': '_id', 'as': 'environments'}},
+        {'$lookup': {'from': BRANCHES_COLLECTION, 'localField': '_branch', 'foreignField': '_id', 'as': 'branches'}},
+    ]
+    docs = await client[DATABASE][MEMBERS_COLLECTION].aggregate(pipeline, session=session).to_list(None)
+    if not docs:
+        return None
+    return docs[0]
@@ -0,0 +1,43 @@
+from bson import ObjectId
+from motor.core import AgnosticClient, AgnosticClientSession
+
+from src.watsh.lib.models import Revocation
+from .collections import DATABASE, REVOCATIONS_COLLECTION
+
+
+async def revoke_user_tokens(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    user_id: ObjectId,
+    timestamp: int,
+) -> None:
+    """
+    Revoke every token issued to a user up to a timestamp.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        user_id: ID of the user.
+        timestamp: Tokens issued before this time, in milliseconds, are revoked.
+    """
+    await client[DATABASE][REVOCATIONS_COLLECTION].update_one(
+        {'user': user_id}, {'$max': {'revoked_at': timestamp}}, upsert=True, session=session
+    )
+
+async def list_revocations(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    since: int,
+) -> list[Revocation]:
+    """
+    List the revocations made after a timestamp.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        since: Revocations older than this time, in milliseconds, are skipped.
+    Returns:
+        List of Revocation instances.
+    """
+    cursor = client[DATABASE][REVOCATIONS_COLLECTION].find(
+        {'revoked_at': {'$gte': since}}, {'_id': 0}, session=session
+    )
+    return [Revocation(**doc) async for doc in cursor]
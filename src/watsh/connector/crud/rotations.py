@@ -0,0 +1,116 @@
+from motor.core import AgnosticClient, AgnosticClientSession
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from src.watsh.lib.exceptions import RotationAlreadyRunning
+from src.watsh.lib.models import Rotation, RotationStatus
+from .collections import DATABASE, ROTATIONS_COLLECTION
+
+
+async def create_rotation(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    key_id: str,
+    collection: str,
+    timestamp: int,
+) -> Rotation:
+    """
+    Create a new key rotation, starting at the beginning of a collection.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        key_id: Hex key id of the target data key.
+        collection: Name of the first collection to rotate.
+        timestamp: Start time of the rotation.
+    Returns:
+        Rotation instance.
+    Raises:
+        RotationAlreadyRunning: If another rotation is running.
+    """
+    rotation = Rotation(
+        key_id=key_id, status=RotationStatus.RUNNING, collection=collection,
+        started_at=timestamp, updated_at=timestamp,
+    )
+    try:
+        await client[DATABASE][ROTATIONS_COLLECTION].insert_one(
+            rotation.model_dump(exclude_none=True, by_alias=True), session=session
+        )
+    except DuplicateKeyError:
+        raise RotationAlreadyRunning()
+    return rotation
+
+async def get_last_rotation(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+) -> Rotation | None:
+    """
+    Retrieve the most recent key rotation.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+    Returns:
+        Rotation instance, or None if no rotation was ever started.
+    """
+    doc = await client[DATABASE][ROTATIONS_COLLECTION].find_one(
+        {}, sort=[('started_at', -1), ('_id', -1)], session=session
+    )
+    if not doc:
+        return None
+    return Rotation(**doc)
+
+async def update_rotation(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    rotation: Rotation,
+) -> None:
+    """
+    Save the progress of a key rotation (checkpoint).
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        rotation: Rotation instance.
+    Returns:
+        None
+    """
+    await client[DATABASE][ROTATIONS_COLLECTION].replace_one(
+        {'_id': rotation.id}, rotation.model_dump(exclude_none=True, by_alias=True), session=session
+    )
+
+async def set_rotation_status(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    rotation: Rotation,
+    status: RotationStatus,
+    timestamp: int,
+    error: str | None = None,
+) -> Rotation:
+    """
+    Change the status of a key rotation, unless it was changed or checkpointed since it was read.
+    Args:
+        client: MongoDB client.
+        session: MongoDB client session.
+        rotation: Rotation instance, as read.
+        status: New status.
+        timestamp: Time of the change.
+        error: Error of a failed rotation.
+    Returns:
+        Updated rotation instance.
+    Raises:
+        RotationAlreadyRunning: If the rotation changed since it was read, or another rotation is running.
+    """
+    update = {'$set': {'status': status.value, 'updated_at': timestamp}}
+    if error is None:
+        update['$unset'] = {'error': ''}
+    else:
+        update['$set']['error'] = error
+
+    try:
+        doc = await client[DATABASE][ROTATIONS_COLLECTION].find_one_and_update(
+            {'_id': rotation.id, 'status': rotation.status, 'updated_at': rotation.updated_at},
+            update, return_document=ReturnDocument.AFTER, session=session,
+        )
+    except DuplicateKeyError:
+        raise RotationAlreadyRunning()
+    if not doc:
+        raise RotationAlreadyRunning()
+    return Rotation(**doc)
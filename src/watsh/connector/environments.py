@@ -1,7 +1,7 @@
 from bson import ObjectId
-from motor.core import AgnosticClient
+from motor.core import AgnosticClient, AgnosticClientSession
 
-from . import workflows, access_control, validation
+from . import workflows, access_control, validation, sessions
 from .crud import environments as crud_environments
 from src.watsh.lib.models import Environment
 from src.watsh.lib.exceptions import BadRequest
@@ -13,32 +13,26 @@ async def create(
     slug: str, 
 ) -> ObjectId:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
-
-            # Create the environment
-            environment_id = await workflows.create_environment(
-                client=client,
-                session=session,
-                project_id=project_id,
-                slug=slug,
-                default=False
-            )
-
-            # Commit the transaction
-            await session.commit_transaction()
-    
-    return environment_id
+    async def transaction(session: AgnosticClientSession) -> ObjectId:
+
+        # Access control and validation of the project
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            check_is_not_archive=True,
+        )
+
+        # Create the environment
+        environment_id = await workflows.create_environment(
+            client=client,
+            session=session,
+            project_id=project_id,
+            slug=slug,
+            default=False
+        )
+
+        return environment_id
+
+    return await sessions.run_transaction(client, transaction)
 
 async def get(
     client: AgnosticClient, 
@@ -46,50 +40,35 @@ async def get(
     project_id: ObjectId, 
     environment_id: ObjectId,
 ) -> Environment:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Get environment
-            environment = await crud_environments.get_environment(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id
-            )
-
-            # Commit the transaction
-            await session.commit_transaction()
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Access control and validation of the environment
+        context = await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id,
+        )
 
-    return environment
+    return context.environment
 
 
 async def list_environments(
     client: AgnosticClient, current_user_id: ObjectId, project_id: ObjectId,
 ) -> list[Environment]:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Get environments
-            environments = await crud_environments.list_environments_per_project(
-                client=client,
-                session=session,
-                project_id=project_id
-            )
-
-            # Commit the transaction
-            await session.commit_transaction()
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Access control and validation of the project
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+        )
+
+        # Get environments
+        environments = await crud_environments.list_environments_per_project(
+            client=client,
+            session=session,
+            project_id=project_id
+        )
 
     return environments
 
@@ -102,32 +81,21 @@ async def slug_update(
     slug: str,
 ) -> None:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
+    async def transaction(session: AgnosticClientSession) -> None:
 
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
+        # Access control and validation of the project and environment
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, check_is_not_archive=True,
+        )
 
-            # Update the slug
-            await crud_environments.update_slug(
-                client=client, session=session, 
-                project_id=project_id, environment_id=environment_id, slug=slug
-            )
+        # Update the slug
+        await crud_environments.update_slug(
+            client=client, session=session, 
+            project_id=project_id, environment_id=environment_id, slug=slug
+        )
 
-            # Commit the transaction
-            await session.commit_transaction()
+    await sessions.run_transaction(client, transaction)
 
 
 
@@ -138,48 +106,37 @@ async def default_update(
     environment_id: ObjectId, 
 ) -> None:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
+    async def transaction(session: AgnosticClientSession) -> None:
 
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
+        # Access control and validation of the project and environment
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, check_is_not_archive=True,
+        )
 
-            # Get old default environment
-            old_default_environement = await crud_environments.get_default_environment(
-                client=client,
-                session=session,
-                project_id=project_id,
-            )
+        # Get old default environment
+        old_default_environement = await crud_environments.get_default_environment(
+            client=client,
+            session=session,
+            project_id=project_id,
+        )
 
-            # Check if environent is not already default
-            if old_default_environement.id == environment_id:
-                raise BadRequest('This environment is already set as default.')
+        # Check if environent is not already default
+        if old_default_environement.id == environment_id:
+            raise BadRequest('This environment is already set as default.')
 
-            # Update the environent
-            await crud_environments.update_default(
-                client=client, session=session, project_id=project_id,
-                environment_id=old_default_environement.id, default=False
-            )
+        # Update the environent
+        await crud_environments.update_default(
+            client=client, session=session, project_id=project_id,
+            environment_id=old_default_environement.id, default=False
+        )
 
-            await crud_environments.update_default(
-                client=client, session=session, project_id=project_id,
-                environment_id=environment_id, default=True
-            )
+        await crud_environments.update_default(
+            client=client, session=session, project_id=project_id,
+            environment_id=environment_id, default=True
+        )
 
-            # Commit the transaction
-            await session.commit_transaction()
+    await sessions.run_transaction(client, transaction)
 
 
 
@@ -190,34 +147,23 @@ async def delete(
     environment_id: ObjectId,
 ) -> None:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
-
-            # Environment ID validation
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Delete environment
-            await workflows.delete_environment(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id
-            )
-
-            # Commit the transaction
-            await session.commit_transaction()
+    async def transaction(session: AgnosticClientSession) -> None:
+
+        # Access control and validation of the project and environment
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, check_is_not_archive=True,
+        )
+
+        # Delete environment
+        await workflows.delete_environment(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id
+        )
+
+    await sessions.run_transaction(client, transaction)
 
 
 # async def archive_environment(
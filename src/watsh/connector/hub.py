@@ -0,0 +1,151 @@
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from bson import ObjectId
+from motor.core import AgnosticClient
+from pydantic import ValidationError
+from pymongo.errors import PyMongoError
+
+from .crud.collections import DATABASE, COMMITS_COLLECTION
+from src.watsh.lib.models import Commit
+
+# Seconds to wait before reopening a failed change stream
+WATCH_RETRY_DELAY = 5
+
+# Events a subscriber can lag behind before the oldest ones are dropped
+SUBSCRIBER_QUEUE_SIZE = 16
+
+# Bursts of commits on a branch are coalesced: only the last commit is dispatched, once the branch
+# was quiet for COALESCE_WINDOW seconds, and at most COALESCE_MAX_LATENCY seconds after the first one
+COALESCE_WINDOW = 0.05
+COALESCE_MAX_LATENCY = 0.5
+
+# (project, environment, branch)
+BranchKey = tuple[ObjectId, ObjectId, ObjectId]
+
+# Subscribers receive the new commits of their branch, or None when they may have missed some
+Event = Optional[Commit]
+
+_subscribers: dict[BranchKey, set[asyncio.Queue[Event]]] = {}
+
+# Branch -> (last commit, time of the first commit of the burst, flush timer)
+_pending: dict[BranchKey, tuple[Commit, float, asyncio.TimerHandle]] = {}
+
+
+def configure(window: float, max_latency: float) -> None:
+    """
+    Configure the coalescing of the commit bursts, in seconds. A zero window dispatches every commit.
+    """
+    global COALESCE_WINDOW, COALESCE_MAX_LATENCY
+    COALESCE_WINDOW, COALESCE_MAX_LATENCY = window, max_latency
+
+
+def _offer(queue: asyncio.Queue[Event], event: Event) -> None:
+    # A slow subscriber only needs the latest state: make room by dropping its oldest event
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+@contextmanager
+def subscription(project_id: ObjectId, environment_id: ObjectId, branch_id: ObjectId) -> Iterator[asyncio.Queue[Event]]:
+    """
+    Subscribe to the commits of a branch for the duration of the block.
+    Args:
+        project_id: Project ID.
+        environment_id: Environment ID.
+        branch_id: Branch ID.
+    Yields:
+        Queue receiving the new commits of the branch, or None when the stream restarted
+        and commits may have been missed.
+    """
+    key = (project_id, environment_id, branch_id)
+    queue: asyncio.Queue[Event] = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    _subscribers.setdefault(key, set()).add(queue)
+    try:
+        yield queue
+    finally:
+        subscribers = _subscribers.get(key, set())
+        subscribers.discard(queue)
+        if not subscribers:
+            _subscribers.pop(key, None)
+
+
+def _dispatch(key: BranchKey, commit: Commit) -> None:
+    for queue in _subscribers.get(key, ()):
+        _offer(queue, commit)
+
+
+def _flush(key: BranchKey) -> None:
+    commit, _, _ = _pending.pop(key)
+    _dispatch(key, commit)
+
+
+def publish(commit: Commit) -> None:
+    """
+    Dispatch a new commit to the subscribers of its branch, once its burst of commits is over.
+    """
+    key = (commit.project, commit.environment, commit.branch)
+    if key not in _subscribers:
+        return
+    if COALESCE_WINDOW <= 0:
+        _dispatch(key, commit)
+        return
+
+    loop = asyncio.get_running_loop()
+    pending = _pending.get(key)
+    if pending is None:
+        first = loop.time()
+    else:
+        _, first, timer = pending
+        timer.cancel()
+
+    delay = min(COALESCE_WINDOW, first + COALESCE_MAX_LATENCY - loop.time())
+    _pending[key] = (commit, first, loop.call_later(max(delay, 0), _flush, key))
+
+
+def resync() -> None:
+    """
+    Tell every subscriber that commits may have been missed.
+    """
+    for subscribers in _subscribers.values():
+        for queue in subscribers:
+            _offer(queue, None)
+
+
+def metrics() -> dict:
+    return {
+        'branches': len(_subscribers),
+        'pending': len(_pending),
+        'subscribers': sum(len(subscribers) for subscribers in _subscribers.values()),
+    }
+
+
+async def watch(client: AgnosticClient) -> None:
+    """
+    Dispatch the new commits to the subscribers of their branch from one change stream, until cancelled.
+    Subscribers are told to resync every time the stream (re)opens, as commits may have been missed in between.
+    Malformed commits are skipped, any other error reopens the stream.
+    """
+    pipeline = [{'$match': {'operationType': 'insert'}}]
+
+    while True:
+        try:
+            async with client[DATABASE][COMMITS_COLLECTION].watch(pipeline) as stream:
+                resync()
+                async for change in stream:
+                    try:
+                        commit = Commit(**change['fullDocument'])
+                    except (KeyError, TypeError, ValidationError) as err:
+                        logging.warning(f'Skipping malformed commit event {change.get("_id")}: {err}')
+                        continue
+                    publish(commit)
+
+        except PyMongoError as err:
+            logging.warning(f'Commit stream failed, retrying in {WATCH_RETRY_DELAY}s: {err}')
+            await asyncio.sleep(WATCH_RETRY_DELAY)
+
+        except Exception:
+            logging.exception(f'Commit stream crashed, retrying in {WATCH_RETRY_DELAY}s.')
+            await asyncio.sleep(WATCH_RETRY_DELAY)
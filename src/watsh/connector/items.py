@@ -1,16 +1,19 @@
 from bson import ObjectId
-from motor.core import AgnosticClient
+from motor.core import AgnosticClient, AgnosticClientSession
 from typing import Any
+from collections import Counter
 from jsonschema import protocols, validate
 
-from . import access_control, validation
-from .crud import items as crud_items, commits as crud_commits
+from . import validation, sessions
+from .crud import items as crud_items, commits as crud_commits, branches as crud_branches
 from src.watsh.lib.models import Item, ItemType, ItemUpdate
 from src.watsh.lib.time import now_ms
 from src.watsh.lib.pyobjectid import NULL_OBJECTID
 from src.watsh.lib.exceptions import BadRequest, ItemNotFound, JSONSchemaError
-from src.watsh.lib.crypto import encrypt, decrypt
+from src.watsh.lib.crypto_service import CryptoService
 
+# Default number of documents per bulk write of the snapshot commits
+WRITE_CHUNK_SIZE = 500
 
 
 async def create(
@@ -25,77 +28,74 @@ async def create(
     secret_value: Any,
     secret_active: bool,
     commit_message: str,
-    aes_password: str,
+    crypto: CryptoService,
+    base_commit: ObjectId | None = None,
 ) -> ObjectId:
     # Arrays
     if item_type ==ItemType.ARRAY:
         raise Exception('Array not yet supported')
     
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
-
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
+    async def transaction(session: AgnosticClientSession) -> ObjectId:
+        
+        # Access control and validation of the project, environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, check_is_not_archive=True,
+        )
+
+        # Fail fast if the branch moved since the base commit of the client
+        await validation.base_commit_validation(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, base_commit=base_commit,
+        )
+
+        # Check parent exists, is active, and is either an object or an array
+        if parent_id != NULL_OBJECTID:
+            parent_item = await crud_items.get_item(
+                client=client,
+                session=session,
+                project_id=project_id,
+                environment_id=environment_id,
+                branch_id=branch_id,
+                item_id=parent_id
             )
-
-            # Check parent exists, is active, and is either an object or an array
-            if parent_id != NULL_OBJECTID:
-                parent_item = await crud_items.get_item(
-                    client=client,
-                    session=session,
-                    project_id=project_id,
-                    environment_id=environment_id,
-                    branch_id=branch_id,
-                    item_id=parent_id
-                )
-                
-                if parent_item.type not in [ItemType.OBJECT.value, ItemType.ARRAY.value]:
-                    raise BadRequest('Parent item can only be an object or array.')
+            
+            if parent_item.type not in [ItemType.OBJECT.value, ItemType.ARRAY.value]:
+                raise BadRequest('Parent item can only be an object or array.')
 
 #                 if parent_item.type == ItemType.ARRAY:
 #                     # TODO: slug must be the next item index (0, 1, 2, ...)
 #                     ...
 
-            # Create the commit
-            timestamp = now_ms()
+        # Create the commit
+        timestamp = now_ms()
+        commit_id = ObjectId()
+        sequence = await crud_branches.next_sequence(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, commit_id=commit_id,
+        )
+
+        await crud_commits.create_commit(
+            client=client, session=session, current_user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, commit_message=commit_message,
+            timestamp=timestamp, sequence=sequence, commit_id=commit_id,
+        )
+        
+        # Create the item
+        item_id = ObjectId()
 
-            commit_id = await crud_commits.create_commit(
-                client=client, session=session, current_user_id=current_user_id, project_id=project_id,
-                environment_id=environment_id, branch_id=branch_id, commit_message=commit_message, timestamp=timestamp
-            )
-            
-            # Create the item
-            item_id = ObjectId()
+        encrypted_secret = await crypto.encrypt(str(secret_value))
 
-            encrypted_secret = encrypt(aes_password, str(secret_value))
+        await crud_items.create_item(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, parent_id=parent_id, item_id=item_id, item_slug=slug, item_type=item_type,
+            item_active=True, secret_value=encrypted_secret, secret_active=secret_active, commit_id=commit_id, timestamp=timestamp, sequence=sequence,
+        )
 
-            await crud_items.create_item(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-                branch_id=branch_id, parent_id=parent_id, item_id=item_id, item_slug=slug, item_type=item_type,
-                item_active=True, secret_value=encrypted_secret, secret_active=secret_active, commit_id=commit_id, timestamp=timestamp,
-            )
+        return item_id
 
-            # Commit the transaction
-            await session.commit_transaction()
-    
-    return item_id
+    return await sessions.run_transaction(client, transaction)
 
 
 
@@ -105,44 +105,34 @@ async def list_items(
     project_id: ObjectId,
     environment_id: ObjectId,
     branch_id: ObjectId,
-    aes_password: str,
-) -> list[Item]:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
+    crypto: CryptoService,
+) -> tuple[list[Item], ObjectId | None]:
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Access control and validation of the environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id,
+        )
 
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
+        # Head commit, from the same snapshot as the items
+        head = await validation.get_branch_head(
+            client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id,
+        )
 
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
+        # Get items
+        items = await crud_items.list_items(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id
+        )
 
-            # Get items
-            items = await crud_items.list_items(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id
-            )
-
-            for item in items:
-                decrypted_secret = decrypt(aes_password, item.secret_value)
-                item.secret_value = verify_secret(item.type, decrypted_secret)
-
-            # Commit the transaction
-            await session.commit_transaction()
+        await decrypt_items(crypto, items)
 
-    return items
+    return items, head
 
 
 
@@ -153,43 +143,28 @@ async def list_items_by_parent(
     environment_id: ObjectId,
     branch_id: ObjectId,
     parent_id: ObjectId,
-    aes_password: str,
+    crypto: CryptoService,
 ) -> list[Item]:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
-
-            # Get items
-            items = await crud_items.list_items_per_parent(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                parent_id=parent_id,
-            )
-
-            for item in items:
-                decrypted_secret = decrypt(aes_password, item.secret_value)
-                item.secret_value = verify_secret(item.type, decrypted_secret)
-
-            # Commit the transaction
-            await session.commit_transaction()
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Access control and validation of the environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id,
+        )
+
+        # Get items
+        items = await crud_items.list_items_per_parent(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+            parent_id=parent_id,
+        )
+
+        await decrypt_items(crypto, items)
 
     return items
 
@@ -201,34 +176,36 @@ async def get(
     environment_id: ObjectId,
     branch_id: ObjectId,
     item_id: ObjectId,
-    aes_password: str,
-) -> Item:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
+    crypto: CryptoService,
+) -> tuple[Item, ObjectId | None]:
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Access control and validation of the environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id,
+        )
 
-            # Get item
-            item = await crud_items.get_item(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                item_id=item_id
-            )
+        # Head commit, from the same snapshot as the item
+        head = await validation.get_branch_head(
+            client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id,
+        )
 
-            decrypted_secret = decrypt(aes_password, item.secret_value)
-            item.secret_value = verify_secret(item.type, decrypted_secret)
-            
-            # Commit the transaction
-            await session.commit_transaction()
+        # Get item
+        item = await crud_items.get_item(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+            item_id=item_id
+        )
+
+        decrypted_secret = await crypto.decrypt(item.secret_value)
+        item.secret_value = verify_secret(item.type, decrypted_secret)
 
-    return item
+    return item, head
 
 
 
@@ -243,58 +220,48 @@ async def slug_update(
     commit_message: str,
 ) -> ObjectId:    
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
-
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
-
-            # Create the commit
-            timestamp = now_ms()
-
-            commit_id = await crud_commits.create_commit(
-                client=client, session=session, current_user_id=current_user_id, project_id=project_id,
-                environment_id=environment_id, branch_id=branch_id, commit_message=commit_message, timestamp=timestamp
-            )
-            
-            # Get item
-            item = await crud_items.get_item(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                item_id=item_id
-            )
+    async def transaction(session: AgnosticClientSession) -> ObjectId:
+        
+        # Access control and validation of the project, environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, check_is_not_archive=True,
+        )
+
+        # Create the commit
+        timestamp = now_ms()
+        commit_id = ObjectId()
+        sequence = await crud_branches.next_sequence(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, commit_id=commit_id,
+        )
+
+        await crud_commits.create_commit(
+            client=client, session=session, current_user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, commit_message=commit_message,
+            timestamp=timestamp, sequence=sequence, commit_id=commit_id,
+        )
+        
+        # Get item
+        item = await crud_items.get_item(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+            item_id=item_id
+        )
 
-            # Create new item version
-            item_version_id = await crud_items.create_item(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-                branch_id=branch_id, parent_id=item.parent, item_id=item_id, item_slug=slug, item_type=item.type,
-                item_active=True, secret_value=item.secret_value, secret_active=item.secret_active, commit_id=commit_id, timestamp=timestamp,
-            )
+        # Create new item version
+        item_version_id = await crud_items.create_item(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, parent_id=item.parent, item_id=item_id, item_slug=slug, item_type=item.type,
+            item_active=True, secret_value=item.secret_value, secret_active=item.secret_active, commit_id=commit_id, timestamp=timestamp, sequence=sequence,
+        )
 
-            # Commit the transaction
-            await session.commit_transaction()
+        return item_version_id
 
-    return item_version_id
+    return await sessions.run_transaction(client, transaction)
 
 
 async def delete(
@@ -305,58 +272,55 @@ async def delete(
     branch_id: ObjectId,
     item_id: ObjectId,
     commit_message: str,
+    base_commit: ObjectId | None = None,
 ) -> None:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
-
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
-            
-            # Create the commit
-            timestamp = now_ms()
-
-            commit_id = await crud_commits.create_commit(
-                client=client, session=session, current_user_id=current_user_id, project_id=project_id,
-                environment_id=environment_id, branch_id=branch_id, commit_message=commit_message, timestamp=timestamp
-            )
-            
-            # Get item
-            item = await crud_items.get_item(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                item_id=item_id
-            )
+    async def transaction(session: AgnosticClientSession) -> None:
+        
+        # Access control and validation of the project, environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, check_is_not_archive=True,
+        )
+
+        # Fail fast if the branch moved since the base commit of the client
+        await validation.base_commit_validation(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, base_commit=base_commit,
+        )
+        
+        # Create the commit
+        timestamp = now_ms()
+        commit_id = ObjectId()
+        sequence = await crud_branches.next_sequence(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, commit_id=commit_id,
+        )
+
+        await crud_commits.create_commit(
+            client=client, session=session, current_user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, commit_message=commit_message,
+            timestamp=timestamp, sequence=sequence, commit_id=commit_id,
+        )
+        
+        # Get item
+        item = await crud_items.get_item(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+            item_id=item_id
+        )
 
-            # Create new item version
-            await crud_items.create_item(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-                branch_id=branch_id, parent_id=item.parent, item_id=item_id, item_slug=item.slug, item_type=item.type,
-                item_active=False, secret_value=None, secret_active=False, commit_id=commit_id, timestamp=timestamp,
-            )
+        # Create new item version
+        await crud_items.create_item(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, parent_id=item.parent, item_id=item_id, item_slug=item.slug, item_type=item.type,
+            item_active=False, secret_value=None, secret_active=False, commit_id=commit_id, timestamp=timestamp, sequence=sequence,
+        )
 
-            # Commit the transaction
-            await session.commit_transaction()
+    await sessions.run_transaction(client, transaction)
 
 
 
@@ -367,54 +331,39 @@ async def list_items_per_commit(
     environment_id: ObjectId,
     branch_id: ObjectId,
     commit_id: ObjectId,
-    aes_password: str,
+    crypto: CryptoService,
 ) -> list[Item]:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
-
-            # Get commit
-            commit = await crud_commits.get_commit(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                commit_id=commit_id,
-            )
-
-            # Get items at this commit
-            item_versions = await crud_items.list_items_per_commit(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                commit_timestamp=commit.timestamp,
-            )
-
-            for item in item_versions:
-                decrypted_secret = decrypt(aes_password, item.secret_value)
-                item.secret_value = verify_secret(item.type, decrypted_secret)
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Access control and validation of the environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id,
+        )
+
+        # Get commit
+        commit = await crud_commits.get_commit(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+            commit_id=commit_id,
+        )
+
+        # Get items at this commit
+        item_versions = await crud_items.list_items_per_commit(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+            commit=commit,
+        )
+
+        await decrypt_items(crypto, item_versions)
 
-            # Commit the transaction
-            await session.commit_transaction()
-    
     return item_versions
 
 
@@ -452,6 +401,28 @@ def verify_secret(item_type: ItemType, secret_value: str) -> str | int | float |
         raise BadRequest(f'Wrong secret format: {item_type} vs {secret_value}')
 
 
+async def decrypt_items(crypto: CryptoService, items: list[Item]) -> None:
+    """
+    Decrypt the secrets of a list of items in place, as a single batch on the crypto worker pool.
+    """
+    decrypted_secrets = await crypto.decrypt_many([item.secret_value for item in items])
+    for item, decrypted_secret in zip(items, decrypted_secrets):
+        item.secret_value = verify_secret(item.type, decrypted_secret)
+
+
+async def write_items(
+    client: AgnosticClient, session: AgnosticClientSession, crypto: CryptoService, items: list[Item], chunk_size: int,
+) -> None:
+    """
+    Encrypt the plain secrets of new item versions as a single batch, then write them in bulk.
+    """
+    encrypted_secrets = await crypto.encrypt_many([item.secret_value for item in items])
+    for item, encrypted_secret in zip(items, encrypted_secrets):
+        item.secret_value = encrypted_secret
+
+    await crud_items.create_items(client=client, session=session, items=items, chunk_size=chunk_size)
+
+
 async def create_secret(
     client: AgnosticClient,
     current_user_id: ObjectId,
@@ -461,67 +432,57 @@ async def create_secret(
     item_id: ObjectId,
     secret: str,
     commit_message: str,
-    aes_password: str,
+    crypto: CryptoService,
 ) -> None:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
-
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
-
-            # Get corresponding item
-            snapshot_item = await crud_items.get_item(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                item_id=item_id
-            )
-
-            if snapshot_item.type in [ItemType.OBJECT, ItemType.ARRAY]:
-                raise BadRequest(f'{snapshot_item.type} cannot hold secrets.')
-            
-            # Check the secret match the item schema
-            casted_secret = verify_secret(ItemType[snapshot_item.type], secret)
-
-            # Create the commit
-            timestamp = now_ms()
-
-            commit_id = await crud_commits.create_commit(
-                client=client, session=session, current_user_id=current_user_id, project_id=project_id,
-                environment_id=environment_id, branch_id=branch_id, commit_message=commit_message, timestamp=timestamp
-            )
-
-            # Update the item
-            encrypted_secret = encrypt(aes_password, str(casted_secret))
-
-            await crud_items.create_item(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-                branch_id=branch_id, parent_id=snapshot_item.parent, item_id=item_id, item_slug=snapshot_item.slug, item_type=snapshot_item.type,
-                item_active=True, secret_value=encrypted_secret, secret_active=True, commit_id=commit_id, timestamp=timestamp,
-            )
-
-            # Commit the transaction
-            await session.commit_transaction()
+    async def transaction(session: AgnosticClientSession) -> None:
+        
+        # Access control and validation of the project, environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, check_is_not_archive=True,
+        )
+
+        # Get corresponding item
+        snapshot_item = await crud_items.get_item(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+            item_id=item_id
+        )
+
+        if snapshot_item.type in [ItemType.OBJECT, ItemType.ARRAY]:
+            raise BadRequest(f'{snapshot_item.type} cannot hold secrets.')
+        
+        # Check the secret match the item schema
+        casted_secret = verify_secret(ItemType[snapshot_item.type], secret)
+
+        # Create the commit
+        timestamp = now_ms()
+        commit_id = ObjectId()
+        sequence = await crud_branches.next_sequence(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, commit_id=commit_id,
+        )
+
+        await crud_commits.create_commit(
+            client=client, session=session, current_user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, commit_message=commit_message,
+            timestamp=timestamp, sequence=sequence, commit_id=commit_id,
+        )
+
+        # Update the item
+        encrypted_secret = await crypto.encrypt(str(casted_secret))
+
+        await crud_items.create_item(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, parent_id=snapshot_item.parent, item_id=item_id, item_slug=snapshot_item.slug, item_type=snapshot_item.type,
+            item_active=True, secret_value=encrypted_secret, secret_active=True, commit_id=commit_id, timestamp=timestamp, sequence=sequence,
+        )
+
+    await sessions.run_transaction(client, transaction)
     
 
 async def delete_secret(
@@ -534,56 +495,46 @@ async def delete_secret(
     commit_message: str,
 ) -> None:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
-
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
-
-            # Get corresponding item
-            snapshot_item = await crud_items.get_item(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                item_id=item_id
-            )
-
-            # Create the commit
-            timestamp = now_ms()
-
-            commit_id = await crud_commits.create_commit(
-                client=client, session=session, current_user_id=current_user_id, project_id=project_id,
-                environment_id=environment_id, branch_id=branch_id, commit_message=commit_message, timestamp=timestamp
-            )
-
-            # Update the item
-            await crud_items.create_item(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-                branch_id=branch_id, parent_id=snapshot_item.parent, item_id=item_id, item_slug=snapshot_item.slug, item_type=snapshot_item.type,
-                item_active=True, secret_value=None, secret_active=False, commit_id=commit_id, timestamp=timestamp,
-            )
-
-            # Commit the transaction
-            await session.commit_transaction()
+    async def transaction(session: AgnosticClientSession) -> None:
+        
+        # Access control and validation of the project, environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, check_is_not_archive=True,
+        )
+
+        # Get corresponding item
+        snapshot_item = await crud_items.get_item(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+            item_id=item_id
+        )
+
+        # Create the commit
+        timestamp = now_ms()
+        commit_id = ObjectId()
+        sequence = await crud_branches.next_sequence(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, commit_id=commit_id,
+        )
+
+        await crud_commits.create_commit(
+            client=client, session=session, current_user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, commit_message=commit_message,
+            timestamp=timestamp, sequence=sequence, commit_id=commit_id,
+        )
+
+        # Update the item
+        await crud_items.create_item(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, parent_id=snapshot_item.parent, item_id=item_id, item_slug=snapshot_item.slug, item_type=snapshot_item.type,
+            item_active=True, secret_value=None, secret_active=False, commit_id=commit_id, timestamp=timestamp, sequence=sequence,
+        )
+
+    await sessions.run_transaction(client, transaction)
     
 
 
@@ -591,280 +542,323 @@ async def delete_secret(
 async def create_from_schema(
     client: AgnosticClient, current_user_id: ObjectId,
     project_id: ObjectId, environment_id: ObjectId, branch_id: ObjectId,
-    json_schema: dict, json_values: dict, commit_message: str, aes_password: str,
-) -> None:
+    json_schema: dict, json_values: dict, commit_message: str, crypto: CryptoService,
+    chunk_size: int = WRITE_CHUNK_SIZE, base_commit: ObjectId | None = None,
+) -> ObjectId:
     # Validate json schema
     protocols.Validator.check_schema(json_schema)
     validate(json_values, json_schema)
 
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
+    async def transaction(session: AgnosticClientSession) -> ObjectId:
+        
+        # Access control and validation of the project, environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, check_is_not_archive=True,
+        )
+
+        # Fail fast if the branch moved since the base commit of the client
+        await validation.base_commit_validation(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, base_commit=base_commit,
+        )
+
+        # TODO: Update project description and slug
+
+        # Root keys
+        try:
+            root_item_type = json_schema['type']
+            root_item_properties = json_schema['properties']
+        except KeyError as exc: 
+            raise JSONSchemaError('The JSON schema miss a key: {exc}')
+        
+        # The JSON schema must start with an `object` type
+        try:
+            root_item_type_str = str(root_item_type)
+        except ValueError: 
+            raise JSONSchemaError('The `type` key is not a dict.')
+        
+        if not root_item_type_str.lower() == ItemType.OBJECT.value:
+            raise JSONSchemaError('The JSON schema must start with an `object` type.')
+
+        # The `properties` key must be a dict.
+        try:
+            root_item_properties_dict = dict(root_item_properties)
+        except ValueError: 
+            raise JSONSchemaError('The `properties` key is not a dict.')
+
+        # Load the branch head once, with its plain secrets, to diff the snapshot against.
+        # Only active secrets are decrypted: deleted secrets have no value left.
+        head = await crud_items.list_items(
+            client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id
+        )
+        secret_items = [item for item in head if item.secret_active and item.secret_value is not None]
+        head_secrets = dict(zip(
+            [item.item for item in secret_items],
+            await crypto.decrypt_many([item.secret_value for item in secret_items]),
+        ))
+        head_by_slug = {(item.parent, item.slug): (item, head_secrets.get(item.item)) for item in head}
+
+        # New item versions of the changed, new and removed items, with plain secrets until written in bulk
+        timestamp = now_ms()
+        commit_id = ObjectId()
+        versions: list[Item] = []
+        added, changed = 0, 0
+
+        def add_version(
+            parent_id: ObjectId, item_id: ObjectId, slug: str, item_type: ItemType,
+            active: bool, secret_value: Any, secret_active: bool,
+        ) -> None:
+            versions.append(Item(
+                project=project_id, environment=environment_id, branch=branch_id,
+                item=item_id, parent=parent_id, slug=slug, type=item_type, active=active,
+                secret_value=str(secret_value), secret_active=secret_active, commit=commit_id, timestamp=timestamp,
+            ))
+
+        # For each property
+        item_ids = set()
+
+        async def update_items(properties: dict, parent_id: ObjectId, parent_type: ItemType, secret_node: dict) -> None:
+            nonlocal added, changed
+
+            for slug, value in properties.items():
+                
+                # Check parent type
+                if not parent_type in [ItemType.OBJECT, ItemType.ARRAY]:
+                    raise JSONSchemaError(f'{parent_type} used as a container.')
 
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
+                # Retrieve the item type
+                item_type = ItemType[str(value['type']).upper()]
+                
+                # Retrieve or create the item Id
+                snapshot_item, snapshot_secret = head_by_slug.get((parent_id, slug), (None, None))
+                item_id = snapshot_item.item if snapshot_item else ObjectId()
 
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
+                item_ids.add(item_id)
 
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
+                # Get secret
+                secret_value = None
+                secret_active = False
 
-            # TODO: Update project description and slug
+                if not item_type in [ItemType.ARRAY, ItemType.OBJECT]:
+                    try:
+                        secret_value = verify_secret(item_type, secret_node[slug])
+                        secret_active = True
+                    except KeyError:
+                        raise JSONSchemaError('All item require a secret for now.')
+
+                # Update the item, unless unchanged
+                if snapshot_item is None:
+                    added += 1
+                    add_version(parent_id, item_id, slug, item_type, True, secret_value, secret_active)
+                elif (
+                    snapshot_item.type != item_type.value
+                    or snapshot_item.secret_active != secret_active
+                    or (secret_active and snapshot_secret != str(secret_value))
+                ):
+                    changed += 1
+                    add_version(parent_id, item_id, slug, item_type, True, secret_value, secret_active)
+
+                # Go to child node
+                if item_type == ItemType.ARRAY:
+                    raise Exception('Not supported yet.')
+                elif item_type == ItemType.OBJECT:
+                    await update_items(value['properties'], item_id, item_type, secret_node[slug])
+                    
+        await update_items(root_item_properties_dict, NULL_OBJECTID, ItemType.OBJECT, json_values)
+
+        # Delete all items not in schema
+        removed = 0
+        for item in head:
+            if item.item not in item_ids:
+                removed += 1
+                add_version(item.parent, item.item, item.slug, item.type, False, None, False)
+
+        # An empty diff does not create a commit, unless the branch has none yet
+        if not versions:
+            last_commit = await crud_commits.get_last_commit(
+                client=client, session=session, project_id=project_id,
+                environment_id=environment_id, branch_id=branch_id,
+            )
+            if last_commit:
+                return last_commit.id
+
+        # Create the commit
+        sequence = await crud_branches.next_sequence(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, commit_id=commit_id,
+        )
+
+        await crud_commits.create_commit(
+            client=client, session=session, current_user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, commit_message=commit_message,
+            timestamp=timestamp, sequence=sequence, commit_id=commit_id, added=added, changed=changed, removed=removed,
+        )
+
+        for version in versions:
+            version.sequence = sequence
+
+        # Write the item versions in bulk
+        await write_items(client, session, crypto, versions, chunk_size)
+
+        return commit_id
+
+    return await sessions.run_transaction(client, transaction)
+
+
+def plan_updates(head: list[Item], updates: list[ItemUpdate]) -> list[ItemUpdate]:
+    """
+    Plan the item versions written by a list of updates, in memory and in linear time.
+    Updates are applied in hierarchical order from the root: the updates of a container are applied
+    in list order, then the live containers inside it are visited by slug. Updates whose parent is
+    never reached are ignored, deactivated containers deactivate their whole subtree.
+    Args:
+        head: Live items of the branch.
+        updates: Requested updates.
+    Returns:
+        New item versions, with their secret cast to its item type.
+    Raises:
+        BadRequest: If an update breaks the type, parent or slug rules.
+    """
+    containers = [ItemType.OBJECT.value, ItemType.ARRAY.value]
+
+    # Branch head, kept up to date with the planned versions
+    live: dict[ObjectId, ItemUpdate | Item] = {item.item: item for item in head}
+    children: dict[ObjectId, dict[ObjectId, ItemUpdate | Item]] = {}
+    slugs: Counter[tuple[ObjectId, str]] = Counter()
+    for item in head:
+        children.setdefault(item.parent, {})[item.item] = item
+        slugs[(item.parent, item.slug)] += 1
+
+    updates_per_parent: dict[ObjectId, list[ItemUpdate]] = {}
+    for update in updates:
+        updates_per_parent.setdefault(update.parent, []).append(update)
+
+    versions: list[ItemUpdate] = []
+
+    def add_version(version: ItemUpdate) -> None:
+        previous = live.pop(version.item, None)
+        if previous is not None:
+            del children[previous.parent][previous.item]
+            slugs[(previous.parent, previous.slug)] -= 1
+        if version.active:
+            live[version.item] = version
+            children.setdefault(version.parent, {})[version.item] = version
+            slugs[(version.parent, version.slug)] += 1
+        versions.append(version)
+
+    def delete_all_children(item_id: ObjectId) -> None:
+        for child in sorted(children.get(item_id, {}).values(), key=lambda child: child.slug):
+            add_version(ItemUpdate(
+                item=child.item, parent=child.parent, type=child.type, active=False,
+                slug=child.slug, secret_value=str(None), secret_active=False,
+            ))
+            if child.type in containers:
+                delete_all_children(child.item)
+
+    def process_update(update: ItemUpdate) -> None:
+        # Cast the secret value with the right corresponding type
+        casted_secret = None
+
+        if update.secret_value:
+            # Check that OBJECT and ARRAY have not secret value
+            if update.type in [ItemType.OBJECT, ItemType.ARRAY]:
+                raise BadRequest(f'{update.type} cannot hold secrets.')
+
+            casted_secret = verify_secret(update.type, update.secret_value)
+
+        item = live.get(update.item)
+        if item is not None:
+            if item.type != ItemType(update.type).value:
+                raise BadRequest(f'Item type cannot change.')
+
+            if item.parent != update.parent:
+                raise BadRequest(f'Item parent cannot change.')
 
-            # Root keys
-            try:
-                root_item_type = json_schema['type']
-                root_item_properties = json_schema['properties']
-            except KeyError as exc: 
-                raise JSONSchemaError('The JSON schema miss a key: {exc}')
-            
-            # The JSON schema must start with an `object` type
-            try:
-                root_item_type_str = str(root_item_type)
-            except ValueError: 
-                raise JSONSchemaError('The `type` key is not a dict.')
-            
-            if not root_item_type_str.lower() == ItemType.OBJECT.value:
-                raise JSONSchemaError('The JSON schema must start with an `object` type.')
+        else:
+            if not update.active:
+                return
 
-            # The `properties` key must be a dict.
-            try:
-                root_item_properties_dict = dict(root_item_properties)
-            except ValueError: 
-                raise JSONSchemaError('The `properties` key is not a dict.')
+            # check the slug is not already taken
+            if slugs[(update.parent, update.slug)]:
+                raise BadRequest(f'Slug already taken.')
 
-            # Create the commit
-            timestamp = now_ms()
+        # update or create the item
+        add_version(update.model_copy(update={'secret_value': str(casted_secret)}))
 
-            commit_id = await crud_commits.create_commit(
-                client=client, session=session, current_user_id=current_user_id, project_id=project_id,
-                environment_id=environment_id, branch_id=branch_id, commit_message=commit_message, timestamp=timestamp
-            )
+        if not update.active and update.type in containers:
+            # Delete all children items
+            delete_all_children(update.item)
 
-            # For each property
-            item_ids = []
+    # Process updates in hierarchical order, starting from null
+    stack = [NULL_OBJECTID]
+    while stack:
+        parent_id = stack.pop()
 
-            async def update_items(properties: dict, parent_id: ObjectId, parent_type: ItemType, secret_node: dict) -> None:
-                for slug, value in properties.items():
-                    
-                    # Check parent type
-                    if not parent_type in [ItemType.OBJECT, ItemType.ARRAY]:
-                        raise JSONSchemaError(f'{parent_type} used as a container.')
+        for update in updates_per_parent.pop(parent_id, []):
+            process_update(update)
 
-                    # Retrieve the item type
-                    item_type = ItemType[str(value['type']).upper()]
-                    
-                    # Retrieve or create the item Id                    
-                    try:
-                        snapshot_item = await crud_items.get_item_by_slug(
-                            client=client, session=session, project_id=project_id, environment_id=environment_id,
-                            branch_id=branch_id, parent_id=parent_id, slug=slug
-                        )
-                        item_id = snapshot_item.item
-                    except ItemNotFound:
-                        item_id = ObjectId()
-
-                    item_ids.append(item_id)
-
-                    # Get secret
-                    secret_value = None
-                    secret_active = False
-
-                    if not item_type in [ItemType.ARRAY, ItemType.OBJECT]:
-                        try:
-                            secret_value = verify_secret(item_type, secret_node[slug])
-                            secret_active = True
-                        except KeyError:
-                            raise JSONSchemaError('All item require a secret for now.')
-
-                    # Update the item
-                    encrypted_secret = encrypt(aes_password, str(secret_value))
-
-                    await crud_items.create_item(
-                        client=client, session=session, project_id=project_id, environment_id=environment_id,
-                        branch_id=branch_id, parent_id=parent_id, item_id=item_id, item_slug=slug, item_type=item_type,
-                        item_active=True, secret_value=encrypted_secret, secret_active=secret_active, commit_id=commit_id, timestamp=timestamp,
-                    )
-
-                    # Go to child node
-                    if item_type == ItemType.ARRAY:
-                        raise Exception('Not supported yet.')
-                    elif item_type == ItemType.OBJECT:
-                        await update_items(value['properties'], item_id, item_type, secret_node[slug])
-                        
-            await update_items(root_item_properties_dict, NULL_OBJECTID, ItemType.OBJECT, json_values)
-
-            # Delete all items not in schema
-            items = await crud_items.list_items(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id
-            )
-            
-            encrypted_secret = encrypt(aes_password, str(None))
-
-            for item in items:
-                if item.item not in item_ids:
-                    await crud_items.create_item(
-                        client=client, session=session, project_id=project_id, environment_id=environment_id,
-                        branch_id=branch_id, parent_id=item.parent, item_id=item.item, item_slug=item.slug, item_type=item.type,
-                        item_active=False, secret_value=encrypted_secret, secret_active=False, commit_id=commit_id, timestamp=timestamp,
-                    )
-
-            # Commit the transaction
-            await session.commit_transaction()
-    
-    return commit_id
+        # Visit the containers by slug: pushed in reverse order on the stack
+        nested = [child for child in children.get(parent_id, {}).values() if child.type in containers]
+        stack.extend(child.item for child in sorted(nested, key=lambda child: child.slug, reverse=True))
+
+    return versions
 
 
 async def create_from_updates(
     client: AgnosticClient, current_user_id: ObjectId,
     project_id: ObjectId, environment_id: ObjectId, branch_id: ObjectId,
-    updates: list[ItemUpdate], commit_message: str, aes_password: str,
+    updates: list[ItemUpdate], commit_message: str, crypto: CryptoService,
+    chunk_size: int = WRITE_CHUNK_SIZE, base_commit: ObjectId | None = None,
 ) -> ObjectId:
     
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
-
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
-
-            # Create the commit
-            timestamp = now_ms()
-
-            commit_id = await crud_commits.create_commit(
-                client=client, session=session, current_user_id=current_user_id, project_id=project_id,
-                environment_id=environment_id, branch_id=branch_id, commit_message=commit_message, timestamp=timestamp
-            )
-
-            # Process updates
-            async def delete_all_children(item_id: ObjectId) -> None:
-                childrens = await crud_items.list_items_per_parent(
-                    client=client, session=session, project_id=project_id, environment_id=environment_id,
-                    branch_id=branch_id, parent_id=item_id,
-                )
-
-                encrypted_secret = encrypt(aes_password, str(None))
-
-                for child in childrens:
-                    await crud_items.create_item(
-                        client=client, session=session, project_id=project_id, environment_id=environment_id,
-                        branch_id=branch_id, parent_id=child.parent, item_id=child.item, item_slug=child.slug, item_type=child.type,
-                        item_active=False, secret_value=encrypted_secret, secret_active=False, commit_id=commit_id, timestamp=timestamp,
-                    )
-
-                    if ItemType(child.type) in [ItemType.ARRAY, ItemType.OBJECT]:
-                        await delete_all_children(child.item)
-
-
-            async def process_update(update: ItemUpdate) -> None:
-                # Cast the secret value with the right corresponding type
-                casted_secret = None
-
-                if update.secret_value:
-                    # Check that OBJECT and ARRAY have not secret value
-                    if update.type in [ItemType.OBJECT, ItemType.ARRAY]:
-                        raise BadRequest(f'{update.type} cannot hold secrets.')
-                
-                    casted_secret = verify_secret(update.type, update.secret_value)
-
-                # Get the item
-                try:
-                    item = await crud_items.get_item(
-                        client=client, session=session, project_id=project_id, environment_id=environment_id,
-                        branch_id=branch_id, item_id=update.item,
-                    )
-
-                    if item.type != ItemType(update.type).value:
-                        raise BadRequest(f'Item type cannot change.')
-                    
-                    if item.parent != update.parent:
-                        raise BadRequest(f'Item parent cannot change.')
-                    
-                except ItemNotFound:
-                    
-                    if not update.active:
-                        return
-                    
-                    # check the slug is not already taken
-                    try:
-                        await crud_items.get_item_by_slug(
-                            client=client, session=session, project_id=project_id, environment_id=environment_id,
-                            branch_id=branch_id, parent_id=update.parent, slug=update.slug,
-                        )
-                    except ItemNotFound:
-                        pass
-                    else:
-                        raise BadRequest(f'Slug already taken.')
-                
-                
-                # update or create the item
-                encrypted_secret = encrypt(aes_password, str(casted_secret))
-
-                await crud_items.create_item(
-                    client=client, session=session, project_id=project_id, environment_id=environment_id,
-                    branch_id=branch_id, parent_id=update.parent, item_id=update.item, item_slug=update.slug, item_type=update.type,
-                    item_active=update.active, secret_value=encrypted_secret, secret_active=update.secret_active, commit_id=commit_id, timestamp=timestamp,
-                )
-                
-                if not update.active and ItemType(update.type) in [ItemType.OBJECT, ItemType.ARRAY]:
-                    # Delete all children items
-                    await delete_all_children(update.item)
-                    
-
-            def filter_updates(updates: list[ItemUpdate], parent_id: ObjectId) -> list[ItemUpdate]:
-                return [update for update in updates if update.parent == parent_id]
-            
-            async def process_updates(updates: list[ItemUpdate], parent_id: ObjectId) -> None:
-                # Get the updates of the parent and process
-                filtered_updates = filter_updates(updates, parent_id)
-
-                for update in filtered_updates:
-                    await process_update(update)
-                    updates.remove(update)
-
-                # Get the list of items in current container
-                parents = await crud_items.list_items_per_parent(
-                    client=client, session=session, project_id=project_id, environment_id=environment_id,
-                    branch_id=branch_id, parent_id=parent_id,
-                )
-
-                # Process updates in hierarchical order, starting from parent
-                for parent in parents:
-                    if ItemType(parent.type) in [ItemType.OBJECT, ItemType.ARRAY]:
-                        await process_updates(updates, parent.item)
-
-            # Process updates in hierarchical order, starting from null
-            await process_updates(updates, NULL_OBJECTID)
+    async def transaction(session: AgnosticClientSession) -> ObjectId:
         
-            # Commit the transaction
-            await session.commit_transaction()
-    
-    return commit_id
\ No newline at end of file
+        # Access control and validation of the project, environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, check_is_not_archive=True,
+        )
+
+        # Fail fast if the branch moved since the base commit of the client
+        await validation.base_commit_validation(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, base_commit=base_commit,
+        )
+
+        # Load the branch head once and plan the new item versions in memory
+        head = await crud_items.list_items(
+            client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id
+        )
+        planned_versions = plan_updates(head, updates)
+
+        # Create the commit
+        timestamp = now_ms()
+        commit_id = ObjectId()
+        sequence = await crud_branches.next_sequence(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, commit_id=commit_id,
+        )
+
+        await crud_commits.create_commit(
+            client=client, session=session, current_user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, commit_message=commit_message,
+            timestamp=timestamp, sequence=sequence, commit_id=commit_id,
+        )
+
+        # Write the item versions in bulk
+        versions = [
+            Item(
+                project=project_id, environment=environment_id, branch=branch_id,
+                item=version.item, parent=version.parent, slug=version.slug, type=version.type,
+                active=version.active, secret_value=version.secret_value, secret_active=version.secret_active,
+                commit=commit_id, timestamp=timestamp, sequence=sequence,
+            )
+            for version in planned_versions
+        ]
+        await write_items(client, session, crypto, versions, chunk_size)
+
+        return commit_id
+
+    return await sessions.run_transaction(client, transaction)
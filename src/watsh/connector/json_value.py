@@ -1,96 +1,123 @@
+import json
+import asyncio
 from bson import ObjectId
+from typing import Any, Awaitable, Callable, TypeVar
 from motor.core import AgnosticClient, AgnosticClientSession
 
-from . import access_control, validation
+from . import validation, tree, sessions, caches
 from .items import verify_secret
 from .crud import items as crud_items, commits as crud_commits
-from src.watsh.lib.models import ItemType
+from src.watsh.lib import json_patch
+from src.watsh.lib.cache import MISSING
+from src.watsh.lib.models import Commit, Item, ItemType, JSONSnapshot
 from src.watsh.lib.pyobjectid import NULL_OBJECTID
-from src.watsh.lib.crypto import decrypt
+from src.watsh.lib.crypto_service import CryptoService
+from src.watsh.lib.exceptions import CommitNotFound
 
+T = TypeVar('T')
 
-async def _get_nested_json(
-    client: AgnosticClient, 
-    session: AgnosticClientSession,
-    project_id: ObjectId,
-    environment_id: ObjectId,
-    branch_id: ObjectId,
+
+async def _decrypt_secrets(
+    children: dict[ObjectId, list[Item]],
+    crypto: CryptoService,
+) -> dict[ObjectId, Any]:
+    
+    # Only the active secrets reachable from the root are rendered
+    secret_items = [
+        item for item in tree.iter_descendants(children, NULL_OBJECTID)
+        if item.type != ItemType.OBJECT.value and item.secret_active
+    ]
+
+    decrypted_secrets = await crypto.decrypt_many([item.secret_value for item in secret_items])
+
+    return {
+        item.item: verify_secret(item.type, decrypted_secret)
+        for item, decrypted_secret in zip(secret_items, decrypted_secrets)
+    }
+
+
+def _build_nested_json(
+    children: dict[ObjectId, list[Item]],
     parent_id: ObjectId,
-    aes_password: str,
+    secrets: dict[ObjectId, Any],
 ) -> dict:
     
-    items = await crud_items.list_items_per_parent(
-        client=client, session=session, project_id=project_id, environment_id=environment_id,
-        branch_id=branch_id, parent_id=parent_id,
-    )
-
     result = {}
 
-    for item in items:
+    for item in children.get(parent_id, []):
         if item.type == ItemType.OBJECT.value:
-            result[item.slug] = await _get_nested_json(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
+            result[item.slug] = _build_nested_json(
+                children=children,
                 parent_id=item.item,
-                aes_password=aes_password
+                secrets=secrets
             )
         
         # elif item.type == ItemType.ARRAY.value:
 
         else:
             if item.secret_active:
-                decrypted_secret = decrypt(aes_password, item.secret_value)
-                casted_secret = verify_secret(item.type, decrypted_secret)
-                result[item.slug] = casted_secret
+                result[item.slug] = secrets[item.item]
 
     return result
 
 
-async def get_json(
-    client: AgnosticClient,
-    current_user_id: ObjectId,
+async def _get_nested_json(
+    client: AgnosticClient, 
+    session: AgnosticClientSession,
     project_id: ObjectId,
     environment_id: ObjectId,
     branch_id: ObjectId,
-    aes_password: str,
+    crypto: CryptoService,
 ) -> dict:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
+    
+    # Fetch the whole branch at once, the tree is assembled in memory
+    items = await crud_items.list_items(
+        client=client, session=session, project_id=project_id, environment_id=environment_id,
+        branch_id=branch_id,
+    )
 
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
+    children = tree.index_by_parent(items)
 
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
+    return _build_nested_json(
+        children=children,
+        parent_id=NULL_OBJECTID,
+        secrets=await _decrypt_secrets(children, crypto),
+    )
 
-            # Values
-            values = await _get_nested_json(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                parent_id=NULL_OBJECTID,
-                aes_password=aes_password,
-            )
 
-            # Commit the transaction
-            await session.commit_transaction()
+async def get_json(
+    client: AgnosticClient,
+    current_user_id: ObjectId,
+    project_id: ObjectId,
+    environment_id: ObjectId,
+    branch_id: ObjectId,
+    crypto: CryptoService,
+) -> tuple[dict, ObjectId | None]:
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Access control and validation of the environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id,
+        )
 
-    return values
+        # Head commit, from the same snapshot as the values
+        head = await validation.get_branch_head(
+            client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id,
+        )
+
+        # Values
+        values = await _get_nested_json(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+            crypto=crypto,
+        )
+
+    return values, head
 
 
 
@@ -101,46 +128,27 @@ async def _get_nested_json_per_commit(
     project_id: ObjectId,
     environment_id: ObjectId,
     branch_id: ObjectId,
-    parent_id: ObjectId,
-    commit_timestamp: int,
-    aes_password: str,
+    commit: Commit,
+    crypto: CryptoService,
 ) -> dict:
     
-    items = await crud_items.list_items_per_commit_per_parent(
+    # Fetch the whole branch at this commit at once, the tree is assembled in memory
+    items = await crud_items.list_items_per_commit(
         client=client,
         session=session,
         project_id=project_id,
         environment_id=environment_id,
         branch_id=branch_id,
-        parent_id=parent_id,
-        commit_timestamp=commit_timestamp
+        commit=commit,
     )
 
-    result = {}
+    children = tree.index_by_parent(items)
 
-    for item in items:
-        if item.type == ItemType.OBJECT.value:
-            result[item.slug] = await _get_nested_json_per_commit(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                parent_id=item.item,
-                commit_timestamp=commit_timestamp,
-                aes_password=aes_password
-            )
-        
-        # elif item.type == ItemType.ARRAY.value:
-        # ...
-
-        else:
-            if item.secret_active:
-                decrypted_secret = decrypt(aes_password, item.secret_value)
-                casted_secret = verify_secret(item.type, decrypted_secret)
-                result[item.slug] = casted_secret
-
-    return result
+    return _build_nested_json(
+        children=children,
+        parent_id=NULL_OBJECTID,
+        secrets=await _decrypt_secrets(children, crypto),
+    )
 
 
 async def get_json_per_commit(
@@ -150,51 +158,258 @@ async def get_json_per_commit(
     environment_id: ObjectId,
     branch_id: ObjectId,
     commit_id: ObjectId,
-    aes_password: str,
+    crypto: CryptoService,
 ) -> dict:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Access control and validation of the environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id,
+        )
+
+        # Get commit
+        commit = await crud_commits.get_commit(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+            commit_id=commit_id,
+        )
+
 
-            # Verify environment ID
-            await validation.environment_validation(
+        # Values
+        values = await _get_nested_json_per_commit(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+            commit=commit,
+            crypto=crypto,
+        )
+
+    return values
+
+
+# (project, environment, branch, notified commit) -> snapshot rendering in progress, shared by the subscribers,
+# ('at', project, environment, branch, commit) for the renderings of past commits
+_renders: dict[tuple, asyncio.Task] = {}
+
+
+def serialize_snapshot(values: dict) -> str:
+    # The websocket protocol sends the JSON document as a JSON string
+    return json.dumps(json.dumps(values), separators=(',', ':'))
+
+
+def _cached_message(key: tuple, build: Callable[[], str]) -> str:
+    # Messages are shared by the subscribers at the same commits; snapshots without commit are not cached
+    if None in key:
+        return build()
+    message = caches.patches.get(key)
+    if message is MISSING:
+        message = build()
+        caches.patches.set(key, message)
+    return message
+
+
+def snapshot_message(snapshot: JSONSnapshot) -> str:
+    """
+    Message of the patch protocol carrying a whole snapshot, tagged with its commit.
+    """
+    return _cached_message(('snapshot', snapshot.commit), lambda: json.dumps({
+        'type': 'snapshot',
+        'commit': str(snapshot.commit) if snapshot.commit else None,
+        'sequence': snapshot.sequence,
+        'values': snapshot.values,
+    }, separators=(',', ':')))
+
+
+def patch_message(base: JSONSnapshot, snapshot: JSONSnapshot) -> str | None:
+    """
+    Message of the patch protocol bringing a subscriber from the snapshot it has to a new one:
+    a JSON Patch (RFC 6902) tagged with both commits, or the whole snapshot when it is not larger.
+    Returns:
+        The message, or None if the snapshots are at the same commit.
+    """
+    if base.commit is not None and base.commit == snapshot.commit:
+        return None
+
+    def build() -> str:
+        patch = json_patch.diff(base.values, snapshot.values)
+        message = json.dumps({
+            'type': 'patch',
+            'base': str(base.commit) if base.commit else None,
+            'commit': str(snapshot.commit) if snapshot.commit else None,
+            'sequence': snapshot.sequence,
+            'patch': patch,
+        }, separators=(',', ':'))
+        full = snapshot_message(snapshot)
+        return message if len(message) < len(full) else full
+
+    return _cached_message((base.commit, snapshot.commit), build)
+
+
+async def _shared_render(key: tuple, render: Callable[[], Awaitable[T]]) -> T:
+    task = _renders.get(key)
+    if task is None:
+        task = asyncio.create_task(render())
+        _renders[key] = task
+        task.add_done_callback(lambda _: _renders.pop(key, None))
+
+    # A subscriber leaving does not cancel the rendering of the others
+    return await asyncio.shield(task)
+
+
+async def _render_snapshot_at(
+    client: AgnosticClient,
+    project_id: ObjectId,
+    environment_id: ObjectId,
+    branch_id: ObjectId,
+    commit_id: ObjectId,
+    crypto: CryptoService,
+) -> JSONSnapshot | None:
+    async with sessions.read_only(client) as session:
+        try:
+            commit = await crud_commits.get_commit(
                 client=client, session=session, project_id=project_id, environment_id=environment_id,
+                branch_id=branch_id, commit_id=commit_id,
             )
+        except CommitNotFound:
+            return None
 
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
+        values = await _get_nested_json_per_commit(
+            client=client, session=session, project_id=project_id, environment_id=environment_id,
+            branch_id=branch_id, commit=commit, crypto=crypto,
+        )
+
+    snapshot = JSONSnapshot(
+        commit=commit.id, sequence=commit.sequence or 0, values=values, message=serialize_snapshot(values),
+    )
+    caches.snapshots.set((project_id, environment_id, branch_id, commit.id), snapshot)
+    return snapshot
+
+
+async def _render_snapshot(
+    client: AgnosticClient,
+    project_id: ObjectId,
+    environment_id: ObjectId,
+    branch_id: ObjectId,
+    crypto: CryptoService,
+) -> JSONSnapshot:
+    # The last commit and the items are read at the same point in time
+    async with sessions.read_only(client) as session:
+        last_commit = await crud_commits.get_last_commit(
+            client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id,
+        )
+        if last_commit is None:
+            values = await _get_nested_json(
+                client=client, session=session, project_id=project_id, environment_id=environment_id,
+                branch_id=branch_id, crypto=crypto,
             )
+            return JSONSnapshot(values=values, message=serialize_snapshot(values))
 
-            # Get commit
-            commit = await crud_commits.get_commit(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                commit_id=commit_id,
+        key = (project_id, environment_id, branch_id, last_commit.id)
+        snapshot = caches.snapshots.get(key)
+        if snapshot is MISSING:
+            values = await _get_nested_json(
+                client=client, session=session, project_id=project_id, environment_id=environment_id,
+                branch_id=branch_id, crypto=crypto,
             )
+            snapshot = JSONSnapshot(
+                commit=last_commit.id, sequence=last_commit.sequence or 0, values=values,
+                message=serialize_snapshot(values),
+            )
+            caches.snapshots.set(key, snapshot)
 
+    return snapshot
 
-            # Values
-            values = await _get_nested_json_per_commit(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                parent_id=NULL_OBJECTID,
-                commit_timestamp=commit.timestamp,
-                aes_password=aes_password,
-            )
 
-            # Commit the transaction
-            await session.commit_transaction()
+async def get_json_snapshot(
+    client: AgnosticClient,
+    current_user_id: ObjectId,
+    project_id: ObjectId,
+    environment_id: ObjectId,
+    branch_id: ObjectId,
+    crypto: CryptoService,
+    commit_id: ObjectId | None = None,
+) -> JSONSnapshot:
+    """
+    Render the values of a branch for its websocket subscribers.
+    The branch is rendered once per commit: snapshots are cached per commit, and the subscribers notified
+    of the same commit share a single rendering. Only the access control runs per subscriber.
+    Args:
+        client: MongoDB client.
+        current_user_id: ObjectId of the subscriber.
+        project_id: ObjectId of the project.
+        environment_id: ObjectId of the environment.
+        branch_id: ObjectId of the branch.
+        crypto: Crypto service decrypting the secrets.
+        commit_id: Commit the subscriber was notified of, None for the current head.
+    Returns:
+        Snapshot of the branch head, at `commit_id` or a later commit.
+    """
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
 
-    return values
+        # Access control and validation of the environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id,
+        )
+
+    key = (project_id, environment_id, branch_id, commit_id)
+    if commit_id is not None:
+        snapshot = caches.snapshots.get(key)
+        if snapshot is not MISSING:
+            return snapshot
+
+    return await _shared_render(key, lambda: _render_snapshot(
+        client=client, project_id=project_id, environment_id=environment_id, branch_id=branch_id, crypto=crypto,
+    ))
+
+
+async def get_json_snapshot_at(
+    client: AgnosticClient,
+    current_user_id: ObjectId,
+    project_id: ObjectId,
+    environment_id: ObjectId,
+    branch_id: ObjectId,
+    commit_id: ObjectId,
+    crypto: CryptoService,
+) -> JSONSnapshot | None:
+    """
+    Render the values of a branch at a past commit, the base of the delta sent to a resuming subscriber.
+    Snapshots of the recent commits are cached, and the subscribers resuming from the same commit share
+    a single rendering. Only the access control runs per subscriber.
+    Args:
+        client: MongoDB client.
+        current_user_id: ObjectId of the subscriber.
+        project_id: ObjectId of the project.
+        environment_id: ObjectId of the environment.
+        branch_id: ObjectId of the branch.
+        commit_id: ObjectId of the commit.
+        crypto: Crypto service decrypting the secrets.
+    Returns:
+        Snapshot of the branch at this commit, or None if the commit is not a numbered commit of the branch.
+    """
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+
+        # Access control and validation of the environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id,
+        )
+
+    key = (project_id, environment_id, branch_id, commit_id)
+    snapshot = caches.snapshots.get(key)
+    if snapshot is not MISSING:
+        return snapshot
+
+    return await _shared_render(('at', *key), lambda: _render_snapshot_at(
+        client=client, project_id=project_id, environment_id=environment_id, branch_id=branch_id,
+        commit_id=commit_id, crypto=crypto,
+    ))
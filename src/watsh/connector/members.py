@@ -1,7 +1,7 @@
 from bson import ObjectId
-from motor.core import AgnosticClient
+from motor.core import AgnosticClient, AgnosticClientSession
 
-from . import access_control, validation
+from . import validation, sessions
 from .crud import users as crud_users, members as crud_members, projects as crud_projects
 from src.watsh.lib.models import User
 from src.watsh.lib.exceptions import BadRequest, UnauthorizedException
@@ -11,30 +11,26 @@ from src.watsh.lib.exceptions import BadRequest, UnauthorizedException
 async def list_users(
     client: AgnosticClient, current_user_id: ObjectId, project_id: ObjectId
 ) -> list[User]:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Fetch members of project
-            list_members = await crud_members.list_project_members(
-                client=client,
-                session=session,
-                project_id=project_id
-            )
-
-            results = []
-
-            for member in list_members:
-                user = await crud_users.get_user(client=client, session=session, user_id=member.user) 
-                results.append(user)
-
-            # Commit the transaction
-            await session.commit_transaction()
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Access control and validation of the project
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+        )
+
+        # Fetch members of project
+        list_members = await crud_members.list_project_members(
+            client=client,
+            session=session,
+            project_id=project_id
+        )
+
+        results = []
+
+        for member in list_members:
+            user = await crud_users.get_user(client=client, session=session, user_id=member.user) 
+            results.append(user)
 
     return results
 
@@ -45,51 +41,49 @@ async def transfer_ownership(
     project_id: ObjectId,
 ) -> None:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # If user already has an account
-            if await crud_users.check_user_exists_by_email(
+    async def transaction(session: AgnosticClientSession) -> None:
+
+        # If user already has an account
+        if await crud_users.check_user_exists_by_email(
+            client=client,
+            session=session,
+            email=new_owner_email,
+        ):
+            # Get user information
+            user = await crud_users.get_user_by_email(
                 client=client,
                 session=session,
                 email=new_owner_email,
-            ):
-                # Get user information
-                user = await crud_users.get_user_by_email(
-                    client=client,
-                    session=session,
-                    email=new_owner_email,
-                )
-                user_id = user.id
-
-                # Check transfer is not already done
-                if await crud_projects.is_user_owner(
-                    client=client, session=session, project_id=project_id, user_id=user_id
-                ):
-                    raise BadRequest('You are already the owner of this project.')
-
-            else:
-                # Create user
-                user_id = await crud_users.create_user(client, session, new_owner_email)
+            )
+            user_id = user.id
 
-            # Create membership if it does not exist
-            if not crud_members.is_user_member_of_project(
+            # Check transfer is not already done
+            if await crud_projects.is_user_owner(
                 client=client, session=session, project_id=project_id, user_id=user_id
             ):
-                await crud_members.create_member(
-                    client=client, 
-                    session=session, 
-                    user_id=user_id, 
-                    project_id=project_id
-                )
-
-            # Transfer ownership
-            await crud_projects.update_owner(
-                client=client, session=session, project_id=project_id, owner_id=user_id
+                raise BadRequest('You are already the owner of this project.')
+
+        else:
+            # Create user
+            user_id = await crud_users.create_user(client, session, new_owner_email)
+
+        # Create membership if it does not exist
+        if not crud_members.is_user_member_of_project(
+            client=client, session=session, project_id=project_id, user_id=user_id
+        ):
+            await crud_members.create_member(
+                client=client, 
+                session=session, 
+                user_id=user_id, 
+                project_id=project_id
             )
-                
-            # Commit the transaction
-            await session.commit_transaction()
+
+        # Transfer ownership
+        await crud_projects.update_owner(
+            client=client, session=session, project_id=project_id, owner_id=user_id
+        )
+
+    await sessions.run_transaction(client, transaction)
 
 
 
@@ -100,36 +94,28 @@ async def delete(
     project_id: ObjectId,
 ) -> None:    
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
+    async def transaction(session: AgnosticClientSession) -> None:
 
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
+        # Access control and validation of the project
+        context = await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            check_is_not_archive=True,
+        )
 
-            # Validate the request
-            if await crud_projects.is_user_owner(
-                client=client, session=session, project_id=project_id, user_id=invited_user_id
-            ):
-                raise UnauthorizedException('Project owner cannot be removed.')
+        # Validate the request
+        if context.project.owner == invited_user_id:
+            raise UnauthorizedException('Project owner cannot be removed.')
 
 
-            # Delete member
-            await crud_members.delete_member(
-                client=client,
-                session=session,
-                user_id=invited_user_id,
-                project_id=project_id
-            )
+        # Delete member
+        await crud_members.delete_member(
+            client=client,
+            session=session,
+            user_id=invited_user_id,
+            project_id=project_id
+        )
 
-            # Commit the transaction
-            await session.commit_transaction()
+    await sessions.run_transaction(client, transaction)
 
 
 
@@ -139,44 +125,42 @@ async def accept_invitation(
     email: str,
 ) -> ObjectId:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
+    async def transaction(session: AgnosticClientSession) -> ObjectId:
+
+        # Verify project is not archived
+        await validation.project_validation(
+            client=client, session=session, project_id=project_id, check_is_not_archive=True
+        )
+
+        # If user already exist
+        if await crud_users.check_user_exists_by_email(
+            client=client, session=session, email=email,
+        ):
+            user = await crud_users.get_user_by_email(
+                client=client, session=session, email=email
             )
-            
-            # If user already exist
-            if await crud_users.check_user_exists_by_email(
-                client=client, session=session, email=email,
+            user_id = user.id
+
+            if not await crud_members.is_user_member_of_project(
+                client=client, session=session, project_id=project_id, user_id=user.id
             ):
-                user = await crud_users.get_user_by_email(
-                    client=client, session=session, email=email
-                )
-                user_id = user.id
-
-                if not await crud_members.is_user_member_of_project(
-                    client=client, session=session, project_id=project_id, user_id=user.id
-                ):
-                    await crud_members.create_member(
-                        client=client, 
-                        session=session, 
-                        project_id=project_id, 
-                        user_id=user_id
-                    )
-
-            # If user does not exist
-            else:
-                user_id = await crud_users.create_user(client, session, email)
                 await crud_members.create_member(
                     client=client, 
                     session=session, 
                     project_id=project_id, 
                     user_id=user_id
                 )
-            
-            # Commit the transaction
-            await session.commit_transaction()
-    
-    return user_id
\ No newline at end of file
+
+        # If user does not exist
+        else:
+            user_id = await crud_users.create_user(client, session, email)
+            await crud_members.create_member(
+                client=client, 
+                session=session, 
+                project_id=project_id, 
+                user_id=user_id
+            )
+
+        return user_id
+
+    return await sessions.run_transaction(client, transaction)
\ No newline at end of file
@@ -0,0 +1,139 @@
+import logging
+from bson import ObjectId
+from motor.core import AgnosticClient, AgnosticClientSession
+
+from . import sessions
+from .crud import branches as crud_branches, items as crud_items, commits as crud_commits
+from .crud.collections import ITEMS_COLLECTION, HEADS_COLLECTION
+from src.watsh.lib import crypto
+
+MIGRATION_BATCH_SIZE = 500
+
+
+async def backfill_heads(client: AgnosticClient) -> int:
+    """
+    Rebuild the heads collection of every branch from the item history.
+    Each branch is rebuilt in its own transaction, so the command can be re-run safely.
+    Args:
+        client: MongoDB client.
+    Returns:
+        Number of live items written to the heads collection.
+    """
+    async with await client.start_session() as session:
+        branches = await crud_branches.list_all_branches(client=client, session=session)
+
+    total = 0
+
+    for branch in branches:
+        # Start a transaction to ensure that the branch heads are replaced atomically.
+        async def transaction(session: AgnosticClientSession) -> int:
+            return await crud_items.rebuild_heads(
+                client=client, session=session, project_id=branch.project,
+                environment_id=branch.environment, branch_id=branch.id,
+            )
+
+        count = await sessions.run_transaction(client, transaction)
+
+        logging.info(f'Branch {branch.id}: {count} heads rebuilt.')
+        total += count
+
+    return total
+
+
+async def backfill_sequences(client: AgnosticClient) -> int:
+    """
+    Number the legacy commits of every branch in history order, and their item versions and heads alike,
+    and record the last commit as the branch head.
+    Legacy commits are ordered by timestamp, then ObjectId, and precede the commits numbered since the upgrade:
+    the sequence of a branch is seeded after its legacy commits on its first new commit, so these keep their
+    number, unless legacy commits were written afterwards. Each branch is renumbered in its own transaction,
+    which conflicts with concurrent commits on the branch, so the command can run online and be re-run safely.
+    Args:
+        client: MongoDB client.
+    Returns:
+        Number of commits (re)numbered.
+    """
+    async with await client.start_session() as session:
+        branches = await crud_branches.list_all_branches(client=client, session=session)
+
+    total = 0
+
+    for branch in branches:
+        # Start a transaction to ensure that the branch history is renumbered atomically.
+        async def transaction(session: AgnosticClientSession) -> list[tuple[ObjectId, int]]:
+            # Legacy commits first, by timestamp then ObjectId, then the numbered ones in order
+            commits = await crud_commits.list_commits(
+                client=client, session=session, project_id=branch.project,
+                environment_id=branch.environment, branch_id=branch.id,
+            )
+            sequences = [
+                (commit.id, sequence) for sequence, commit in enumerate(commits, start=1)
+                if commit.sequence != sequence
+            ]
+
+            # Sequences are unique per branch: numbered commits that move are first moved out of the way
+            numbered = {commit.id for commit in commits if commit.sequence is not None}
+            await crud_commits.set_commit_sequences(
+                client=client, session=session,
+                sequences=[(commit_id, -sequence) for commit_id, sequence in sequences if commit_id in numbered],
+            )
+            await crud_commits.set_commit_sequences(client=client, session=session, sequences=sequences)
+            await crud_items.set_item_sequences(client=client, session=session, sequences=sequences)
+            await crud_branches.update_branch_attribute(
+                client=client, session=session, project_id=branch.project,
+                environment_id=branch.environment, branch_id=branch.id,
+                attribute='sequence', value=len(commits),
+            )
+            await crud_branches.update_branch_attribute(
+                client=client, session=session, project_id=branch.project,
+                environment_id=branch.environment, branch_id=branch.id,
+                attribute='head', value=commits[-1].id if commits else None,
+            )
+
+            return sequences
+
+        sequences = await sessions.run_transaction(client, transaction)
+
+        logging.info(f'Branch {branch.id}: {len(sequences)} commits numbered.')
+        total += len(sequences)
+
+    return total
+
+
+async def migrate_secrets(client: AgnosticClient, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """
+    Rewrite the base64 string secrets of the item versions and heads as binary ciphertexts.
+    Secrets are converted without being decrypted. The migration runs online, in batches:
+    each update only applies if the secret is unchanged, so it can be interrupted and re-run.
+    Args:
+        client: MongoDB client.
+        batch_size: Number of documents converted per batch.
+    Returns:
+        Number of documents migrated.
+    """
+    total = 0
+
+    for collection in [ITEMS_COLLECTION, HEADS_COLLECTION]:
+        last_id = None
+
+        while True:
+            async with await client.start_session() as session:
+                docs = await crud_items.list_string_secrets(
+                    client=client, session=session, collection=collection, last_id=last_id, limit=batch_size,
+                )
+                if not docs:
+                    break
+
+                updates = [
+                    (doc['_id'], doc['secret_value'], crypto.to_binary(doc['secret_value']))
+                    for doc in docs
+                ]
+                count = await crud_items.replace_secret_values(
+                    client=client, session=session, collection=collection, updates=updates,
+                )
+
+            last_id = docs[-1]['_id']
+            logging.info(f'Collection {collection}: {count} secrets migrated up to {last_id}.')
+            total += count
+
+    return total
@@ -1,7 +1,7 @@
 from bson import ObjectId
-from motor.core import AgnosticClient
+from motor.core import AgnosticClient, AgnosticClientSession
 
-from . import workflows, access_control, validation
+from . import workflows, validation, sessions
 from .crud import members as crud_members, projects as crud_projects
 from src.watsh.lib.models import Project
 from src.watsh.lib.exceptions import UnauthorizedException
@@ -16,69 +16,58 @@ async def create(
     create_sample_environments: bool = True,
 ) -> ObjectId:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-
-            # Create the project
-            project_id = await workflows.create_project(
-                client=client,
-                session=session,
-                slug=slug,
-                description=description,
-                owner=current_user_id,
-                create_sample_environments=create_sample_environments
-            )
+    async def transaction(session: AgnosticClientSession) -> ObjectId:
 
-            # Commit the transaction
-            await session.commit_transaction()
-    
-    return project_id
+        # Create the project
+        project_id = await workflows.create_project(
+            client=client,
+            session=session,
+            slug=slug,
+            description=description,
+            owner=current_user_id,
+            create_sample_environments=create_sample_environments
+        )
+
+        return project_id
+
+    return await sessions.run_transaction(client, transaction)
 
     
 async def get(
     client: AgnosticClient, current_user_id: ObjectId, project_id: ObjectId
 ) -> Project:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
 
-            # Fetch the project
-            project = await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=False
-            )
+        # Access control and validation of the project
+        context = await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+        )
+        project = context.project
 
-            # Commit the transaction
-            await session.commit_transaction()
-    
     return project
 
 
 async def list_projects(
     client: AgnosticClient, current_user_id: ObjectId
 ) -> list[Project]:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Get memberships
-            list_memberships = await crud_members.list_user_memberships(
-                client=client,
-                session=session,
-                user_id=current_user_id
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Get memberships
+        list_memberships = await crud_members.list_user_memberships(
+            client=client,
+            session=session,
+            user_id=current_user_id
+        )
+
+        results = []
+
+        for membership in list_memberships:
+            project = await crud_projects.find_project(
+                client=client, session=session, project_id=membership.project
             )
-
-            results = []
-
-            for membership in list_memberships:
-                project = await crud_projects.find_project(
-                    client=client, session=session, project_id=membership.project
-                )
-                results.append(project)
+            results.append(project)
 
     return results
 
@@ -90,26 +79,20 @@ async def slug_update(
     slug: str,
 ) -> None:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
+    async def transaction(session: AgnosticClientSession) -> None:
 
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
+        # Access control and validation of the project
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            check_is_not_archive=True,
+        )
 
-            # Update the slug
-            await crud_projects.update_slug(
-                client=client, session=session, project_id=project_id, slug=slug
-            )
+        # Update the slug
+        await crud_projects.update_slug(
+            client=client, session=session, project_id=project_id, slug=slug
+        )
 
-            # Commit the transaction
-            await session.commit_transaction()
+    await sessions.run_transaction(client, transaction)
 
 
 async def description_update(
@@ -119,26 +102,20 @@ async def description_update(
     description: str,
 ) -> ObjectId:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
+    async def transaction(session: AgnosticClientSession) -> None:
 
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
+        # Access control and validation of the project
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            check_is_not_archive=True,
+        )
 
-            # Update the slug
-            await crud_projects.update_description(
-                client=client, session=session, project_id=project_id, description=description
-            )
+        # Update the slug
+        await crud_projects.update_description(
+            client=client, session=session, project_id=project_id, description=description
+        )
 
-            # Commit the transaction
-            await session.commit_transaction()   
+    await sessions.run_transaction(client, transaction)
 
 
 async def archive_project(
@@ -147,22 +124,20 @@ async def archive_project(
     project_id: ObjectId, 
 ) -> ObjectId:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            if not await crud_projects.is_user_owner(
-                client=client, session=session, project_id=project_id, user_id=current_user_id,
-            ):
-                raise UnauthorizedException("Only the project owner can perform this action.")
-
-            # Archive
-            await crud_projects.archive_project(
-                client=client, session=session, project_id=project_id
-            )
+    async def transaction(session: AgnosticClientSession) -> None:
 
-            # Commit the transaction
-            await session.commit_transaction()   
+        # Access control
+        if not await crud_projects.is_user_owner(
+            client=client, session=session, project_id=project_id, user_id=current_user_id,
+        ):
+            raise UnauthorizedException("Only the project owner can perform this action.")
+
+        # Archive
+        await crud_projects.archive_project(
+            client=client, session=session, project_id=project_id
+        )
+
+    await sessions.run_transaction(client, transaction)
 
 
 async def unarchive_project(
@@ -171,46 +146,42 @@ async def unarchive_project(
     project_id: ObjectId, 
 ) -> ObjectId:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            if not await crud_projects.is_user_owner(
-                client=client, session=session, project_id=project_id, user_id=current_user_id,
-            ):
-                raise UnauthorizedException("Only the project owner can perform this action.")
-
-            # Unarchive
-            await crud_projects.unarchive_project(
-                client=client, session=session, project_id=project_id
-            )
+    async def transaction(session: AgnosticClientSession) -> None:
+
+        # Access control
+        if not await crud_projects.is_user_owner(
+            client=client, session=session, project_id=project_id, user_id=current_user_id,
+        ):
+            raise UnauthorizedException("Only the project owner can perform this action.")
 
-            # Commit the transaction
-            await session.commit_transaction()   
+        # Unarchive
+        await crud_projects.unarchive_project(
+            client=client, session=session, project_id=project_id
+        )
+
+    await sessions.run_transaction(client, transaction)
 
 
 async def delete(
     client: AgnosticClient, current_user_id: ObjectId, project_id: ObjectId
 ) -> None:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            if not await crud_projects.is_user_owner(
-                client=client, session=session, project_id=project_id, user_id=current_user_id,
-            ):
-                raise UnauthorizedException("Only the project owner can perform this action.")
-
-            # Delete the project
-            await workflows.delete_project(
-                client=client,
-                session=session,
-                project_id=project_id
-            )
+    async def transaction(session: AgnosticClientSession) -> None:
+
+        # Access control
+        if not await crud_projects.is_user_owner(
+            client=client, session=session, project_id=project_id, user_id=current_user_id,
+        ):
+            raise UnauthorizedException("Only the project owner can perform this action.")
+
+        # Delete the project
+        await workflows.delete_project(
+            client=client,
+            session=session,
+            project_id=project_id
+        )
 
-            # Commit the transaction
-            await session.commit_transaction()
+    await sessions.run_transaction(client, transaction)
 
 
 async def is_user_owner(
@@ -218,16 +189,12 @@ async def is_user_owner(
     current_user_id: ObjectId, 
     project_id: ObjectId,
 ) -> bool:    
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Validate the request
-            result = await crud_projects.is_user_owner(
-                client=client, session=session, project_id=project_id, user_id=current_user_id,
-            )
-
-            # Commit the transaction
-            await session.commit_transaction()
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Validate the request
+        result = await crud_projects.is_user_owner(
+            client=client, session=session, project_id=project_id, user_id=current_user_id,
+        )
 
     return result
\ No newline at end of file
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from bson import ObjectId
+from motor.core import AgnosticClient
+from pymongo.errors import PyMongoError
+
+from .crud import revocations as crud_revocations
+from .crud.collections import DATABASE, REVOCATIONS_COLLECTION
+from src.watsh.lib.time import now_ms
+
+# Revocations only matter while the tokens they revoke are valid: the longest tokens last one year (ms)
+REVOCATION_RETENTION = 366 * 24 * 3600 * 1000
+
+# Seconds to wait before reloading the revocations when the change stream fails
+REFRESH_DELAY = 5
+
+# user -> tokens issued before this time (ms) are revoked
+_revoked: dict[ObjectId, int] = {}
+
+# Whether the revocations were loaded: tokens cannot be checked, and are rejected, before
+_loaded: bool = False
+
+
+def is_loaded() -> bool:
+    return _loaded
+
+
+def is_revoked(user_id: ObjectId, issued_at: float) -> bool:
+    """
+    Check whether a token issued to a user at a given time, in seconds, was revoked.
+    Revocations are recorded in milliseconds: a token issued right after a revocation,
+    within the same second, stays valid.
+    """
+    revoked_at = _revoked.get(user_id)
+    return revoked_at is not None and round(issued_at * 1000) < revoked_at
+
+
+def add(user_id: ObjectId, timestamp: int) -> None:
+    """
+    Record a revocation in this process, before the change stream delivers it.
+    """
+    _revoked[user_id] = max(timestamp, _revoked.get(user_id, timestamp))
+
+
+def reset() -> None:
+    global _loaded
+    _revoked.clear()
+    _loaded = False
+
+
+async def load(client: AgnosticClient) -> None:
+    """
+    Replace the in-memory revocations with the ones stored in the database.
+    """
+    global _loaded
+    async with await client.start_session() as session:
+        revocations = await crud_revocations.list_revocations(
+            client=client, session=session, since=now_ms() - REVOCATION_RETENTION
+        )
+    _revoked.clear()
+    for revocation in revocations:
+        add(revocation.user, revocation.revoked_at)
+    _loaded = True
+
+
+async def _reload(client: AgnosticClient) -> None:
+    try:
+        await load(client)
+    except PyMongoError as err:
+        logging.warning(f'Could not load revocations: {err}')
+
+
+async def watch(client: AgnosticClient) -> None:
+    """
+    Keep the in-memory revocations up to date from a change stream, until cancelled.
+    The revocations are reloaded every time the stream (re)opens, so no change is missed in between.
+    Without change streams, they are reloaded every `REFRESH_DELAY` seconds instead.
+    Malformed revocations are skipped, any other error reopens the stream.
+    """
+    pipeline = [{'$match': {'operationType': {'$in': ['insert', 'update', 'replace']}}}]
+
+    while True:
+        try:
+            async with client[DATABASE][REVOCATIONS_COLLECTION].watch(pipeline, full_document='updateLookup') as stream:
+                await load(client)
+                async for change in stream:
+                    document = change.get('fullDocument')
+                    if not document:
+                        continue
+                    try:
+                        add(document['user'], document['revoked_at'])
+                    except (KeyError, TypeError) as err:
+                        logging.warning(f'Skipping malformed revocation event {change.get("_id")}: {err}')
+
+        except PyMongoError as err:
+            logging.warning(f'Revocation stream failed, reloading every {REFRESH_DELAY}s: {err}')
+            await _reload(client)
+            await asyncio.sleep(REFRESH_DELAY)
+
+        except Exception:
+            logging.exception(f'Revocation stream crashed, reloading every {REFRESH_DELAY}s.')
+            await _reload(client)
+            await asyncio.sleep(REFRESH_DELAY)
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from motor.core import AgnosticClient
+
+from .crud import items as crud_items, rotations as crud_rotations
+from .crud.collections import ITEMS_COLLECTION, HEADS_COLLECTION
+from src.watsh.lib.crypto_service import CryptoService
+from src.watsh.lib.exceptions import RotationAlreadyRunning
+from src.watsh.lib.models import Rotation, RotationStatus
+from src.watsh.lib.time import now
+
+# Collections holding encrypted secrets, rotated in this order
+ROTATION_COLLECTIONS = [ITEMS_COLLECTION, HEADS_COLLECTION]
+
+# A running rotation without checkpoint for this long is considered dead and can be resumed
+ROTATION_TIMEOUT = 300
+
+
+async def get_rotation(client: AgnosticClient) -> Rotation | None:
+    """
+    Retrieve the progress of the most recent key rotation.
+    Args:
+        client: MongoDB client.
+    Returns:
+        Rotation instance, or None if no rotation was ever started.
+    """
+    async with await client.start_session() as session:
+        return await crud_rotations.get_last_rotation(client=client, session=session)
+
+
+async def start_rotation(client: AgnosticClient, crypto: CryptoService) -> Rotation:
+    """
+    Start a key rotation towards the current data key, or resume the last one from its checkpoint.
+    Args:
+        client: MongoDB client.
+        crypto: Crypto service.
+    Returns:
+        Rotation instance.
+    Raises:
+        RotationAlreadyRunning: If another rotation made progress recently, or was started concurrently.
+    """
+    async with await client.start_session() as session:
+        rotation = await crud_rotations.get_last_rotation(client=client, session=session)
+
+        if rotation and rotation.status == RotationStatus.RUNNING.value and now() - rotation.updated_at < ROTATION_TIMEOUT:
+            raise RotationAlreadyRunning()
+
+        # Resume an interrupted rotation towards the same key, otherwise start over.
+        # Both are conditional: of concurrent starts, only one takes over or inserts the running rotation.
+        if rotation and rotation.status != RotationStatus.COMPLETED.value and rotation.key_id == crypto.key_id:
+            return await crud_rotations.set_rotation_status(
+                client=client, session=session, rotation=rotation,
+                status=RotationStatus.RUNNING, timestamp=now(),
+            )
+
+        if rotation and rotation.status == RotationStatus.RUNNING.value:
+            await crud_rotations.set_rotation_status(
+                client=client, session=session, rotation=rotation,
+                status=RotationStatus.FAILED, timestamp=now(), error='Abandoned for a new key.',
+            )
+
+        return await crud_rotations.create_rotation(
+            client=client, session=session, key_id=crypto.key_id,
+            collection=ROTATION_COLLECTIONS[0], timestamp=now(),
+        )
+
+
+async def run_rotation(
+    client: AgnosticClient, crypto: CryptoService, rotation: Rotation, batch_size: int, pause: float,
+) -> Rotation:
+    """
+    Re-encrypt the secrets of the item versions and heads with the current data key.
+    Secrets are processed in bounded batches written with `bulk_write`, each update only applies
+    if the secret is unchanged so foreground writes are never overwritten. Progress is checkpointed
+    after every batch, and the job sleeps between batches to protect foreground latency.
+    Args:
+        client: MongoDB client.
+        crypto: Crypto service, able to read the previous keys.
+        rotation: Rotation started with `start_rotation`.
+        batch_size: Number of documents scanned per batch.
+        pause: Seconds to sleep between batches.
+    Returns:
+        Rotation instance.
+    Raises:
+        asyncio.CancelledError: If cancelled, after saving the rotation as failed so that it can be resumed.
+    """
+    try:
+        for collection in ROTATION_COLLECTIONS[ROTATION_COLLECTIONS.index(rotation.collection):]:
+            if collection != rotation.collection:
+                rotation.collection = collection
+                rotation.last_id = None
+
+            while True:
+                async with await client.start_session() as session:
+                    docs = await crud_items.list_encrypted_secrets(
+                        client=client, session=session, collection=collection,
+                        last_id=rotation.last_id, limit=batch_size,
+                    )
+                    if not docs:
+                        break
+
+                    stale_docs = [doc for doc in docs if crypto.needs_rotation(doc['secret_value'])]
+                    plain_messages = await crypto.decrypt_many([doc['secret_value'] for doc in stale_docs])
+                    cipher_messages = await crypto.encrypt_many(plain_messages)
+
+                    count = await crud_items.replace_secret_values(
+                        client=client, session=session, collection=collection,
+                        updates=[
+                            (doc['_id'], doc['secret_value'], cipher_message)
+                            for doc, cipher_message in zip(stale_docs, cipher_messages)
+                        ],
+                    )
+
+                    # Checkpoint
+                    rotation.last_id = docs[-1]['_id']
+                    rotation.scanned += len(docs)
+                    rotation.rotated += count
+                    rotation.updated_at = now()
+                    await crud_rotations.update_rotation(client=client, session=session, rotation=rotation)
+
+                logging.info(f'Key rotation {rotation.id}: {rotation.rotated}/{rotation.scanned} secrets rotated.')
+                await asyncio.sleep(pause)
+
+        rotation.status = RotationStatus.COMPLETED.value
+
+    except Exception as exc:
+        logging.exception(f'Key rotation {rotation.id} failed.')
+        rotation.status = RotationStatus.FAILED.value
+        rotation.error = str(exc)
+
+    except BaseException:
+        # Cancelled, e.g. on shutdown: release the rotation so it resumes from its last checkpoint
+        logging.warning(f'Key rotation {rotation.id} interrupted.')
+        rotation.status = RotationStatus.FAILED.value
+        rotation.error = 'Interrupted.'
+        await _save_rotation(client, rotation)
+        raise
+
+    await _save_rotation(client, rotation)
+    return rotation
+
+
+async def _save_rotation(client: AgnosticClient, rotation: Rotation) -> None:
+    rotation.updated_at = now()
+    async with await client.start_session() as session:
+        await crud_rotations.update_rotation(client=client, session=session, rotation=rotation)
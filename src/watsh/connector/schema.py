@@ -3,9 +3,9 @@ from motor.core import AgnosticClient, AgnosticClientSession
 from genson import SchemaBuilder
 from jsonschema import protocols
 
-from . import access_control, validation, schema
-from .crud import projects as crud_projects, commits as crud_commits, items as crud_items
-from src.watsh.lib.models import Project, ItemType
+from . import validation, schema, tree, sessions
+from .crud import commits as crud_commits, items as crud_items
+from src.watsh.lib.models import Commit, Project, Item, ItemType
 from src.watsh.lib.pyobjectid import NULL_OBJECTID
 
 
@@ -21,38 +21,15 @@ def build_schema(schema_id: str, project: Project, properties: dict) -> dict:
     }
 
 
-async def get_properties(
-    client: AgnosticClient, 
-    session: AgnosticClientSession,
-    project_id: ObjectId,
-    environment_id: ObjectId,
-    branch_id: ObjectId,
-    parent_id: ObjectId,
-) -> dict:
+def build_properties(children: dict[ObjectId, list[Item]], parent_id: ObjectId) -> dict:
     
-    items = await crud_items.list_items_per_parent(
-        client=client,
-        session=session,
-        project_id=project_id,
-        environment_id=environment_id,
-        branch_id=branch_id,
-        parent_id=parent_id,
-    )
-
     result = {}
     
-    for item in items:
+    for item in children.get(parent_id, []):
         
         if item.type == ItemType.OBJECT.value:
             result[item.slug] = {'type': item.type}
-            result[item.slug]['properties'] = await get_properties(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                parent_id=item.item
-            )
+            result[item.slug]['properties'] = build_properties(children, item.item)
 
         # elif item.type == ItemType.ARRAY.value:
         #     """NOTE: arrays are an abastraction. 
@@ -60,63 +37,58 @@ async def get_properties(
         #     being dynamically generated as an increasing integer.
         #     """
         #     result[item.slug] = {'type': item.type}
-        #     result[item.slug]['properties'] = await get_properties(
-        #         client=client,
-        #         session=session,
-        #         project_id=project_id,
-        #         environment_id=environment_id,
-        #         branch_id=branch_id,
-        #         parent_id=item.item
-        #     )
+        #     result[item.slug]['properties'] = build_properties(children, item.item)
         else:
             result[item.slug] = {'type': item.type}
 
     return result
 
 
-async def get_schema(
+async def get_properties(
     client: AgnosticClient, 
-    current_user_id: ObjectId, 
+    session: AgnosticClientSession,
     project_id: ObjectId,
     environment_id: ObjectId,
     branch_id: ObjectId,
 ) -> dict:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
+    
+    # Fetch the whole branch at once, the tree is assembled in memory
+    items = await crud_items.list_items(
+        client=client,
+        session=session,
+        project_id=project_id,
+        environment_id=environment_id,
+        branch_id=branch_id,
+    )
 
-            # Get project
-            project = await crud_projects.find_project(
-                client=client, session=session, project_id=project_id
-            )
+    return build_properties(tree.index_by_parent(items), NULL_OBJECTID)
 
-            # Get properties
-            properties = await get_properties(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                parent_id=NULL_OBJECTID,
-            )
 
-            # Commit the transaction
-            await session.commit_transaction()
+async def get_schema(
+    client: AgnosticClient, 
+    current_user_id: ObjectId, 
+    project_id: ObjectId,
+    environment_id: ObjectId,
+    branch_id: ObjectId,
+) -> dict:
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Access control and validation of the environment and branch
+        context = await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id,
+        )
+        project = context.project
+
+        # Get properties
+        properties = await get_properties(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+        )
 
     schema_id = f"https://api.watsh.io/v1/schema/{project_id}/{environment_id}/{branch_id}"
     return schema.build_schema(schema_id, project, properties)
@@ -131,54 +103,20 @@ async def get_properties_commit(
     project_id: ObjectId,
     environment_id: ObjectId,
     branch_id: ObjectId,
-    parent_id: ObjectId,
-    commit_timestamp: int,
+    commit: Commit,
 ) -> dict:
     
-    items = await crud_items.list_items_per_commit_per_parent(
+    # Fetch the whole branch at this commit at once, the tree is assembled in memory
+    items = await crud_items.list_items_per_commit(
         client=client,
         session=session,
         project_id=project_id,
         environment_id=environment_id,
         branch_id=branch_id,
-        parent_id=parent_id,
-        commit_timestamp=commit_timestamp,
+        commit=commit,
     )
 
-    result = {}
-    
-    for item in items:
-        
-        if item.type == ItemType.OBJECT.value:
-            result[item.slug] = {'type': item.type}
-            result[item.slug]['properties'] = await get_properties_commit(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                parent_id=item.item,
-                commit_timestamp=commit_timestamp,
-            )
-
-        # elif item.type == ItemType.ARRAY.value:
-        #     """NOTE: arrays are an abastraction. 
-        #     They are converted back into objects, with each slug
-        #     being dynamically generated as an increasing integer.
-        #     """
-        #     result[item.slug] = {'type': item.type}
-        #     result[item.slug]['properties'] = await get_properties(
-        #         client=client,
-        #         session=session,
-        #         project_id=project_id,
-        #         environment_id=environment_id,
-        #         branch_id=branch_id,
-        #         parent_id=item.item
-        #     )
-        else:
-            result[item.slug] = {'type': item.type}
-
-    return result
+    return build_properties(tree.index_by_parent(items), NULL_OBJECTID)
 
 
 async def get_schema_per_commit(
@@ -189,54 +127,35 @@ async def get_schema_per_commit(
     branch_id: ObjectId,
     commit_id: ObjectId,
 ) -> dict:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
-
-            # Get commit
-            commit = await crud_commits.get_commit(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                commit_id=commit_id,
-            )
-
-
-            # Get project
-            project = await crud_projects.find_project(
-                client=client, session=session, project_id=project_id
-            )
-
-            # Get properties
-            properties = await get_properties_commit(
-                client=client,
-                session=session,
-                project_id=project_id,
-                environment_id=environment_id,
-                branch_id=branch_id,
-                parent_id=NULL_OBJECTID,
-                commit_timestamp=commit.timestamp
-            )
-
-            # Commit the transaction
-            await session.commit_transaction()
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Access control and validation of the environment and branch
+        context = await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id,
+        )
+        project = context.project
+
+        # Get commit
+        commit = await crud_commits.get_commit(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+            commit_id=commit_id,
+        )
+
+        # Get properties
+        properties = await get_properties_commit(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id,
+            commit=commit,
+        )
 
     schema_id = f"https://api.watsh.io/v1/schema/{project_id}/{environment_id}/{branch_id}/{commit_id}"
     return schema.build_schema(schema_id, project, properties)
@@ -250,33 +169,16 @@ async def generate(
     branch_id: ObjectId,
     data: dict,
 ) -> dict:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user_id
-            )
-
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
-
-            # Get project
-            project = await crud_projects.find_project(
-                client=client, session=session, project_id=project_id
-            )
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Access control and validation of the environment and branch
+        context = await validation.context_validation(
+            client=client, session=session, user_id=current_user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id,
+        )
+        project = context.project
 
-            # Commit the transaction
-            await session.commit_transaction()
-    
     # Generate schema
     builder = SchemaBuilder(schema_uri='https://json-schema.org/draft/2020-12/schema#')
     schema_id = f"https://api.watsh.io/v1/schema/{project_id}/{environment_id}/{branch_id}"
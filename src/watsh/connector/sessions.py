@@ -0,0 +1,146 @@
+import time
+import random
+import asyncio
+import logging
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+from motor.core import AgnosticClient, AgnosticClientSession
+from pymongo.errors import PyMongoError, OperationFailure
+
+T = TypeVar('T')
+
+# Error labels of the transaction errors that are safe to retry
+TRANSIENT_TRANSACTION_ERROR = 'TransientTransactionError'
+UNKNOWN_COMMIT_RESULT = 'UnknownTransactionCommitResult'
+
+# Transactions are retried with a jittered exponential backoff (seconds) until their deadline
+TRANSACTION_DEADLINE = 10.0
+BACKOFF_BASE = 0.01
+BACKOFF_MAX = 0.5
+
+# Transaction counters of this process, see `metrics`
+_counters: Counter[str] = Counter()
+_retries: Counter[str] = Counter()
+_aborts: Counter[str] = Counter()
+
+
+@asynccontextmanager
+async def read_only(client: AgnosticClient) -> AsyncIterator[AgnosticClientSession]:
+    """
+    Open a session for a read-only connector.
+    All the reads of a snapshot session see the same majority-committed point in time,
+    the consistency a transaction gave them, without starting or committing a transaction.
+    Snapshot sessions cannot be causally consistent in the driver: writes must keep using transactions.
+    Args:
+        client: MongoDB client.
+    Yields:
+        MongoDB client session.
+    """
+    async with await client.start_session(snapshot=True) as session:
+        yield session
+
+
+def configure(deadline: float, backoff_base: float, backoff_max: float) -> None:
+    """
+    Configure the retries of `run_transaction`, in seconds.
+    """
+    global TRANSACTION_DEADLINE, BACKOFF_BASE, BACKOFF_MAX
+    TRANSACTION_DEADLINE, BACKOFF_BASE, BACKOFF_MAX = deadline, backoff_base, backoff_max
+
+
+def metrics() -> dict:
+    return {
+        'transactions': _counters['transactions'],
+        'attempts': _counters['attempts'],
+        'commits': _counters['commits'],
+        'deadline_exceeded': _counters['deadline_exceeded'],
+        'retries': dict(_retries),
+        'aborts': dict(_aborts),
+    }
+
+
+def reset_metrics() -> None:
+    for counter in [_counters, _retries, _aborts]:
+        counter.clear()
+
+
+def _reason(err: BaseException) -> str:
+    if isinstance(err, OperationFailure) and err.details and err.details.get('codeName'):
+        return err.details['codeName']
+    return type(err).__name__
+
+
+async def _backoff(attempt: int, deadline: float) -> None:
+    # Full jitter: concurrent writers that conflicted do not retry in lockstep
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    await asyncio.sleep(max(0.0, min(delay, deadline - time.monotonic())))
+
+
+async def _commit(session: AgnosticClientSession, deadline: float) -> None:
+    attempt = 0
+    while True:
+        try:
+            await session.commit_transaction()
+            return
+        except PyMongoError as err:
+            # The commit may or may not have been applied: committing again is safe, the body is not
+            if not err.has_error_label(UNKNOWN_COMMIT_RESULT) or time.monotonic() >= deadline:
+                raise
+            attempt += 1
+            _retries[UNKNOWN_COMMIT_RESULT] += 1
+            await _backoff(attempt, deadline)
+
+
+async def run_transaction(
+    client: AgnosticClient,
+    callback: Callable[[AgnosticClientSession], Awaitable[T]],
+) -> T:
+    """
+    Run a write connector in a transaction, and commit it.
+    The whole callback is retried when the transaction fails with a transient error (e.g. a write
+    conflict with a concurrent commit), and the commit alone when its result is unknown,
+    with a jittered exponential backoff, until `TRANSACTION_DEADLINE`.
+    The callback may run several times: it must only write through its session, and leave any
+    other side effect to its caller.
+    Args:
+        client: MongoDB client.
+        callback: Async function running the reads and writes of the transaction in the given session.
+    Returns:
+        The result of the callback of the committed attempt.
+    Raises:
+        The last error of the callback or of the commit, if it is not transient or the deadline passed.
+    """
+    _counters['transactions'] += 1
+    deadline = time.monotonic() + TRANSACTION_DEADLINE
+    attempt = 0
+
+    async with await client.start_session() as session:
+        while True:
+            attempt += 1
+            _counters['attempts'] += 1
+            try:
+                async with session.start_transaction():
+                    result = await callback(session)
+                    await _commit(session, deadline)
+                _counters['commits'] += 1
+                return result
+
+            except PyMongoError as err:
+                reason = _reason(err)
+                if not err.has_error_label(TRANSIENT_TRANSACTION_ERROR):
+                    _aborts[reason] += 1
+                    raise
+                if time.monotonic() >= deadline:
+                    _aborts[reason] += 1
+                    _counters['deadline_exceeded'] += 1
+                    logging.warning(f'Transaction failed after {attempt} attempts: {err}')
+                    raise
+                _retries[reason] += 1
+
+            except Exception as err:
+                # Validation errors and the like, the transaction was aborted on the way out
+                _aborts[_reason(err)] += 1
+                raise
+
+            await _backoff(attempt, deadline)
@@ -1,5 +1,7 @@
+import logging
 from motor.core import AgnosticClient
-from pymongo import ASCENDING
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
 
 from .crud.collections import (
     DATABASE,
@@ -8,9 +10,34 @@ from .crud.collections import (
     MEMBERS_COLLECTION,
     ENVIRONMENTS_COLLECTION,
     BRANCHES_COLLECTION,
-    # ITEMS_COLLECTION,
+    ITEMS_COLLECTION,
     COMMITS_COLLECTION,
+    HEADS_COLLECTION,
+    REVOCATIONS_COLLECTION,
+    ROTATIONS_COLLECTION,
 )
+from src.watsh.lib.pyobjectid import NULL_OBJECTID
+
+
+# Indexes replaced by the branch sequence ones: (collection, keys)
+LEGACY_INDEXES = [
+    (COMMITS_COLLECTION, [('project', ASCENDING), ('environment', ASCENDING), ('branch', ASCENDING), ('timestamp', ASCENDING)]),
+    (ITEMS_COLLECTION, [('project', ASCENDING), ('environment', ASCENDING), ('branch', ASCENDING), ('timestamp', DESCENDING)]),
+    (ITEMS_COLLECTION, [('project', ASCENDING), ('environment', ASCENDING), ('branch', ASCENDING), ('parent', ASCENDING), ('timestamp', DESCENDING)]),
+    (ITEMS_COLLECTION, [('project', ASCENDING), ('environment', ASCENDING), ('branch', ASCENDING), ('item', ASCENDING), ('timestamp', DESCENDING)]),
+    # Without the timestamp tiebreaker of the legacy versions, which left the history sort unindexed
+    (ITEMS_COLLECTION, [('project', ASCENDING), ('environment', ASCENDING), ('branch', ASCENDING), ('sequence', DESCENDING)]),
+    (ITEMS_COLLECTION, [('project', ASCENDING), ('environment', ASCENDING), ('branch', ASCENDING), ('parent', ASCENDING), ('sequence', DESCENDING)]),
+]
+
+
+async def _drop_index(collection, keys: list[tuple[str, int]]) -> None:
+    """
+    Drop an index by its keys if it exists.
+    """
+    async for index in collection.list_indexes():
+        if list(index['key'].items()) == keys:
+            await collection.drop_index(index['name'])
 
 
 async def create_indexes(client: AgnosticClient) -> None:
@@ -53,16 +80,164 @@ async def create_indexes(client: AgnosticClient) -> None:
         partialFilterExpression={"default": True}
     )
 
-    # Unique compound index for commit, ensuring commit ordering
+    # Unique compound index for commit, ensuring commit ordering on the branch sequence.
+    # Legacy commits have no sequence until backfilled.
     await db[COMMITS_COLLECTION].create_index(
         [
             ('project', ASCENDING),
             ('environment', ASCENDING),
             ('branch', ASCENDING),
-            ('timestamp', ASCENDING), 
+            ('sequence', ASCENDING), 
         ], 
         unique=True,
+        partialFilterExpression={'sequence': {'$exists': True}},
+    )
+
+    # Compound index for commits, branch history and last commit.
+    # Not partial, as the queries do not filter on the sequence: legacy commits are ordered by timestamp then ObjectId.
+    await db[COMMITS_COLLECTION].create_index(
+        [
+            ('project', ASCENDING),
+            ('environment', ASCENDING),
+            ('branch', ASCENDING),
+            ('sequence', DESCENDING),
+            ('timestamp', DESCENDING),
+            ('_id', DESCENDING),
+        ],
+    )
+
+    # Compound index for items, branch history at a point in time.
+    # Legacy versions have no sequence and are ordered by timestamp.
+    await db[ITEMS_COLLECTION].create_index(
+        [
+            ('project', ASCENDING),
+            ('environment', ASCENDING),
+            ('branch', ASCENDING),
+            ('sequence', DESCENDING),
+            ('timestamp', DESCENDING),
+        ],
+    )
+
+    # Compound index for items, children history at a point in time
+    await db[ITEMS_COLLECTION].create_index(
+        [
+            ('project', ASCENDING),
+            ('environment', ASCENDING),
+            ('branch', ASCENDING),
+            ('parent', ASCENDING),
+            ('sequence', DESCENDING),
+            ('timestamp', DESCENDING),
+        ],
+    )
+
+    # Compound index for items, versions of a single item
+    await db[ITEMS_COLLECTION].create_index(
+        [
+            ('project', ASCENDING),
+            ('environment', ASCENDING),
+            ('branch', ASCENDING),
+            ('item', ASCENDING),
+            ('sequence', DESCENDING),
+        ],
+    )
+
+    # Unique compound index for heads, one live version per item and branch
+    await db[HEADS_COLLECTION].create_index(
+        [
+            ('project', ASCENDING),
+            ('environment', ASCENDING),
+            ('branch', ASCENDING),
+            ('item', ASCENDING),
+        ],
+        unique=True,
+    )
+
+    # Compound index for heads, listing children and resolving slugs within a parent
+    await db[HEADS_COLLECTION].create_index(
+        [
+            ('project', ASCENDING),
+            ('environment', ASCENDING),
+            ('branch', ASCENDING),
+            ('parent', ASCENDING),
+            ('slug', ASCENDING),
+        ],
+    )
+
+    # History used to be ordered on millisecond timestamps, which collide between concurrent writers
+    for collection, keys in LEGACY_INDEXES:
+        await _drop_index(db[collection], keys)
+
+    # Unique index for revocations, one revocation time per user
+    await db[REVOCATIONS_COLLECTION].create_index('user', unique=True)
+
+    # Partial unique index for rotations, at most one running key rotation
+    await db[ROTATIONS_COLLECTION].create_index(
+        'status', unique=True, partialFilterExpression={'status': 'running'}
     )
 
 
 # TODO: validate configuration for High Availability with a 'settings' collection
+
+
+def _sample_branch_query(**fields) -> dict:
+    return {
+        'project': NULL_OBJECTID,
+        'environment': NULL_OBJECTID,
+        'branch': NULL_OBJECTID,
+        **fields,
+    }
+
+# History sorts of the crud layer: legacy versions and commits have no sequence and are ordered by timestamp
+HISTORY_SORT = [('sequence', DESCENDING), ('timestamp', DESCENDING)]
+COMMITS_SORT = [('sequence', DESCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)]
+
+# Query shapes issued by the crud layer: (collection, filter, sort)
+QUERY_SHAPES = [
+    (ITEMS_COLLECTION, _sample_branch_query(sequence={'$lte': 0}), HISTORY_SORT),
+    (ITEMS_COLLECTION, _sample_branch_query(parent=NULL_OBJECTID, sequence={'$lte': 0}), HISTORY_SORT),
+    (ITEMS_COLLECTION, _sample_branch_query(sequence=None, timestamp={'$lte': 0}), HISTORY_SORT),
+    (ITEMS_COLLECTION, _sample_branch_query(item=NULL_OBJECTID), None),
+    (HEADS_COLLECTION, _sample_branch_query(), [('slug', ASCENDING)]),
+    (HEADS_COLLECTION, _sample_branch_query(parent=NULL_OBJECTID), [('slug', ASCENDING)]),
+    (HEADS_COLLECTION, _sample_branch_query(parent=NULL_OBJECTID, slug=''), [('slug', ASCENDING)]),
+    (HEADS_COLLECTION, _sample_branch_query(item=NULL_OBJECTID), None),
+    (COMMITS_COLLECTION, _sample_branch_query(), COMMITS_SORT),
+]
+
+
+def _has_stage(plan, stage: str) -> bool:
+    """
+    Recursively look for a stage in an explain plan.
+    """
+    if isinstance(plan, dict):
+        if plan.get('stage') == stage:
+            return True
+        return any(_has_stage(value, stage) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_has_stage(value, stage) for value in plan)
+    return False
+
+
+async def check_query_plans(client: AgnosticClient) -> None:
+    """
+    Explain the query shapes of the crud layer and log a warning for each one
+    whose winning plan falls back to a collection scan.
+    
+    Args:
+        client (AgnosticClient): The Motor client for asynchronous operations with MongoDB.
+    """
+    db = client[DATABASE]
+
+    for collection, query, sort in QUERY_SHAPES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+
+        try:
+            plan = await cursor.explain()
+        except PyMongoError as exc:
+            logging.warning(f'Could not explain query on {collection}: {exc}')
+            continue
+
+        if _has_stage(plan['queryPlanner']['winningPlan'], 'COLLSCAN'):
+            logging.warning(f'Query on {collection} falls back to COLLSCAN: filter={list(query)} sort={sort}')
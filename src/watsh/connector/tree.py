@@ -0,0 +1,34 @@
+from bson import ObjectId
+from typing import Iterator
+
+from src.watsh.lib.models import Item
+
+
+def index_by_parent(items: list[Item]) -> dict[ObjectId, list[Item]]:
+    """
+    Index a flat list of items by parent ObjectId.
+    Children keep the order of the input list (slug order for crud listings).
+    Args:
+        items: Items of a branch, live or at a given commit.
+    Returns:
+        Dict mapping each parent ObjectId to the list of its children.
+    """
+    children: dict[ObjectId, list[Item]] = {}
+    for item in items:
+        children.setdefault(item.parent, []).append(item)
+    return children
+
+
+def iter_descendants(children: dict[ObjectId, list[Item]], parent_id: ObjectId) -> Iterator[Item]:
+    """
+    Iterate depth-first over the items reachable from a parent.
+    Items whose parent is no longer live are never reached.
+    Args:
+        children: Index returned by `index_by_parent`.
+        parent_id: ObjectId of the parent to start from.
+    Returns:
+        Iterator over the descendant items.
+    """
+    for item in children.get(parent_id, []):
+        yield item
+        yield from iter_descendants(children, item.item)
@@ -1,142 +1,144 @@
 from bson import ObjectId
-from motor.core import AgnosticClient
+from motor.core import AgnosticClient, AgnosticClientSession
 
-from . import workflows
+from . import workflows, sessions, revocations
 from .crud import (
     environments as crud_environments, projects as crud_projects, members as crud_members,
-    branches as crud_branches, users as crud_users
+    branches as crud_branches, users as crud_users, revocations as crud_revocations
 )
 from src.watsh.lib.models import User, UserSnapshot, ProjectSnapshot, EnvironmentSnapshot
+from src.watsh.lib.time import now_ms
 
 
 async def create(client: AgnosticClient, email: str, create_sample_project: bool = True) -> ObjectId:
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
+    async def transaction(session: AgnosticClientSession) -> ObjectId:
 
-            # Create user
-            user_id = await workflows.create_user(client, session, email, create_sample_project)
+        # Create user
+        return await workflows.create_user(client, session, email, create_sample_project)
 
-            # Commit the transaction
-            await session.commit_transaction()
-    
-    return user_id
+    return await sessions.run_transaction(client, transaction)
 
 
 async def get(client: AgnosticClient, current_user_id: ObjectId) -> User:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Get user
-            user = await crud_users.get_user(client=client, session=session, user_id=current_user_id)
-
-            # Commit the transaction
-            await session.commit_transaction()
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Get user
+        user = await crud_users.get_user(client=client, session=session, user_id=current_user_id)
 
     return user
 
 
 async def get_by_email(client: AgnosticClient, email: str) -> User:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Get user
-            user = await crud_users.get_user_by_email(client=client, session=session, email=email)
-
-            # Commit the transaction
-            await session.commit_transaction()
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Get user
+        user = await crud_users.get_user_by_email(client=client, session=session, email=email)
 
     return user
 
 
 async def is_email_registered(client: AgnosticClient, email: str) -> bool:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Get user
-            result = await crud_users.check_user_exists_by_email(client, session, email)
-
-            await session.commit_transaction()
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        # Get user
+        result = await crud_users.check_user_exists_by_email(client, session, email)
 
     return result
 
 
 async def email_update(client: AgnosticClient, current_user_id: ObjectId, email: str) -> None:
+    timestamp = now_ms()
+
     # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Update email
-            await crud_users.update_user_email(client, session, current_user_id, email)
+    async def transaction(session: AgnosticClientSession) -> None:
+
+        # Update email
+        await crud_users.update_user_email(client, session, current_user_id, email)
+
+        # Revoke the tokens carrying the previous email
+        await crud_revocations.revoke_user_tokens(client, session, current_user_id, timestamp)
+
+    await sessions.run_transaction(client, transaction)
 
-            # Commit the transaction
-            await session.commit_transaction()
+    revocations.add(current_user_id, timestamp)
 
 
 async def delete(client: AgnosticClient, current_user_id: ObjectId) -> None:
+    timestamp = now_ms()
+
     # Start a transaction to ensure that all the inserts are performed atomically.
+    async def transaction(session: AgnosticClientSession) -> None:
+
+        # Delete user
+        await workflows.delete_user(client, session, current_user_id)
+
+        # Revoke the tokens of the deleted user
+        await crud_revocations.revoke_user_tokens(client, session, current_user_id, timestamp)
+
+    await sessions.run_transaction(client, transaction)
+
+    revocations.add(current_user_id, timestamp)
+
+
+async def revoke_tokens(client: AgnosticClient, current_user_id: ObjectId) -> None:
     async with await client.start_session() as session:
-        async with session.start_transaction():
-            
-            # Delete user
-            await workflows.delete_user(client, session, current_user_id)
 
-            # Commit the transaction
-            await session.commit_transaction()
+        # Revoke every token issued until now
+        timestamp = now_ms()
+        await crud_revocations.revoke_user_tokens(client, session, current_user_id, timestamp)
+
+    revocations.add(current_user_id, timestamp)
 
 
 
 async def get_user_snapshot(
     client: AgnosticClient, current_user: User
 ) -> UserSnapshot:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+        
+        list_project_memberships = await crud_members.list_user_memberships(
+            client=client, session=session, user_id=current_user.id
+        )
+
+        list_project_snapshots: list[ProjectSnapshot] = []
+        for membership in list_project_memberships:
             
-            list_project_memberships = await crud_members.list_user_memberships(
-                client=client, session=session, user_id=current_user.id
+            project = await crud_projects.find_project(
+                client=client, session=session, project_id=membership.project
             )
 
-            list_project_snapshots: list[ProjectSnapshot] = []
-            for membership in list_project_memberships:
-                
-                project = await crud_projects.find_project(
-                    client=client, session=session, project_id=membership.project
-                )
+            list_project_members = await crud_members.list_project_members(
+                client=client, session=session, project_id=membership.project
+            )
 
-                list_project_members = await crud_members.list_project_members(
-                    client=client, session=session, project_id=membership.project
+            list_snapshot_environments: list[EnvironmentSnapshot] = []
+            list_project_environments = await crud_environments.list_environments_per_project(
+                client=client, session=session, project_id=membership.project
+            )
+            for project_environment in list_project_environments:
+                list_branches = await crud_branches.list_branches_per_environment(
+                    client=client, session=session, project_id=membership.project, environment_id=project_environment.id
                 )
 
-                list_snapshot_environments: list[EnvironmentSnapshot] = []
-                list_project_environments = await crud_environments.list_environments_per_project(
-                    client=client, session=session, project_id=membership.project
+                snapshot_environment = EnvironmentSnapshot(
+                    environment=project_environment,
+                    branches=list_branches
                 )
-                for project_environment in list_project_environments:
-                    list_branches = await crud_branches.list_branches_per_environment(
-                        client=client, session=session, project_id=membership.project, environment_id=project_environment.id
-                    )
-
-                    snapshot_environment = EnvironmentSnapshot(
-                        environment=project_environment,
-                        branches=list_branches
-                    )
-
-                    list_snapshot_environments.append(snapshot_environment)
-
-                project_snapshot = ProjectSnapshot(
-                    project=project,
-                    members=list_project_members,
-                    environments=list_snapshot_environments,
-                )
-                
-                list_project_snapshots.append(project_snapshot)
 
-            # Commit the transaction
-            await session.commit_transaction()
+                list_snapshot_environments.append(snapshot_environment)
+
+            project_snapshot = ProjectSnapshot(
+                project=project,
+                members=list_project_members,
+                environments=list_snapshot_environments,
+            )
+            
+            list_project_snapshots.append(project_snapshot)
 
 
     user_snapshot = UserSnapshot(
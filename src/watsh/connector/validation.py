@@ -1,9 +1,16 @@
 from bson import ObjectId
 from motor.core import AgnosticClient, AgnosticClientSession
 
-from .crud import environments as crud_environments, branches as crud_branches, projects as crud_projects
-from src.watsh.lib.exceptions import BadRequest
-from src.watsh.lib.models import Project, Branch, Environment
+from . import caches
+from .crud import (
+    environments as crud_environments, branches as crud_branches, projects as crud_projects, members as crud_members,
+    commits as crud_commits,
+)
+from src.watsh.lib.exceptions import (
+    BadRequest, UnauthorizedException, ProjetNotFound, EnvironmentNotFound, BranchNotFound, StaleBranchHead
+)
+from src.watsh.lib.cache import MISSING
+from src.watsh.lib.models import Project, Branch, Environment, Member, Context
 
 
 async def project_validation(
@@ -12,9 +19,13 @@ async def project_validation(
     project_id: ObjectId,
     check_is_not_archive: bool = False
 ) -> Project:
-    project = await crud_projects.find_project(
-        client=client, session=session, project_id=project_id
-    )
+    project = caches.projects.get(project_id)
+    if project is MISSING:
+        version = caches.projects.version
+        project = await crud_projects.find_project(
+            client=client, session=session, project_id=project_id
+        )
+        caches.projects.set(project_id, project, version)
 
     if check_is_not_archive and project.archived:
         raise BadRequest('Project is archived.')
@@ -28,12 +39,20 @@ async def environment_validation(
     project_id: ObjectId, 
     environment_id: ObjectId,
 ) -> Environment:
-    return await crud_environments.get_environment(
-        client=client,
-        session=session,
-        project_id=project_id,
-        environment_id=environment_id
-    )
+    environment = caches.environments.get(environment_id)
+    if environment is MISSING:
+        version = caches.environments.version
+        environment = await crud_environments.get_environment(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id
+        )
+        caches.environments.set(environment_id, environment, version)
+
+    if environment.project != project_id:
+        raise EnvironmentNotFound()
+    return environment
 
 
 async def branch_validation(
@@ -43,10 +62,131 @@ async def branch_validation(
     environment_id: ObjectId,
     branch_id: ObjectId,
 ) -> Branch:
-    return await crud_branches.get_branch(
-        client=client,
-        session=session,
-        project_id=project_id,
-        environment_id=environment_id,
-        branch_id=branch_id
-    )
\ No newline at end of file
+    branch = caches.branches.get(branch_id)
+    if branch is MISSING:
+        version = caches.branches.version
+        branch = await crud_branches.get_branch(
+            client=client,
+            session=session,
+            project_id=project_id,
+            environment_id=environment_id,
+            branch_id=branch_id
+        )
+        caches.branches.set(branch_id, branch, version)
+
+    if branch.project != project_id or branch.environment != environment_id:
+        raise BranchNotFound()
+    return branch
+
+async def context_validation(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    user_id: ObjectId,
+    project_id: ObjectId, 
+    environment_id: ObjectId | None = None,
+    branch_id: ObjectId | None = None,
+    check_is_not_archive: bool = False,
+) -> Context:
+    """
+    Access control and project, environment and branch validation in at most one round-trip,
+    none when everything is cached.
+    Errors are raised in the same order as the separate checks: authorization, project, environment, branch.
+    """
+    membership_key = (user_id, project_id)
+    member = caches.memberships.get(membership_key)
+    project = caches.projects.get(project_id)
+    environment = caches.environments.get(environment_id) if environment_id is not None else None
+    branch = caches.branches.get(branch_id) if branch_id is not None else None
+
+    # Known non-members are rejected without a round-trip
+    if member is None:
+        raise UnauthorizedException('You do not have access to this project.')
+
+    if any(value is MISSING for value in (member, project, environment, branch)):
+        versions = {name: cache.version for name, cache in caches.ALL.items()}
+        doc = await crud_members.get_member_context(
+            client=client, session=session, user_id=user_id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id,
+        )
+
+        member = Member(**doc) if doc else None
+        caches.memberships.set(membership_key, member, versions['memberships'])
+        if member is None:
+            raise UnauthorizedException('You do not have access to this project.')
+
+        project = Project(**doc['projects'][0]) if doc['projects'] else None
+        if project:
+            caches.projects.set(project.id, project, versions['projects'])
+
+        if environment_id is not None:
+            environment = Environment(**doc['environments'][0]) if doc['environments'] else None
+            if environment:
+                caches.environments.set(environment.id, environment, versions['environments'])
+
+        if branch_id is not None:
+            branch = Branch(**doc['branches'][0]) if doc['branches'] else None
+            if branch:
+                caches.branches.set(branch.id, branch, versions['branches'])
+
+    if project is None:
+        raise ProjetNotFound()
+    if check_is_not_archive and project.archived:
+        raise BadRequest('Project is archived.')
+
+    if environment_id is not None and (environment is None or environment.project != project_id):
+        raise EnvironmentNotFound()
+
+    if branch_id is not None and (
+        branch is None or branch.project != project_id or branch.environment != environment_id
+    ):
+        raise BranchNotFound()
+
+    return Context(
+        member=member, project=project, environment=environment, branch=branch,
+    )
+
+
+async def base_commit_validation(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    project_id: ObjectId, 
+    environment_id: ObjectId,
+    branch_id: ObjectId,
+    base_commit: ObjectId | None,
+) -> None:
+    """
+    Check that a write is based on the current head of the branch, read from the database rather than the caches.
+    Writers check it before any encryption work; a concurrent commit still conflicts on the branch sequence.
+    Raises StaleBranchHead if another commit was made since `base_commit`. No check without a base commit.
+    """
+    if base_commit is None:
+        return
+
+    head = await get_branch_head(
+        client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id,
+    )
+
+    if head != base_commit:
+        raise StaleBranchHead()
+
+
+async def get_branch_head(
+    client: AgnosticClient, 
+    session: AgnosticClientSession, 
+    project_id: ObjectId, 
+    environment_id: ObjectId,
+    branch_id: ObjectId,
+) -> ObjectId | None:
+    """
+    Read the head commit of a branch from the database rather than the caches, None if the branch has no commit.
+    """
+    head = await crud_branches.get_head(
+        client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id,
+    )
+    if head is None:
+        # Branches committed to before heads were recorded
+        last_commit = await crud_commits.get_last_commit(
+            client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id,
+        )
+        head = last_commit.id if last_commit else None
+    return head
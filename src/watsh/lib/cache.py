@@ -0,0 +1,86 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+# Returned by `TTLCache.get` for keys that are not cached (None is a valid cached value)
+MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, max_size: int, ttl: float, enabled: bool = True):
+        """
+        In-process LRU cache whose entries expire after `ttl` seconds.
+        Every invalidation bumps the cache version: a value read from the database is only stored
+        if no invalidation happened since the read started (see `version` and `set`).
+        """
+        self.max_size: int = max_size
+        self.ttl: float = ttl
+        self.enabled: bool = enabled
+        self.version: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Return the cached value of a key, or MISSING.
+        """
+        if not self.enabled:
+            return MISSING
+
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return MISSING
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, version: int | None = None, ttl: float | None = None) -> None:
+        """
+        Cache a value, evicting the least recently used entries beyond `max_size`.
+        If `version` is given and the cache was invalidated since, the value may be stale and is dropped.
+        If `ttl` is given, the entry expires after the shortest of `ttl` and the cache TTL.
+        """
+        if not self.enabled or (version is not None and version != self.version):
+            return
+
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self.version += 1
+        self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        """
+        Drop every entry for which `predicate(key, value)` is true.
+        """
+        self.version += 1
+        for key in [key for key, (_, value) in self._entries.items() if predicate(key, value)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self.version += 1
+        self._entries.clear()
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
@@ -1,8 +1,10 @@
+import os
 import base64
 import hashlib
+from functools import lru_cache
 
-from Cryptodome.Cipher import AES
-from Cryptodome.Random import get_random_bytes
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 HASH_NAME = "SHA512"
 IV_LENGTH = 12
@@ -11,41 +13,157 @@ KEY_LENGTH = 32
 SALT_LENGTH = 16
 TAG_LENGTH = 16
 
+# Binary format, stored as BSON Binary: version byte + payload.
+#   ENVELOPE_VERSION: key id + nonce + ciphertext + tag, version and key id are authenticated as AAD.
+#   LEGACY_VERSION: salt + iv + ciphertext + tag, as written by the first releases.
+# String values written before the binary format are still read:
+#   ENVELOPE_PREFIX + base64(envelope), or base64(legacy payload).
+# The prefix is not part of the base64 alphabet, so both are told apart without ambiguity.
+ENVELOPE_PREFIX = "$"
+ENVELOPE_VERSION = 1
+LEGACY_VERSION = 0
+KEY_ID_LENGTH = 4
+HEADER_LENGTH = 1 + KEY_ID_LENGTH
+DATA_KEY_SALT = b"watsh-data-key-v1"
 
-def encrypt(password: str, plain_message: str) -> str:
-    salt = get_random_bytes(SALT_LENGTH) 
-    iv = get_random_bytes(IV_LENGTH)
+# Bounded number of derived keys kept in memory
+KEY_CACHE_SIZE = 1024
 
-    secret = get_secret_key(password, salt)
 
-    cipher = AES.new(secret, AES.MODE_GCM, iv)
+def encrypt(password: str, plain_message: str) -> bytes:
+    return encrypt_many(password, [plain_message])[0]
 
-    encrypted_message_byte, tag = cipher.encrypt_and_digest(
-        plain_message.encode("utf-8")
-    )
-    cipher_byte = salt + iv + encrypted_message_byte + tag
 
-    encoded_cipher_byte = base64.b64encode(cipher_byte)
-    return bytes.decode(encoded_cipher_byte)
+def decrypt(password: str, cipher_message: bytes | str, previous_passwords: tuple[str, ...] = ()) -> str:
+    return decrypt_many(password, [cipher_message], previous_passwords)[0]
+
 
+def encrypt_many(password: str, plain_messages: list[str]) -> list[bytes]:
+    """
+    Encrypt a batch of messages. The data key, its cipher context and the header are resolved once
+    for the whole batch: each message only costs a nonce and one AES-GCM pass.
+    """
+    key, key_id = get_data_key(password)
+    aead = get_aead(key)
+    header = bytes([ENVELOPE_VERSION]) + key_id
+    messages = []
+    for plain_message in plain_messages:
+        nonce = os.urandom(IV_LENGTH)
+        messages.append(header + nonce + aead.encrypt(nonce, plain_message.encode("utf-8"), header))
+    return messages
 
-def decrypt(password: str, cipher_message: str) -> str:
-    decoded_cipher_byte = base64.b64decode(cipher_message)
 
-    salt = decoded_cipher_byte[:SALT_LENGTH]
-    iv = decoded_cipher_byte[SALT_LENGTH : (SALT_LENGTH + IV_LENGTH)]
-    encrypted_message_byte = decoded_cipher_byte[
-        (IV_LENGTH + SALT_LENGTH) : -TAG_LENGTH
+def decrypt_many(
+    password: str, cipher_messages: list[bytes | str], previous_passwords: tuple[str, ...] = ()
+) -> list[str]:
+    """
+    Decrypt a batch of messages, in order. Envelopes select the cipher context of their data key by key id
+    in the keyring resolved once for the batch, legacy values fall back to their own salted key.
+    Previous passwords keep the values encrypted before a key rotation readable.
+    Legacy string values are read transparently.
+    """
+    passwords = (password, *previous_passwords)
+    keyring = get_keyring(passwords)
+    return [
+        _decrypt_binary(passwords, keyring, to_binary(cipher_message))
+        for cipher_message in cipher_messages
     ]
-    tag = decoded_cipher_byte[-TAG_LENGTH:]
-    secret = get_secret_key(password, salt)
-    cipher = AES.new(secret, AES.MODE_GCM, iv)
 
-    decrypted_message_byte = cipher.decrypt_and_verify(encrypted_message_byte, tag)
+
+def needs_rotation(password: str, cipher_message: bytes | str) -> bool:
+    """
+    Tell whether a stored ciphertext is not yet an envelope encrypted with the data key of the password.
+    """
+    cipher_byte = to_binary(cipher_message)
+    _, key_id = get_data_key(password)
+    return cipher_byte[0] != ENVELOPE_VERSION or cipher_byte[1:HEADER_LENGTH] != key_id
+
+
+def to_binary(cipher_message: bytes | str) -> bytes:
+    """
+    Convert a stored ciphertext to the binary format, without decrypting it.
+    """
+    if isinstance(cipher_message, bytes):
+        return cipher_message
+    if cipher_message.startswith(ENVELOPE_PREFIX):
+        return base64.b64decode(cipher_message[len(ENVELOPE_PREFIX):])
+    return bytes([LEGACY_VERSION]) + base64.b64decode(cipher_message)
+
+
+def _decrypt_binary(passwords: tuple[str, ...], keyring: dict[bytes, AESGCM], cipher_byte: bytes) -> str:
+    version = cipher_byte[0]
+    if version == ENVELOPE_VERSION:
+        return _decrypt_envelope(keyring, cipher_byte)
+    if version == LEGACY_VERSION:
+        return _decrypt_legacy(passwords, cipher_byte[1:])
+    raise ValueError(f"Unsupported ciphertext version: {version}.")
+
+
+def _decrypt_envelope(keyring: dict[bytes, AESGCM], cipher_byte: bytes) -> str:
+    # Slices of a memoryview do not copy the ciphertext
+    view = memoryview(cipher_byte)
+    aead = keyring.get(bytes(view[1:HEADER_LENGTH]))
+    if aead is None:
+        raise ValueError("Ciphertext encrypted with an unknown key.")
+
+    return _open(
+        aead, view[HEADER_LENGTH : (HEADER_LENGTH + IV_LENGTH)], view[(HEADER_LENGTH + IV_LENGTH):], view[:HEADER_LENGTH]
+    )
+
+
+def _open(aead: AESGCM, nonce, encrypted_message_and_tag, associated_data) -> str:
+    try:
+        decrypted_message_byte = aead.decrypt(nonce, encrypted_message_and_tag, associated_data)
+    except InvalidTag:
+        raise ValueError("MAC check failed")
     return decrypted_message_byte.decode("utf-8")
 
 
-def get_secret_key(password: str, salt: str) -> bytes:
+def _decrypt_legacy(passwords: tuple[str, ...], cipher_byte: bytes) -> str:
+    view = memoryview(cipher_byte)
+    salt = bytes(view[:SALT_LENGTH])
+    iv = view[SALT_LENGTH : (SALT_LENGTH + IV_LENGTH)]
+    encrypted_message_and_tag = view[(IV_LENGTH + SALT_LENGTH):]
+
+    # Legacy values carry no key id: try the passwords in order, the current one first
+    error = None
+    for password in passwords:
+        try:
+            return _open(AESGCM(get_secret_key(password, salt)), iv, encrypted_message_and_tag, None)
+        except ValueError as exc:
+            error = exc
+    raise error
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def get_data_key(password: str) -> tuple[bytes, bytes]:
+    """
+    Derive the data key of a password (one key per key version) and its key id.
+    The key id is stored in the ciphertext header to select the key on decryption.
+    """
+    key = get_secret_key(password, DATA_KEY_SALT)
+    key_id = hashlib.sha256(key).digest()[:KEY_ID_LENGTH]
+    return key, key_id
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def get_keyring(passwords: tuple[str, ...]) -> dict[bytes, AESGCM]:
+    """
+    Map the key id of each password's data key to the cipher context of the key.
+    """
+    return {key_id: get_aead(key) for key, key_id in map(get_data_key, passwords)}
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def get_aead(key: bytes) -> AESGCM:
+    """
+    AES-GCM cipher context of a key, reused for every message: the key schedule is expanded once.
+    """
+    return AESGCM(key)
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def get_secret_key(password: str, salt: bytes) -> bytes:
     return hashlib.pbkdf2_hmac(
         HASH_NAME, password.encode(), salt, ITERATION_COUNT, KEY_LENGTH
     )
@@ -0,0 +1,84 @@
+import asyncio
+from functools import partial
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+from . import crypto
+
+
+class CryptoService:
+    def __init__(
+        self, password: str, max_workers: int, chunk_size: int, use_processes: bool = False,
+        previous_passwords: tuple[str, ...] = (),
+    ):
+        """
+        Initialize the crypto service with the AES password and a bounded worker pool.
+        Encryption and decryption are CPU-bound: they run on the pool, never on the event loop.
+        New values are always encrypted with the current password, previous passwords are only
+        used to read values that have not been rotated yet.
+        """
+        self.password: str = password
+        self.previous_passwords: tuple[str, ...] = tuple(previous_passwords)
+        self.chunk_size: int = chunk_size
+        self.executor: Executor = (
+            ProcessPoolExecutor(max_workers=max_workers) if use_processes
+            else ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='crypto')
+        )
+
+    @property
+    def key_id(self) -> str:
+        """
+        Hex key id of the current data key.
+        """
+        _, key_id = crypto.get_data_key(self.password)
+        return key_id.hex()
+
+    def needs_rotation(self, cipher_message: bytes | str) -> bool:
+        """
+        Tell whether a stored ciphertext is not encrypted with the current data key.
+        """
+        return crypto.needs_rotation(self.password, cipher_message)
+
+    async def encrypt(self, plain_message: str) -> bytes:
+        """
+        Encrypt a single message on the worker pool.
+        """
+        results = await self._run(crypto.encrypt_many, [plain_message])
+        return results[0]
+
+    async def decrypt(self, cipher_message: bytes | str) -> str:
+        """
+        Decrypt a single message on the worker pool.
+        """
+        results = await self._run(self._decrypt_many, [cipher_message])
+        return results[0]
+
+    async def encrypt_many(self, plain_messages: list[str]) -> list[bytes]:
+        """
+        Encrypt a batch of messages, split in chunks processed in parallel. Order is preserved.
+        """
+        return await self._run_chunks(crypto.encrypt_many, plain_messages)
+
+    async def decrypt_many(self, cipher_messages: list[bytes | str]) -> list[str]:
+        """
+        Decrypt a batch of messages, split in chunks processed in parallel. Order is preserved.
+        """
+        return await self._run_chunks(self._decrypt_many, cipher_messages)
+
+    def shutdown(self) -> None:
+        """
+        Shut down the worker pool.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def _decrypt_many(self):
+        return partial(crypto.decrypt_many, previous_passwords=self.previous_passwords)
+
+    async def _run(self, function, messages: list) -> list:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(function, self.password, messages))
+
+    async def _run_chunks(self, function, messages: list) -> list:
+        chunks = [messages[i:i + self.chunk_size] for i in range(0, len(messages), self.chunk_size)]
+        results = await asyncio.gather(*[self._run(function, chunk) for chunk in chunks])
+        return [message for chunk in results for message in chunk]
@@ -63,6 +63,14 @@ class ItemNotFound(Exception):
     def __init__(self, message: str = 'Item not found.'):
         super().__init__(message)
 
+class StaleBranchHead(Exception):
+    def __init__(self, message: str = 'The branch has new commits since the base commit.'):
+        super().__init__(message)
+
+class RotationAlreadyRunning(Exception):
+    def __init__(self, message: str = 'A key rotation is already running.'):
+        super().__init__(message)
+
 class JSONSchemaError(Exception):
     def __init__(self, message: str):
         super().__init__(message)
@@ -0,0 +1,112 @@
+import copy
+from typing import Any
+
+
+def escape(token: str) -> str:
+    """
+    Escape an object key as a JSON Pointer reference token (RFC 6901).
+    """
+    return token.replace('~', '~0').replace('/', '~1')
+
+
+def unescape(token: str) -> str:
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def _same(source: Any, target: Any) -> bool:
+    # 1, 1.0 and true are equal in Python but not in JSON
+    return type(source) is type(target) and source == target
+
+
+def diff(source: Any, target: Any, path: str = '') -> list[dict]:
+    """
+    Compute a JSON Patch (RFC 6902) turning `source` into `target`.
+    Objects are compared key by key, any other changed value is replaced as a whole.
+    Args:
+        source: JSON document the patch applies to.
+        target: JSON document the patch produces.
+        path: JSON Pointer of both documents, the whole document by default.
+    Returns:
+        List of `add`, `remove` and `replace` operations, empty if the documents are equal.
+    """
+    if isinstance(source, dict) and isinstance(target, dict):
+        operations = []
+        for key in source:
+            if key not in target:
+                operations.append({'op': 'remove', 'path': f'{path}/{escape(key)}'})
+        for key, value in target.items():
+            if key not in source:
+                operations.append({'op': 'add', 'path': f'{path}/{escape(key)}', 'value': value})
+            else:
+                operations.extend(diff(source[key], value, f'{path}/{escape(key)}'))
+        return operations
+
+    if _same(source, target):
+        return []
+
+    return [{'op': 'replace', 'path': path, 'value': target}]
+
+
+def _index(token: str, length: int, add: bool = False) -> int:
+    # Array indexes are decimals without leading zeros (RFC 6901), within the array:
+    # values can also be added at its end, `-` being the index past its last element
+    if add and token == '-':
+        return length
+    if not (token.isascii() and token.isdigit()) or (len(token) > 1 and token[0] == '0'):
+        raise ValueError(f'Invalid array index: {token}')
+    index = int(token)
+    if index > length or (index == length and not add):
+        raise IndexError(index)
+    return index
+
+
+def apply(document: Any, patch: list[dict]) -> Any:
+    """
+    Apply the `add`, `remove` and `replace` operations of a JSON Patch (RFC 6902) to a copy of a document.
+    Args:
+        document: JSON document.
+        patch: List of operations.
+    Returns:
+        The patched document.
+    Raises:
+        ValueError: If an operation is not supported or its path does not exist.
+    """
+    document = copy.deepcopy(document)
+
+    for operation in patch:
+        op, path = operation['op'], operation['path']
+        if op not in ('add', 'remove', 'replace'):
+            raise ValueError(f'Unsupported operation: {op}')
+
+        if path == '':
+            if op == 'remove':
+                raise ValueError('Cannot remove the whole document.')
+            document = copy.deepcopy(operation['value'])
+            continue
+
+        *parents, last = [unescape(token) for token in path.split('/')[1:]]
+        try:
+            container = document
+            for token in parents:
+                container = container[_index(token, len(container)) if isinstance(container, list) else token]
+
+            if isinstance(container, list):
+                index = _index(last, len(container), add=op == 'add')
+                if op == 'add':
+                    container.insert(index, copy.deepcopy(operation['value']))
+                elif op == 'remove':
+                    del container[index]
+                else:
+                    container[index] = copy.deepcopy(operation['value'])
+            else:
+                if op != 'add' and last not in container:
+                    raise KeyError(last)
+                if op == 'remove':
+                    del container[last]
+                else:
+                    container[last] = copy.deepcopy(operation['value'])
+
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise ValueError(f'Path not found: {path}')
+
+    return document
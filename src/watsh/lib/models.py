@@ -41,6 +41,12 @@ class Branch(BaseModelEncoder):
     slug: str
     default: bool
 
+class Context(BaseModelEncoder):
+    member: Member
+    project: Project
+    environment: Optional[Environment] = None
+    branch: Optional[Branch] = None
+
 class Commit(BaseModelEncoder):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     project: PyObjectId
@@ -50,6 +56,44 @@ class Commit(BaseModelEncoder):
     message: str
     timestamp: int
 
+    # Position of the commit in its branch, history is ordered on it rather than on the timestamp
+    sequence: Optional[int] = None
+
+    # Number of items added, changed and removed, recorded by snapshot commits
+    added: Optional[int] = None
+    changed: Optional[int] = None
+    removed: Optional[int] = None
+
+class JSONSnapshot(BaseModelEncoder):
+    # Last commit of the branch when rendered, None if the branch has no commit
+    commit: Optional[PyObjectId] = None
+    sequence: int = 0
+    values: dict
+
+    # Websocket message of the snapshot, serialized once for all the subscribers of the branch
+    message: str
+
+class RotationStatus(Enum):
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+class Rotation(BaseModelEncoder):
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    key_id: str
+    status: RotationStatus
+    collection: str
+    last_id: Optional[PyObjectId] = None
+    scanned: int = 0
+    rotated: int = 0
+    error: Optional[str] = None
+    started_at: int
+    updated_at: int
+
+class Revocation(BaseModelEncoder):
+    user: PyObjectId
+    revoked_at: int
+
 class ItemType(Enum):
     OBJECT = 'object'
     ARRAY = 'array'
@@ -84,11 +128,13 @@ class Item(BaseModelEncoder):
     # string_pattern: Optional[str]
     # string_format: Optional[str]
 
-    secret_value: Optional[str | bool | int | float | None] = None
+    # Encrypted secrets are stored as bytes, legacy versions as base64 strings
+    secret_value: Optional[bytes | str | bool | int | float | None] = None
     secret_active: bool
 
     commit: PyObjectId
     timestamp: int
+    sequence: Optional[int] = None
 
 
 class ItemUpdate(BaseModelEncoder):
@@ -3,7 +3,10 @@ from starlette.middleware.sessions import SessionMiddleware
 
 from .handlers import exception_handlers
 from .config import MIDDLEWARE_SESSION_SECRET, VERSION, DOMAIN
-from .client import setup_indexes, close_client
+from .client import setup_indexes, configure_transactions, close_client
+from .crypto import close_crypto_service
+from .rotation import cancel_rotation_task
+from .caches import start_caches, stop_caches
 
 from .routers.me import router as router_me
 from .routers.auth import router as router_auth
@@ -21,6 +24,7 @@ from .routers.json_value import router as router_json
 from .routers.items import router as router_items
 from .routers.webhook import router as router_webhook
 from .routers.ws import router as router_ws
+from .routers.admin import router as router_admin
 
 
 summary="Configuration Management by API"
@@ -62,7 +66,13 @@ app.include_router(router_json, prefix="/v1")
 app.include_router(router_items, prefix="/v1")
 app.include_router(router_webhook, prefix="/v1")
 app.include_router(router_ws, prefix="/v1")
+app.include_router(router_admin, prefix="/v1")
 
 # Event handlers
+app.add_event_handler("startup", configure_transactions)
 app.add_event_handler("startup", setup_indexes)
-app.add_event_handler("shutdown", close_client)
\ No newline at end of file
+app.add_event_handler("startup", start_caches)
+app.add_event_handler("shutdown", cancel_rotation_task)
+app.add_event_handler("shutdown", stop_caches)
+app.add_event_handler("shutdown", close_client)
+app.add_event_handler("shutdown", close_crypto_service)
\ No newline at end of file
@@ -1,19 +1,40 @@
+import datetime
+import hashlib
 from bson import ObjectId
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from motor.core import AgnosticClient
 
-from src.watsh.connector import users as conn_users
+from src.watsh.connector import users as conn_users, caches, revocations
+from src.watsh.lib.cache import MISSING
 from src.watsh.lib.models import User
-from src.watsh.lib.token import decode_token
+from src.watsh.lib.token import create_token, decode_token
 from src.watsh.lib.exceptions import TokenHandlingError, UserNotFound
+from src.watsh.lib.time import now, now_ms
 
 from .client import get_client
-from .config import JWT_ALGORITHM, JWT_SECRET
+from .config import JWT_ALGORITHM, JWT_SECRET, ADMIN_EMAILS, AUTH_STATELESS
 
 # Define HTTP Bearer Scheme
 scheme = HTTPBearer()
 
+# Scope of the tokens granting API access, as opposed to registration, invitation or verification tokens
+ACCESS_SCOPE = 'access'
+
+def create_access_token(user_id: ObjectId, email: str, expiration_time: datetime.datetime) -> str:
+    """
+    Create an access token carrying the user claims trusted by stateless authentication.
+    """
+    payload = {
+        'user_id': str(user_id),
+        'email': email,
+        'scope': ACCESS_SCOPE,
+        # NumericDate with a millisecond precision, compared with the revocation times
+        'iat': now_ms() / 1000,
+        'exp': expiration_time,
+    }
+    return create_token(payload, JWT_SECRET, JWT_ALGORITHM)
+
 async def get_current_user(
     authorization: HTTPAuthorizationCredentials = Depends(scheme),
     client: AgnosticClient = Depends(get_client),
@@ -24,23 +45,55 @@ async def get_current_user(
     token = authorization.credentials
     return await authenticate_user(token, client)
 
+async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    """
+    Retrieve the current user if it is an administrator, or raise HTTPForbidden.
+    """
+    if current_user.email not in ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Administrators only.')
+    return current_user
+
 async def authenticate_user(token: str, client: AgnosticClient) -> User:
     """
     Authenticate the user based on the provided token and return the user details.
+    Every token is checked against the revocation list, and rejected until it is loaded.
+    Tokens issued without an issue time predate the revocation list: any revocation of their user revokes them.
+    In stateless mode, the claims of access tokens are then trusted;
+    other tokens, and every token otherwise, are checked against the database.
     """
-    user_id = decode_token_or_raise(token)
+    payload = decode_token_or_raise(token)
+    user_id = payload['user_id']
+
+    if not revocations.is_loaded():
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail='Revocation list not loaded.')
+
+    if revocations.is_revoked(ObjectId(user_id), payload.get('iat', 0)):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Token revoked.')
+
+    if AUTH_STATELESS and payload.get('scope') == ACCESS_SCOPE:
+        return User(_id=ObjectId(user_id), email=payload['email'])
+
     return await get_user_or_raise(user_id, client)
 
-def decode_token_or_raise(token: str) -> str:
+def decode_token_or_raise(token: str) -> dict:
     """
     Decode the JWT token or raise HTTPForbidden on failure.
+    Decoded tokens are cached by hash until they expire.
     """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = caches.tokens.get(key)
+    if payload is not MISSING:
+        return payload
+
     try:
         payload = decode_token(token, JWT_SECRET, JWT_ALGORITHM)
-        return payload['user_id']
     except TokenHandlingError as err:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=(str(err)))
 
+    if 'exp' in payload:
+        caches.tokens.set(key, payload, ttl=payload['exp'] - now())
+    return payload
+
 async def get_user_or_raise(user_id: str, client: AgnosticClient) -> User:
     """
     Retrieve a user by ID from the database or raise HTTPForbidden if not found.
@@ -0,0 +1,43 @@
+import asyncio
+import logging
+from pymongo.errors import PyMongoError
+
+from src.watsh.connector import caches, revocations, hub
+from .client import client
+from .config import (
+    CACHE_ENABLED, MEMBERSHIP_CACHE_SIZE, MEMBERSHIP_CACHE_TTL, METADATA_CACHE_SIZE, METADATA_CACHE_TTL,
+    TOKEN_CACHE_SIZE, SNAPSHOT_CACHE_SIZE, SNAPSHOT_CACHE_TTL, WS_COALESCE_WINDOW_MS, WS_COALESCE_MAX_LATENCY_MS,
+)
+
+watch_tasks: list[asyncio.Task] = []
+
+
+async def start_caches() -> None:
+    """
+    Configure the per-process caches and start their change stream invalidation,
+    as well as the token revocation list and the commit stream of the websocket subscribers.
+    """
+    caches.configure(
+        enabled=CACHE_ENABLED, membership_size=MEMBERSHIP_CACHE_SIZE, membership_ttl=MEMBERSHIP_CACHE_TTL,
+        metadata_size=METADATA_CACHE_SIZE, metadata_ttl=METADATA_CACHE_TTL, token_size=TOKEN_CACHE_SIZE,
+        snapshot_size=SNAPSHOT_CACHE_SIZE, snapshot_ttl=SNAPSHOT_CACHE_TTL,
+    )
+    hub.configure(window=WS_COALESCE_WINDOW_MS / 1000, max_latency=WS_COALESCE_MAX_LATENCY_MS / 1000)
+
+    # Tokens are rejected until the revocations are loaded: load them before serving
+    try:
+        await revocations.load(client)
+    except PyMongoError as err:
+        logging.warning(f'Could not load revocations, tokens are rejected until they are: {err}')
+
+    if CACHE_ENABLED:
+        watch_tasks.append(asyncio.create_task(caches.watch(client)))
+    watch_tasks.append(asyncio.create_task(revocations.watch(client)))
+    watch_tasks.append(asyncio.create_task(hub.watch(client)))
+
+
+async def stop_caches() -> None:
+    while watch_tasks:
+        task = watch_tasks.pop()
+        if not task.done():
+            task.cancel()
@@ -2,8 +2,10 @@ from motor.core import AgnosticClient
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.server_api import ServerApi
 
-from src.watsh.connector import setup
-from .config import MONGO_URI
+from src.watsh.connector import setup, sessions
+from .config import (
+    MONGO_URI, TRANSACTION_DEADLINE_MS, TRANSACTION_BACKOFF_BASE_MS, TRANSACTION_BACKOFF_MAX_MS,
+)
 
 client = AsyncIOMotorClient(MONGO_URI, server_api=ServerApi('1'))
 
@@ -11,6 +13,14 @@ client = AsyncIOMotorClient(MONGO_URI, server_api=ServerApi('1'))
 async def setup_indexes() -> None:
     global client
     await setup.create_indexes(client)
+    await setup.check_query_plans(client)
+
+
+async def configure_transactions() -> None:
+    sessions.configure(
+        deadline=TRANSACTION_DEADLINE_MS / 1000, backoff_base=TRANSACTION_BACKOFF_BASE_MS / 1000,
+        backoff_max=TRANSACTION_BACKOFF_MAX_MS / 1000,
+    )
 
 
 async def close_client() -> None:
@@ -0,0 +1,76 @@
+import asyncio
+import argparse
+import logging
+
+from src.watsh.connector import migrations, rotation
+from .client import client, setup_indexes, close_client
+from .crypto import crypto_service
+from .config import ROTATION_BATCH_SIZE, ROTATION_PAUSE_MS
+from .server_setup import configure_logging
+
+
+async def backfill_heads() -> None:
+    """
+    Rebuild the branch heads from the item history.
+    """
+    total = await migrations.backfill_heads(client)
+    logging.info(f'{total} heads rebuilt.')
+
+
+async def backfill_sequences() -> None:
+    """
+    Number the commits and item versions of every branch in history order.
+    """
+    total = await migrations.backfill_sequences(client)
+    logging.info(f'{total} commits numbered.')
+
+
+async def migrate_secrets() -> None:
+    """
+    Rewrite the base64 string secrets as binary ciphertexts.
+    """
+    total = await migrations.migrate_secrets(client)
+    logging.info(f'{total} secrets migrated.')
+
+
+async def rotate_keys() -> None:
+    """
+    Re-encrypt all secrets with the current AES secret, resuming the last rotation if interrupted.
+    """
+    job = await rotation.start_rotation(client, crypto_service)
+    job = await rotation.run_rotation(
+        client, crypto_service, job, batch_size=ROTATION_BATCH_SIZE, pause=ROTATION_PAUSE_MS / 1000,
+    )
+    logging.info(f'Key rotation {job.status}: {job.rotated}/{job.scanned} secrets rotated.')
+
+
+COMMANDS = {
+    'backfill-heads': backfill_heads,
+    'backfill-sequences': backfill_sequences,
+    'migrate-secrets': migrate_secrets,
+    'rotate-keys': rotate_keys,
+}
+
+
+async def run_command(name: str) -> None:
+    """
+    Run a maintenance command against the configured database.
+    """
+    try:
+        await setup_indexes()
+        await COMMANDS[name]()
+    finally:
+        await close_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Watsh maintenance commands.')
+    parser.add_argument('command', choices=COMMANDS.keys())
+    args = parser.parse_args()
+
+    configure_logging()
+    asyncio.run(run_command(args.command))
+
+
+if __name__ == "__main__":
+    main()
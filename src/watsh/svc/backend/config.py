@@ -23,12 +23,44 @@ SERVER_PROXY_HEADER = get_env_variable('SERVER_PROXY_HEADER', 'true').lower() ==
 
 # Security and Authentication
 AES_SECRET = get_env_variable('AES_SECRET', required=True)
+AES_PREVIOUS_SECRETS = tuple(filter(None, get_env_variable('AES_PREVIOUS_SECRETS', '').split(',')))
 JWT_SECRET = get_env_variable('JWT_SECRET', required=True)
 JWT_ALGORITHM = get_env_variable('JWT_ALGORITHM', 'HS256')
+AUTH_STATELESS = get_env_variable('AUTH_STATELESS', 'false').lower() == 'true'
 MIDDLEWARE_SESSION_SECRET = get_env_variable('MIDDLEWARE_SESSION_SECRET', required=True)
 
+# Encryption Worker Pool
+CRYPTO_MAX_WORKERS = int(get_env_variable('CRYPTO_MAX_WORKERS', '4'))
+CRYPTO_CHUNK_SIZE = int(get_env_variable('CRYPTO_CHUNK_SIZE', '64'))
+CRYPTO_USE_PROCESSES = get_env_variable('CRYPTO_USE_PROCESSES', 'false').lower() == 'true'
+
+# Snapshot Commits
+ITEMS_WRITE_CHUNK_SIZE = int(get_env_variable('ITEMS_WRITE_CHUNK_SIZE', '500'))
+
+# Key Rotation
+ROTATION_BATCH_SIZE = int(get_env_variable('ROTATION_BATCH_SIZE', '200'))
+ROTATION_PAUSE_MS = int(get_env_variable('ROTATION_PAUSE_MS', '100'))
+ADMIN_EMAILS = tuple(filter(None, get_env_variable('ADMIN_EMAILS', '').split(',')))
+
 # Database Configuration
 MONGO_URI = get_env_variable('MONGO_URI', required=True)
+TRANSACTION_DEADLINE_MS = int(get_env_variable('TRANSACTION_DEADLINE_MS', '10000'))
+TRANSACTION_BACKOFF_BASE_MS = int(get_env_variable('TRANSACTION_BACKOFF_BASE_MS', '10'))
+TRANSACTION_BACKOFF_MAX_MS = int(get_env_variable('TRANSACTION_BACKOFF_MAX_MS', '500'))
+
+# In-process Caches
+CACHE_ENABLED = get_env_variable('CACHE_ENABLED', 'true').lower() == 'true'
+MEMBERSHIP_CACHE_SIZE = int(get_env_variable('MEMBERSHIP_CACHE_SIZE', '10000'))
+MEMBERSHIP_CACHE_TTL = float(get_env_variable('MEMBERSHIP_CACHE_TTL', '60'))
+METADATA_CACHE_SIZE = int(get_env_variable('METADATA_CACHE_SIZE', '10000'))
+METADATA_CACHE_TTL = float(get_env_variable('METADATA_CACHE_TTL', '300'))
+TOKEN_CACHE_SIZE = int(get_env_variable('TOKEN_CACHE_SIZE', '10000'))
+SNAPSHOT_CACHE_SIZE = int(get_env_variable('SNAPSHOT_CACHE_SIZE', '64'))
+SNAPSHOT_CACHE_TTL = float(get_env_variable('SNAPSHOT_CACHE_TTL', '60'))
+
+# Websocket Notifications
+WS_COALESCE_WINDOW_MS = int(get_env_variable('WS_COALESCE_WINDOW_MS', '50'))
+WS_COALESCE_MAX_LATENCY_MS = int(get_env_variable('WS_COALESCE_MAX_LATENCY_MS', '500'))
 
 # Email Server Settings
 SMTP_USERNAME = get_env_variable('SMTP_USERNAME', required=True)
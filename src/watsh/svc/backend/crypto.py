@@ -0,0 +1,21 @@
+from src.watsh.lib.crypto_service import CryptoService
+
+from .config import AES_SECRET, AES_PREVIOUS_SECRETS, CRYPTO_MAX_WORKERS, CRYPTO_CHUNK_SIZE, CRYPTO_USE_PROCESSES
+
+crypto_service = CryptoService(
+    password=AES_SECRET,
+    max_workers=CRYPTO_MAX_WORKERS,
+    chunk_size=CRYPTO_CHUNK_SIZE,
+    use_processes=CRYPTO_USE_PROCESSES,
+    previous_passwords=AES_PREVIOUS_SECRETS,
+)
+
+
+async def close_crypto_service() -> None:
+    global crypto_service
+    crypto_service.shutdown()
+
+
+async def get_crypto_service() -> CryptoService:
+    global crypto_service
+    return crypto_service
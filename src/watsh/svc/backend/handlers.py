@@ -25,6 +25,9 @@ async def handler_403(request: Request, exc: Exception) -> JSONResponse:
 async def handler_404(request: Request, exc: Exception) -> JSONResponse:
     return create_error_response(status.HTTP_404_NOT_FOUND, str(exc))
 
+async def handler_409(request: Request, exc: Exception) -> JSONResponse:
+    return create_error_response(status.HTTP_409_CONFLICT, str(exc))
+
 
 async def not_found_handler(request: Request, exc: Exception) -> JSONResponse:
     """
@@ -78,6 +81,9 @@ exception_handlers = {
 
     exceptions.JSONSchemaError: handler_400,
 
+    exceptions.RotationAlreadyRunning: handler_409,
+    exceptions.StaleBranchHead: handler_409,
+
     404: not_found_handler,
 
     bson_exc.InvalidId: wrong_id_handler,
@@ -4,6 +4,7 @@ from src.watsh.lib.models import User
 from src.watsh.lib.token import create_token
 from src.watsh.lib.smtp_client import SMTPClientManager
 
+from ..authentication import create_access_token
 from ..config import DOMAIN, WATSH_LOGO_URL, WATSH_LANDING_URL, JWT_SECRET, JWT_ALGORITHM, WATSH_APP
 
 
@@ -47,8 +48,7 @@ async def send_login_email(user: User, smtp_client: SMTPClientManager) -> None:
 
     # Redirect to dashboard with a token
     expiration_time = datetime.datetime.utcnow() + datetime.timedelta(hours=24)
-    payload = {'user_id': str(user.id), 'exp': expiration_time}
-    access_token = create_token(payload, JWT_SECRET, JWT_ALGORITHM)
+    access_token = create_access_token(user.id, user.email, expiration_time)
     redirect_url = f"{WATSH_APP}?access_token={access_token}&host={DOMAIN}"
     
     # Send the email
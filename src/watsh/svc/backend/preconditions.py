@@ -0,0 +1,32 @@
+from bson import ObjectId
+from typing import Annotated
+from fastapi import Header, HTTPException, Response, status
+
+
+async def get_base_commit(
+    base_commit: str | None = None,
+    if_match: Annotated[str | None, Header()] = None,
+) -> ObjectId | None:
+    """
+    Retrieve the commit a write is based on, from the `base_commit` parameter or the `If-Match` header.
+    The entity tag of a branch is the ObjectId of its head commit; `*` matches any head.
+    """
+    value = base_commit or if_match
+    if value is None:
+        return None
+
+    value = value.strip().removeprefix('W/').strip('"')
+    if value == '*':
+        return None
+    if not ObjectId.is_valid(value):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid base commit.')
+    return ObjectId(value)
+
+
+def set_entity_tag(response: Response, head: ObjectId | None) -> None:
+    """
+    Tag a read with the head commit of its branch, to be sent back as `If-Match` by the next write.
+    The head is read in the same snapshot as the values, so the tag always matches the body.
+    """
+    if head is not None:
+        response.headers['ETag'] = f'"{head}"'
@@ -0,0 +1,40 @@
+import asyncio
+from contextlib import suppress
+from motor.core import AgnosticClient
+
+from src.watsh.connector import rotation as conn_rotation
+from src.watsh.lib.crypto_service import CryptoService
+from src.watsh.lib.exceptions import RotationAlreadyRunning
+from src.watsh.lib.models import Rotation
+
+from .config import ROTATION_BATCH_SIZE, ROTATION_PAUSE_MS
+
+rotation_task: asyncio.Task | None = None
+
+
+async def start_rotation_task(client: AgnosticClient, crypto: CryptoService) -> Rotation:
+    """
+    Start (or resume) the key rotation as a background task of this server.
+    """
+    global rotation_task
+    if rotation_task and not rotation_task.done():
+        raise RotationAlreadyRunning()
+
+    rotation = await conn_rotation.start_rotation(client=client, crypto=crypto)
+    rotation_task = asyncio.create_task(conn_rotation.run_rotation(
+        client=client, crypto=crypto, rotation=rotation,
+        batch_size=ROTATION_BATCH_SIZE, pause=ROTATION_PAUSE_MS / 1000,
+    ))
+    return rotation
+
+
+async def cancel_rotation_task() -> None:
+    """
+    Stop the key rotation, it resumes from its last checkpoint on the next start.
+    """
+    global rotation_task
+    if rotation_task and not rotation_task.done():
+        rotation_task.cancel()
+        # Wait for the rotation to be saved before the client is closed
+        with suppress(asyncio.CancelledError):
+            await rotation_task
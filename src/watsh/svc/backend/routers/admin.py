@@ -0,0 +1,67 @@
+from typing import Annotated
+from fastapi import APIRouter, status, Depends, HTTPException
+from motor.core import AgnosticClient
+
+from src.watsh.connector import rotation as conn_rotation, caches, sessions, hub
+from src.watsh.lib.models import User, Rotation
+from src.watsh.lib.crypto_service import CryptoService
+from ..authentication import get_admin_user
+from ..client import get_client
+from ..crypto import get_crypto_service
+from ..rotation import start_rotation_task
+
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get('/rotation', status_code=status.HTTP_200_OK)
+async def get_rotation(
+    current_user: Annotated[User, Depends(get_admin_user)],
+    client: AgnosticClient = Depends(get_client),
+) -> Rotation:
+    """
+    Report the progress of the last key rotation.
+    """
+    rotation = await conn_rotation.get_rotation(client=client)
+    if rotation is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='No key rotation started.')
+    return rotation
+
+@router.post('/rotation', status_code=status.HTTP_202_ACCEPTED)
+async def start_rotation(
+    current_user: Annotated[User, Depends(get_admin_user)],
+    client: AgnosticClient = Depends(get_client),
+    crypto: CryptoService = Depends(get_crypto_service),
+) -> Rotation:
+    """
+    Re-encrypt all secrets with the current AES secret, in the background.
+    An interrupted rotation resumes from its last checkpoint.
+    """
+    return await start_rotation_task(client=client, crypto=crypto)
+
+@router.get('/caches', status_code=status.HTTP_200_OK)
+async def get_caches(
+    current_user: Annotated[User, Depends(get_admin_user)],
+) -> dict[str, dict]:
+    """
+    Report the size and hit/miss counters of the in-process caches of this server.
+    """
+    return caches.metrics()
+
+@router.get('/transactions', status_code=status.HTTP_200_OK)
+async def get_transactions(
+    current_user: Annotated[User, Depends(get_admin_user)],
+) -> dict:
+    """
+    Report the attempts, retries by error and aborts by reason of the transactions of this server.
+    """
+    return sessions.metrics()
+
+@router.get('/subscriptions', status_code=status.HTTP_200_OK)
+async def get_subscriptions(
+    current_user: Annotated[User, Depends(get_admin_user)],
+) -> dict:
+    """
+    Report the websocket subscribers of this server, and the branches they watch.
+    """
+    return hub.metrics()
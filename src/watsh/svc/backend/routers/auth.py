@@ -6,10 +6,11 @@ from pydantic import EmailStr
 
 from src.watsh.connector import users as conn_users
 from src.watsh.lib.smtp_client import SMTPClientManager
-from src.watsh.lib.token import decode_token, create_token
+from src.watsh.lib.token import decode_token
 from src.watsh.lib.exceptions import UserNotFound, TokenHandlingError
 from ..mailing.validate_email_address import send_validate_address_email
 from ..mailing.login_token import send_login_email
+from ..authentication import create_access_token
 from ..client import get_client
 from ..smtp import get_smtp_client
 from ..config import WATSH_LANDING_URL, JWT_SECRET, JWT_ALGORITHM, WATSH_APP, DOMAIN
@@ -50,8 +51,7 @@ async def register(
         user_id = user.id
         
     expiration_time = datetime.datetime.utcnow() + datetime.timedelta(minutes=15)
-    payload = {'user_id': str(user_id), 'exp': expiration_time}
-    access_token = create_token(payload, JWT_SECRET, JWT_ALGORITHM)
+    access_token = create_access_token(user_id, email_address, expiration_time)
     
     # Redirect to dashboard with a token
     redirect_url = f"{WATSH_APP}?access_token={access_token}" + ("" if DOMAIN == "https://api.watsh.io" else f"&host={DOMAIN}")
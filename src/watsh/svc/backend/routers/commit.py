@@ -5,9 +5,10 @@ from fastapi import APIRouter, Depends, status
 
 from src.watsh.connector import commits as conn_commits, items as conn_items
 from src.watsh.lib.models import User, Commit, Item
+from src.watsh.lib.crypto_service import CryptoService
 from ..authentication import get_current_user
 from ..client import get_client
-from ..config import AES_SECRET
+from ..crypto import get_crypto_service
 
 
 router = APIRouter(prefix="/commit", tags=["commit"])
@@ -38,6 +39,7 @@ async def get_items(
     project_id: str, environment_id: str, branch_id: str, commit_id: str,
     current_user: User = Depends(get_current_user),
     client: AgnosticClient = Depends(get_client),
+    crypto: CryptoService = Depends(get_crypto_service),
 ) -> list[Item]:
     """
     Get snapshots for a given project, environment, and branch, at a given commit ID
@@ -49,6 +51,7 @@ async def get_items(
     - commit_id: string ID of the commit
     - current_user: Current authenticated user.
     - client: MongoDB client.
+    - crypto: Crypto service.
 
     Returns:
     - list[Snapshot]: List of Snapshot instances.
@@ -60,7 +63,7 @@ async def get_items(
         environment_id=ObjectId(environment_id),
         branch_id=ObjectId(branch_id),
         commit_id=ObjectId(commit_id),
-        aes_password=AES_SECRET,
+        crypto=crypto,
     )
 
 
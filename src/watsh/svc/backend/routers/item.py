@@ -6,9 +6,12 @@ from fastapi import APIRouter, status, Depends, Response, Query
 from src.watsh.connector import items as conn_items
 from src.watsh.lib.models import User, ObjectIDResponse, ItemType, Item
 from src.watsh.lib.pyobjectid import NULL_OBJECTID
+from src.watsh.lib.crypto_service import CryptoService
 from ..authentication import get_current_user
 from ..client import get_client
-from ..config import MAX_SLUG_LEN, MIN_SLUG_LEN, SLUG_REGEX, AES_SECRET
+from ..config import MAX_SLUG_LEN, MIN_SLUG_LEN, SLUG_REGEX
+from ..crypto import get_crypto_service
+from ..preconditions import get_base_commit, set_entity_tag
 
 
 router = APIRouter(prefix="/item", tags=["item"])
@@ -33,22 +36,32 @@ async def common_dependency(
 
 @router.get('/{project_id}/{environment_id}/{branch_id}', status_code=status.HTTP_200_OK)
 async def get_items(
+    response: Response,
     common_params: dict = Depends(common_dependency),
+    crypto: CryptoService = Depends(get_crypto_service),
 ) -> list[Item]:
-    return await conn_items.list_items(aes_password=AES_SECRET, **common_params)
+    items, head = await conn_items.list_items(crypto=crypto, **common_params)
+    set_entity_tag(response, head)
+    return items
 
 @router.get('/{project_id}/{environment_id}/{branch_id}/{item_id}', status_code=status.HTTP_200_OK)
 async def get_item(
-    item_id: str, common_params: dict = Depends(common_dependency),
+    item_id: str, response: Response, common_params: dict = Depends(common_dependency),
+    crypto: CryptoService = Depends(get_crypto_service),
 ) -> Item:
-    return await conn_items.get(item_id=ObjectId(item_id), aes_password=AES_SECRET, **common_params)
+    item, head = await conn_items.get(item_id=ObjectId(item_id), crypto=crypto, **common_params)
+    set_entity_tag(response, head)
+    return item
 
 
 @router.delete('/{project_id}/{environment_id}/{branch_id}/{item_id}', status_code=status.HTTP_200_OK)
 async def delete_item(
     item_id: str, commit_message: str = 'Delete item.', common_params: dict = Depends(common_dependency),
+    base_commit: ObjectId | None = Depends(get_base_commit),
 ) -> None:
-    await conn_items.delete(item_id=ObjectId(item_id), commit_message=commit_message, **common_params)
+    await conn_items.delete(
+        item_id=ObjectId(item_id), commit_message=commit_message, base_commit=base_commit, **common_params
+    )
     return Response(status_code=status.HTTP_200_OK)
 
 
@@ -59,6 +72,8 @@ async def create_item(
     parent_id: str = '', 
     commit_message: str = 'Item created.',
     common_params: dict = Depends(common_dependency),
+    crypto: CryptoService = Depends(get_crypto_service),
+    base_commit: ObjectId | None = Depends(get_base_commit),
 ) -> ObjectIDResponse:
     # TODO: add secret value in params
     # TODO: check secret value with type
@@ -70,7 +85,8 @@ async def create_item(
         commit_message=commit_message,
         secret_active=False,
         secret_value=None,
-        aes_password=AES_SECRET,
+        crypto=crypto,
+        base_commit=base_commit,
         **common_params
     )
     return ObjectIDResponse(id=item_id)
@@ -100,9 +116,10 @@ async def patch_slug(
 async def patch_secret(
     item_id: str, secret: str, commit_message: str = 'Secret created.',
     common_params: dict = Depends(common_dependency),
+    crypto: CryptoService = Depends(get_crypto_service),
 ) -> None:
     await conn_items.create_secret(
-        secret=secret, commit_message=commit_message, item_id=ObjectId(item_id), **common_params
+        secret=secret, commit_message=commit_message, item_id=ObjectId(item_id), crypto=crypto, **common_params
     )
 
 
@@ -1,15 +1,18 @@
 from typing import Annotated
 from motor.core import AgnosticClient
-from fastapi import APIRouter, status, Depends, Body, Query
+from fastapi import APIRouter, status, Depends, Body, Query, Response
 from pydantic import BaseModel, validator
 from bson import ObjectId
 
 from src.watsh.lib.pyobjectid import PyObjectId
 from src.watsh.connector import items as conn_items
 from src.watsh.lib.models import User, ObjectIDResponse, Item, ItemUpdate
+from src.watsh.lib.crypto_service import CryptoService
 from ..authentication import get_current_user
 from ..client import get_client
-from ..config import MAX_SLUG_LEN, MIN_SLUG_LEN, SLUG_REGEX, AES_SECRET
+from ..config import MAX_SLUG_LEN, MIN_SLUG_LEN, SLUG_REGEX, ITEMS_WRITE_CHUNK_SIZE
+from ..crypto import get_crypto_service
+from ..preconditions import get_base_commit, set_entity_tag
 
 router = APIRouter(prefix="/items", tags=["items"])
 
@@ -32,9 +35,13 @@ async def common_dependency(
 
 @router.get('/{project_id}/{environment_id}/{branch_id}', status_code=status.HTTP_200_OK)
 async def get_items(
+    response: Response,
     common_params: dict = Depends(common_dependency),
+    crypto: CryptoService = Depends(get_crypto_service),
 ) -> list[Item]:
-    return await conn_items.list_items(aes_password=AES_SECRET, **common_params)
+    items, head = await conn_items.list_items(crypto=crypto, **common_params)
+    set_entity_tag(response, head)
+    return items
         
 
 class ItemUpdateRequest(ItemUpdate):
@@ -52,12 +59,17 @@ class ItemUpdateRequest(ItemUpdate):
 @router.patch('/{project_id}/{environment_id}/{branch_id}')
 async def patch_items(
     data: Annotated[list[ItemUpdateRequest], Body()],
+    response: Response,
     common_params: dict = Depends(common_dependency),
     commit_message: str = 'Snapshot commit.',
+    crypto: CryptoService = Depends(get_crypto_service),
+    base_commit: ObjectId | None = Depends(get_base_commit),
 ) -> ObjectIDResponse:
     commit_id = await conn_items.create_from_updates(
-        updates=data, commit_message=commit_message, aes_password=AES_SECRET, **common_params
+        updates=data, commit_message=commit_message, crypto=crypto,
+        chunk_size=ITEMS_WRITE_CHUNK_SIZE, base_commit=base_commit, **common_params
     )
+    response.headers['ETag'] = f'"{commit_id}"'
     return ObjectIDResponse(id=commit_id)
 
     
@@ -69,11 +81,16 @@ class PatchItem(BaseModel):
 @router.patch('/{project_id}/{environment_id}/{branch_id}/json')
 async def patch_snapshot(
     data: Annotated[PatchItem, Body()],
+    response: Response,
     common_params: dict = Depends(common_dependency),
     commit_message: str = 'Snapshot commit',
+    crypto: CryptoService = Depends(get_crypto_service),
+    base_commit: ObjectId | None = Depends(get_base_commit),
 ) -> ObjectIDResponse:
     commit_id = await conn_items.create_from_schema(
         json_schema=data.json_schema, json_values=data.json_value, 
-        commit_message=commit_message, aes_password=AES_SECRET, **common_params
+        commit_message=commit_message, crypto=crypto,
+        chunk_size=ITEMS_WRITE_CHUNK_SIZE, base_commit=base_commit, **common_params
     )
+    response.headers['ETag'] = f'"{commit_id}"'
     return ObjectIDResponse(id=commit_id)
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from motor.core import AgnosticClient
 from bson import ObjectId
 
 from src.watsh.connector import json_value as conn_json
 from src.watsh.lib.models import User
+from src.watsh.lib.crypto_service import CryptoService
 from ..authentication import get_current_user
 from ..client import get_client
-from ..config import AES_SECRET
+from ..crypto import get_crypto_service
+from ..preconditions import set_entity_tag
 
 router = APIRouter(prefix="/json", tags=["json"])
 
@@ -28,8 +30,14 @@ async def common_dependency(
 
 
 @router.get('/{project_id}/{environment_id}/{branch_id}')
-async def get_json(common_params: dict = Depends(common_dependency)) -> dict:
-    return await conn_json.get_json(aes_password=AES_SECRET, **common_params)
+async def get_json(
+    response: Response,
+    common_params: dict = Depends(common_dependency),
+    crypto: CryptoService = Depends(get_crypto_service),
+) -> dict:
+    values, head = await conn_json.get_json(crypto=crypto, **common_params)
+    set_entity_tag(response, head)
+    return values
 
 
 @router.patch('/{project_id}/{environment_id}/{branch_id}')
@@ -39,5 +47,9 @@ async def patch_json(common_params: dict = Depends(common_dependency)) -> dict:
 
 
 @router.get('/{project_id}/{environment_id}/{branch_id}/{commit_id}')
-async def get_json(commit_id: str, common_params: dict = Depends(common_dependency)) -> dict:
-    return await conn_json.get_json_per_commit(commit_id=ObjectId(commit_id), aes_password=AES_SECRET, **common_params)
\ No newline at end of file
+async def get_json(
+    commit_id: str,
+    common_params: dict = Depends(common_dependency),
+    crypto: CryptoService = Depends(get_crypto_service),
+) -> dict:
+    return await conn_json.get_json_per_commit(commit_id=ObjectId(commit_id), crypto=crypto, **common_params)
\ No newline at end of file
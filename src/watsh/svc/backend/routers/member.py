@@ -9,10 +9,10 @@ from fastapi.responses import RedirectResponse
 from src.watsh.connector import members as conn_members, projects as conn_projects
 from src.watsh.lib.smtp_client import SMTPClientManager
 from src.watsh.lib.models import User
-from src.watsh.lib.token import decode_token, create_token
+from src.watsh.lib.token import decode_token
 from src.watsh.lib.exceptions import TokenHandlingError
 from ..mailing.invite_user import send_invite_user_message
-from ..authentication import get_current_user
+from ..authentication import get_current_user, create_access_token
 from ..client import get_client
 from ..smtp import get_smtp_client
 from ..config import JWT_SECRET, JWT_ALGORITHM, WATSH_APP, DOMAIN
@@ -120,8 +120,7 @@ async def send_invite(
     # TODO: Redirect user to dashboard with access_token
     # Redirect to dashboard with a token
     expiration_time = datetime.datetime.utcnow() + datetime.timedelta(hours=24)
-    payload = {'user_id': str(user_id), 'exp': expiration_time}
-    access_token = create_token(payload, JWT_SECRET, JWT_ALGORITHM)
+    access_token = create_access_token(user_id, payload['email'], expiration_time)
     redirect_url = f"{WATSH_APP}?access_token={access_token}&host={DOMAIN}"
     return RedirectResponse(url=redirect_url)
 
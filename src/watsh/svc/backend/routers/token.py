@@ -1,11 +1,14 @@
 from datetime import datetime, timezone, timedelta
 from typing import Annotated
+from motor.core import AgnosticClient
 from fastapi import APIRouter, Depends, HTTPException, status
 
+from src.watsh.connector import users as conn_users
 from src.watsh.lib.exceptions import TokenHandlingError
 from src.watsh.lib.models import Token, User
-from src.watsh.lib.token import create_token, decode_token
-from ..authentication import get_current_user
+from src.watsh.lib.token import decode_token
+from ..authentication import get_current_user, get_user_or_raise, create_access_token
+from ..client import get_client
 from ..config import JWT_SECRET, JWT_ALGORITHM
 
 router = APIRouter(prefix="/token", tags=["token"])
@@ -45,12 +48,21 @@ async def post_token(
         print(exc)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
 
-    payload = {'user_id': str(current_user.id), 'exp': expiration_time}
-    access_token = create_token(payload, JWT_SECRET, JWT_ALGORITHM)
+    access_token = create_access_token(current_user.id, current_user.email, expiration_time)
     return Token(access_token=access_token, token_type='bearer')
 
+@router.delete('', status_code=status.HTTP_204_NO_CONTENT)
+async def delete_tokens(
+    current_user: Annotated[User, Depends(get_current_user)],
+    client: AgnosticClient = Depends(get_client),
+) -> None:
+    """
+    Revoke every token issued to the current user so far, including the one used by this request.
+    """
+    await conn_users.revoke_tokens(client=client, current_user_id=current_user.id)
+
 @router.get('', response_model=Token)
-async def get_token(login_token: str) -> Token:
+async def get_token(login_token: str, client: AgnosticClient = Depends(get_client)) -> Token:
     """
     Generate a new access token using a login token.
     """
@@ -59,6 +71,6 @@ async def get_token(login_token: str) -> Token:
     except TokenHandlingError:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired login token.")
 
-    new_payload = {'user_id': payload['user_id'], 'exp': datetime.utcnow() + timedelta(hours=24)}
-    access_token = create_token(new_payload, JWT_SECRET, JWT_ALGORITHM)
+    user = await get_user_or_raise(payload['user_id'], client)
+    access_token = create_access_token(user.id, user.email, datetime.utcnow() + timedelta(hours=24))
     return Token(access_token=access_token, token_type='bearer')
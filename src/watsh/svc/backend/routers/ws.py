@@ -1,17 +1,26 @@
 import json
+import asyncio
 from typing import Annotated
 from bson import ObjectId
 from motor.core import AgnosticClient
 from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, Query
 
-from src.watsh.connector import access_control, validation, json_value as conn_json_value
-from src.watsh.lib.models import User
+from src.watsh.connector import validation, sessions, hub, json_value as conn_json_value
+from src.watsh.lib.models import User, JSONSnapshot
+from src.watsh.lib.crypto_service import CryptoService
 from ..authentication import authenticate_user
 from ..client import get_client
+from ..crypto import get_crypto_service
 
 
 router = APIRouter(prefix="", tags=["ws"])
 
+# Subprotocol of the patch mode: a snapshot tagged with its commit, then JSON Patches (RFC 6902) between commits.
+# Clients that detect a gap (a patch whose base is not their commit) send {"type": "resync"} to get a snapshot.
+# Reconnecting clients pass the last commit they applied as `last_commit`, to only receive what changed since.
+# Without it, every message is the whole JSON document, as a JSON string.
+PATCH_PROTOCOL = 'watsh.patch.v1'
+
 
 async def get_current_user_ws(
     token: Annotated[str, Query],
@@ -27,102 +36,113 @@ async def common_dependency(
     project_id: str,
     environment_id: str,
     branch_id: str,
+    last_commit: Annotated[str | None, Query()] = None,
     current_user: User = Depends(get_current_user_ws),
     client: AgnosticClient = Depends(get_client),
+    crypto: CryptoService = Depends(get_crypto_service),
 ) -> dict:
     return {
         "client": client,
+        "crypto": crypto,
         "current_user": current_user,
         "project_id": ObjectId(project_id),
         "environment_id": ObjectId(environment_id),
         "branch_id": ObjectId(branch_id),
+        # Last commit applied by a reconnecting client, unknown commits get a whole snapshot
+        "last_commit": ObjectId(last_commit) if last_commit and ObjectId.is_valid(last_commit) else None,
     }
 
 @router.websocket(path='/{project_id}/{environment_id}/{branch_id}')
 async def websocket_endpoint(
     websocket: WebSocket, common_params: dict = Depends(common_dependency),
 ) -> None:
-    await websocket.accept()
+    patches = PATCH_PROTOCOL in websocket.scope.get('subprotocols', [])
+    await websocket.accept(subprotocol=PATCH_PROTOCOL if patches else None)
     try:
-        await watsh(websocket=websocket, **common_params)
+        await watsh(websocket=websocket, patches=patches, **common_params)
     except WebSocketDisconnect:
         pass
 
 
 async def watsh(
-    websocket: WebSocket, current_user: User, client: AgnosticClient, 
-    project_id: ObjectId, environment_id: ObjectId, branch_id: ObjectId,
+    websocket: WebSocket, current_user: User, client: AgnosticClient, crypto: CryptoService,
+    project_id: ObjectId, environment_id: ObjectId, branch_id: ObjectId, patches: bool = False,
+    last_commit: ObjectId | None = None,
 ) -> None:
-    # Start a transaction to ensure that all the inserts are performed atomically.
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-
-            # Access control
-            await access_control.user_authorization(
-                client=client, session=session, project_id=project_id, user_id=current_user.id
-            )
-
-            # Verify project is not archived
-            await validation.project_validation(
-                client=client, session=session, project_id=project_id, check_is_not_archive=True
-            )
-
-            # Verify environment ID
-            await validation.environment_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id,
-            )
-
-            # Verify branch ID
-            await validation.branch_validation(
-                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id, 
-            )
-        
-            # Commit the transaction
-            await session.commit_transaction()
-
-    # Pipeline
-    resume_after = None
-    pipeline = [{
-        '$match': {
-            'fullDocument.project': project_id,
-            'fullDocument.environment': environment_id,
-            'fullDocument.branch': branch_id,
-        }
-    }]
-
-    async def send_snapshot() -> None:
-        snapshot = await conn_json_value.get_json(
-            client=client, current_user_id=current_user.id, 
-            project_id=project_id, environment_id=environment_id, branch_id=branch_id,
+    # Read-only: snapshot session, no transaction round-trips.
+    async with sessions.read_only(client) as session:
+
+        # Access control and validation of the project, environment and branch
+        await validation.context_validation(
+            client=client, session=session, user_id=current_user.id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, check_is_not_archive=True,
         )
-        await websocket.send_json(json.dumps(snapshot))
-    
-    async def start_stream(resume_after) -> None:
-        # Connect to change stream
-        async with client['watsh']['commits'].watch(
-            full_document='updateLookup', 
-            pipeline=pipeline, 
-            resume_after=resume_after,
-            max_await_time_ms=2000,
-        ) as stream:
-                
-            if not resume_after:
-                await send_snapshot()
-
-            resume_after = stream.resume_token
-            
-            async for change in stream:
-                operation = change['operationType']
-                if operation == 'invalidate':
-                    # An invalidate event occurs when an operation renders the change stream invalid
-                    pass
-
-                elif operation in ['insert', 'update', 'drop']:
-                    await send_snapshot()
-
-                else: 
-                    raise Exception('Operation not implemented')
-
-    await start_stream(resume_after)
-        
-    
+
+    # Last snapshot sent, the base of the next patch
+    sent: JSONSnapshot | None = None
+
+    async def get_snapshot(commit_id: ObjectId | None = None) -> JSONSnapshot:
+        return await conn_json_value.get_json_snapshot(
+            client=client, current_user_id=current_user.id, project_id=project_id,
+            environment_id=environment_id, branch_id=branch_id, crypto=crypto, commit_id=commit_id,
+        )
+
+    async def send_snapshot(snapshot: JSONSnapshot, full: bool = False) -> None:
+        nonlocal sent
+        if not patches:
+            message = snapshot.message
+        elif sent is None or full:
+            message = conn_json_value.snapshot_message(snapshot)
+        else:
+            message = conn_json_value.patch_message(sent, snapshot)
+
+        if message is not None:
+            await websocket.send_text(message)
+        sent = snapshot
+
+    # Register to the commits of the branch before the first snapshot, so no commit is missed in between
+    with hub.subscription(project_id, environment_id, branch_id) as queue:
+        snapshot = await get_snapshot()
+
+        # Resuming clients get nothing if they are up to date, else only the delta since their last commit
+        if last_commit is None or snapshot.commit != last_commit:
+            if last_commit is not None and patches:
+                sent = await conn_json_value.get_json_snapshot_at(
+                    client=client, current_user_id=current_user.id, project_id=project_id,
+                    environment_id=environment_id, branch_id=branch_id, commit_id=last_commit, crypto=crypto,
+                )
+            await send_snapshot(snapshot)
+        else:
+            sent = snapshot
+
+        receive = asyncio.create_task(websocket.receive())
+        event = asyncio.create_task(queue.get())
+        try:
+            while True:
+                await asyncio.wait([receive, event], return_when=asyncio.FIRST_COMPLETED)
+
+                if receive.done():
+                    message = receive.result()
+                    if message['type'] == 'websocket.disconnect':
+                        raise WebSocketDisconnect(message.get('code', 1000))
+                    if patches and is_resync_request(message):
+                        await send_snapshot(await get_snapshot(), full=True)
+                    receive = asyncio.create_task(websocket.receive())
+
+                if event.done():
+                    # New commit, or commits possibly missed: send the current state, once for all the events queued
+                    commit = event.result()
+                    while not queue.empty():
+                        commit = queue.get_nowait()
+                    await send_snapshot(await get_snapshot(commit.id if commit else None))
+                    event = asyncio.create_task(queue.get())
+        finally:
+            receive.cancel()
+            event.cancel()
+
+
+def is_resync_request(message: dict) -> bool:
+    try:
+        return json.loads(message.get('text') or '{}').get('type') == 'resync'
+    except (ValueError, AttributeError):
+        return False
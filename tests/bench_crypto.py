@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from src.watsh.lib import crypto
+from src.watsh.lib.crypto_service import CryptoService
+
+PASSWORD = "your_secure_key"
+SIZES = [10, 100, 1000]
+ROUNDS = 5
+
+output_format = "{:<10}{:<12}{:>16}{:>16}"
+
+
+def best_of(function) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+async def main():
+    # Warm up the derived key cache: key derivation is not part of the per-secret cost
+    crypto.get_data_key(PASSWORD)
+    service = CryptoService(PASSWORD, max_workers=4, chunk_size=64)
+
+    print(output_format.format("secrets", "mode", "total (ms)", "per secret (us)"))
+    for size in SIZES:
+        plain_messages = [f"secret-{i}" for i in range(size)]
+        cipher_messages = crypto.encrypt_many(PASSWORD, plain_messages)
+
+        timings = {
+            "loop": best_of(lambda: [crypto.decrypt(PASSWORD, message) for message in cipher_messages]),
+            "batch": best_of(lambda: crypto.decrypt_many(PASSWORD, cipher_messages)),
+        }
+
+        start = time.perf_counter()
+        decrypted_messages = await service.decrypt_many(cipher_messages)
+        timings["service"] = time.perf_counter() - start
+        assert decrypted_messages == plain_messages
+
+        for mode, timing in timings.items():
+            print(output_format.format(size, mode, f"{timing * 1e3:.2f}", f"{timing / size * 1e6:.1f}"))
+
+    service.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
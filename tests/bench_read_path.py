@@ -0,0 +1,137 @@
+import uuid
+import time
+import asyncio
+from bson import ObjectId
+from pymongo import monitoring
+from pymongo.server_api import ServerApi
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.watsh.connector import access_control, validation, setup, users, items, json_value
+from src.watsh.connector.crud import items as crud_items
+from src.watsh.lib.crypto_service import CryptoService
+from src.watsh.lib.models import ItemUpdate, ItemType
+from src.watsh.lib.pyobjectid import NULL_OBJECTID
+
+MONGO_URI = 'mongodb://localhost:27017/'
+AES_SECRET = 'your_secure_key'
+ITEMS = 100
+ROUNDS = 50
+
+output_format = "{:<10}{:<16}{:>12}{:>12}{:>12}"
+
+
+class CommandCounter(monitoring.CommandListener):
+    # Round-trips to the server: the transaction overhead does not depend on the latency of this machine
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def transactional_json(client, crypto, current_user_id, project_id, environment_id, branch_id) -> dict:
+    # Former read path: the same reads wrapped in a multi-document transaction
+    async with await client.start_session() as session:
+        async with session.start_transaction():
+            await access_control.user_authorization(
+                client=client, session=session, project_id=project_id, user_id=current_user_id
+            )
+            await validation.environment_validation(
+                client=client, session=session, project_id=project_id, environment_id=environment_id,
+            )
+            await validation.branch_validation(
+                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id,
+            )
+            values = await json_value._get_nested_json(
+                client=client, session=session, project_id=project_id, environment_id=environment_id,
+                branch_id=branch_id, crypto=crypto,
+            )
+            await session.commit_transaction()
+    return values
+
+
+async def transactional_items(client, crypto, current_user_id, project_id, environment_id, branch_id) -> list:
+    async with await client.start_session() as session:
+        async with session.start_transaction():
+            await access_control.user_authorization(
+                client=client, session=session, project_id=project_id, user_id=current_user_id
+            )
+            await validation.environment_validation(
+                client=client, session=session, project_id=project_id, environment_id=environment_id,
+            )
+            await validation.branch_validation(
+                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id,
+            )
+            list_items = await crud_items.list_items(
+                client=client, session=session, project_id=project_id, environment_id=environment_id, branch_id=branch_id,
+            )
+            await items.decrypt_items(crypto, list_items)
+            await session.commit_transaction()
+    return list_items
+
+
+async def measure(function, counter: CommandCounter, **kwargs) -> tuple[float, float, float]:
+    timings = []
+    counter.count = 0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        await function(**kwargs)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.95)], counter.count / ROUNDS
+
+
+async def main() -> None:
+
+    # Connect to database
+
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(MONGO_URI, server_api=ServerApi('1'), event_listeners=[counter])
+    crypto = CryptoService(AES_SECRET, max_workers=4, chunk_size=64)
+    await setup.create_indexes(client)
+
+    # Create a user with the sample project, and fill its default branch
+
+    test_id = str(uuid.uuid4())
+    user_id = await users.create(client, f'bench-{test_id}@watsh.io', True)
+    user = await users.get(client, user_id)
+    project = (await users.get_user_snapshot(client, user)).projects[0]
+    environment = project.environments[0]
+    branch = environment.branches[0]
+
+    params = dict(
+        client=client, current_user_id=user_id, project_id=project.project.id,
+        environment_id=environment.environment.id, branch_id=branch.id,
+    )
+    updates = [
+        ItemUpdate(
+            item=ObjectId(), parent=NULL_OBJECTID, type=ItemType.STRING, active=True,
+            slug=f'key-{i}', secret_value=f'value-{i}', secret_active=True,
+        )
+        for i in range(ITEMS)
+    ]
+    await items.create_from_updates(updates=updates, commit_message='Benchmark.', crypto=crypto, **params)
+
+    # Compare the transactional and the read-only paths
+
+    print(output_format.format("endpoint", "mode", "p50 (ms)", "p95 (ms)", "commands"))
+    for endpoint, transactional, read_only in [
+        ('/json', transactional_json, json_value.get_json),
+        ('/items', transactional_items, items.list_items),
+    ]:
+        for mode, function in [('transaction', transactional), ('read-only', read_only)]:
+            p50, p95, commands = await measure(function, counter, crypto=crypto, **params)
+            print(output_format.format(endpoint, mode, f"{p50 * 1e3:.2f}", f"{p95 * 1e3:.2f}", f"{commands:.1f}"))
+
+    await users.delete(client, user_id)
+    crypto.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
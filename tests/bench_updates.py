@@ -0,0 +1,98 @@
+import uuid
+import time
+import asyncio
+from bson import ObjectId
+from pymongo.server_api import ServerApi
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.watsh.connector import setup, users, items
+from src.watsh.connector.crud import items as crud_items
+from src.watsh.lib.crypto_service import CryptoService
+from src.watsh.lib.models import ItemUpdate, ItemType
+from src.watsh.lib.pyobjectid import NULL_OBJECTID
+
+MONGO_URI = 'mongodb://localhost:27017/'
+AES_SECRET = 'your_secure_key'
+SIZES = [1000, 10000]
+CONTAINERS = 10
+
+output_format = "{:<10}{:<10}{:>14}{:>14}"
+
+
+def build_updates(count: int) -> list[ItemUpdate]:
+    # A few containers at the root, the keys spread between them
+    containers = [
+        ItemUpdate(
+            item=ObjectId(), parent=NULL_OBJECTID, type=ItemType.OBJECT, active=True,
+            slug=f'group-{i}', secret_value='', secret_active=False,
+        )
+        for i in range(CONTAINERS)
+    ]
+    keys = [
+        ItemUpdate(
+            item=ObjectId(), parent=containers[i % CONTAINERS].item, type=ItemType.STRING, active=True,
+            slug=f'key-{i}', secret_value=f'value-{i}', secret_active=True,
+        )
+        for i in range(count - CONTAINERS)
+    ]
+    return containers + keys
+
+
+async def main() -> None:
+
+    # Connect to database
+
+    client = AsyncIOMotorClient(MONGO_URI, server_api=ServerApi('1'))
+    crypto = CryptoService(AES_SECRET, max_workers=4, chunk_size=64)
+    await setup.create_indexes(client)
+
+    print(output_format.format("updates", "commit", "plan (ms)", "total (ms)"))
+
+    for size in SIZES:
+
+        # Create a user with the sample project, and use its default branch
+
+        test_id = str(uuid.uuid4())
+        user_id = await users.create(client, f'bench-{test_id}@watsh.io', True)
+        user = await users.get(client, user_id)
+        project = (await users.get_user_snapshot(client, user)).projects[0]
+        environment = project.environments[0]
+        branch = environment.branches[0]
+
+        params = dict(
+            client=client, current_user_id=user_id, project_id=project.project.id,
+            environment_id=environment.environment.id, branch_id=branch.id,
+        )
+        updates = build_updates(size)
+
+        # First commit creates every item, the second one updates all their secrets
+
+        for commit in ['create', 'update']:
+            async with await client.start_session() as session:
+                head = await crud_items.list_items(
+                    client=client, session=session, project_id=project.project.id,
+                    environment_id=environment.environment.id, branch_id=branch.id,
+                )
+
+            start = time.perf_counter()
+            items.plan_updates(head, updates)
+            plan = time.perf_counter() - start
+
+            start = time.perf_counter()
+            await items.create_from_updates(updates=updates, commit_message='Benchmark.', crypto=crypto, **params)
+            total = time.perf_counter() - start
+
+            print(output_format.format(size, commit, f"{plan * 1e3:.2f}", f"{total * 1e3:.2f}"))
+
+            updates = [
+                update.model_copy(update={'secret_value': f'{update.secret_value}-new'}) if update.secret_value else update
+                for update in updates
+            ]
+
+        await users.delete(client, user_id)
+
+    crypto.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,8 +1,8 @@
+import os
 import base64
 import hashlib
 
-from Cryptodome.Cipher import AES  # from pycryptodomex v-3.10.4
-from Cryptodome.Random import get_random_bytes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 HASH_NAME = "SHA512"
 IV_LENGTH = 12
@@ -13,17 +13,14 @@ TAG_LENGTH = 16
 
 
 def encrypt(password, plain_message):
-    salt = get_random_bytes(SALT_LENGTH) 
-    iv = get_random_bytes(IV_LENGTH)
+    salt = os.urandom(SALT_LENGTH) 
+    iv = os.urandom(IV_LENGTH)
 
     secret = get_secret_key(password, salt)
 
-    cipher = AES.new(secret, AES.MODE_GCM, iv)
-
-    encrypted_message_byte, tag = cipher.encrypt_and_digest(
-        plain_message.encode("utf-8")
-    )
-    cipher_byte = salt + iv + encrypted_message_byte + tag
+    # The tag is appended to the encrypted message
+    encrypted_message_and_tag = AESGCM(secret).encrypt(iv, plain_message.encode("utf-8"), None)
+    cipher_byte = salt + iv + encrypted_message_and_tag
 
     encoded_cipher_byte = base64.b64encode(cipher_byte)
     return bytes.decode(encoded_cipher_byte)
@@ -34,14 +31,10 @@ def decrypt(password, cipher_message):
 
     salt = decoded_cipher_byte[:SALT_LENGTH]
     iv = decoded_cipher_byte[SALT_LENGTH : (SALT_LENGTH + IV_LENGTH)]
-    encrypted_message_byte = decoded_cipher_byte[
-        (IV_LENGTH + SALT_LENGTH) : -TAG_LENGTH
-    ]
-    tag = decoded_cipher_byte[-TAG_LENGTH:]
+    encrypted_message_and_tag = decoded_cipher_byte[(IV_LENGTH + SALT_LENGTH):]
     secret = get_secret_key(password, salt)
-    cipher = AES.new(secret, AES.MODE_GCM, iv)
 
-    decrypted_message_byte = cipher.decrypt_and_verify(encrypted_message_byte, tag)
+    decrypted_message_byte = AESGCM(secret).decrypt(iv, encrypted_message_and_tag, None)
     return decrypted_message_byte.decode("utf-8")
 
 
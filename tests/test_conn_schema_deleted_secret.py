@@ -0,0 +1,89 @@
+import uuid
+import asyncio
+from bson import ObjectId
+from pymongo.server_api import ServerApi
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.watsh.connector import setup, users, items, json_value
+from src.watsh.lib.crypto_service import CryptoService
+from src.watsh.lib.models import ItemUpdate, ItemType
+from src.watsh.lib.pyobjectid import NULL_OBJECTID
+
+MONGO_URI = 'mongodb://localhost:27017/'
+AES_SECRET = 'your_secure_key'
+
+
+json_schema = {
+    "type": "object",
+    "properties": {
+        "host": {"type": "string"},
+        "port": {"type": "integer"},
+    },
+}
+
+
+async def main() -> None:
+
+    # Connect to database
+
+    client = AsyncIOMotorClient(MONGO_URI, server_api=ServerApi('1'))
+    crypto = CryptoService(AES_SECRET, max_workers=2, chunk_size=64)
+
+    # Start test
+
+    test_id = str(uuid.uuid4())
+    print(f'Starting test {test_id}')
+
+    await setup.create_indexes(client)
+
+    # Create a user with the sample project, and use its default branch
+
+    user_id = await users.create(client, f'test-{test_id}@watsh.io', True)
+    user = await users.get(client, user_id)
+    project = (await users.get_user_snapshot(client, user)).projects[0]
+    environment = project.environments[0]
+    branch = environment.branches[0]
+
+    params = dict(
+        client=client, current_user_id=user_id, project_id=project.project.id,
+        environment_id=environment.environment.id, branch_id=branch.id,
+    )
+
+    # Create two keys, then delete the secret of one of them
+
+    host_id, port_id = ObjectId(), ObjectId()
+    await items.create_from_updates(
+        updates=[
+            ItemUpdate(
+                item=host_id, parent=NULL_OBJECTID, type=ItemType.STRING, active=True,
+                slug='host', secret_value='localhost', secret_active=True,
+            ),
+            ItemUpdate(
+                item=port_id, parent=NULL_OBJECTID, type=ItemType.INTEGER, active=True,
+                slug='port', secret_value='80', secret_active=True,
+            ),
+        ],
+        commit_message='Create keys.', crypto=crypto, **params,
+    )
+    await items.delete_secret(item_id=port_id, commit_message='Delete secret.', **params)
+
+    # Update the branch from a JSON schema: the deleted secret is not decrypted, and is set again
+
+    await items.create_from_schema(
+        json_schema=json_schema, json_values={'host': 'localhost', 'port': 8080},
+        commit_message='Update from schema.', crypto=crypto, **params,
+    )
+
+    values, _ = await json_value.get_json(crypto=crypto, **params)
+    if values != {'host': 'localhost', 'port': 8080}:
+        raise Exception(f'Unexpected values: {values}')
+
+    # Delete the user
+
+    await users.delete(client, user_id)
+    crypto.shutdown()
+
+    print(f'Test {test_id} successfull')
+
+if __name__ == '__main__':
+    asyncio.run(main())
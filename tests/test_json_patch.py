@@ -0,0 +1,120 @@
+import json
+
+from src.watsh.lib.json_patch import escape, unescape, diff, apply
+
+
+def assert_round_trip(source, target):
+    patch = diff(source, target)
+    result = apply(source, patch)
+    # Same JSON document, 1, 1.0 and true included
+    assert json.dumps(result, sort_keys=True) == json.dumps(target, sort_keys=True), (source, target, patch, result)
+    return patch
+
+
+# Tests
+
+# Escaped keys: `~` and `/` in object keys (RFC 6901)
+
+assert escape('a/b') == 'a~1b'
+assert escape('c~d') == 'c~0d'
+assert escape('~1') == '~01'
+for key in ['a/b', 'c~d', '~1', '~0', '/~', '~/', '']:
+    assert unescape(escape(key)) == key
+
+patch = assert_round_trip({'a/b': 1, 'c~d': 2}, {'a/b': 3, 'c~d': 2, '~1': {'x/y': 4}})
+assert {'op': 'replace', 'path': '/a~1b', 'value': 3} in patch
+assert {'op': 'add', 'path': '/~01', 'value': {'x/y': 4}} in patch
+
+patch = assert_round_trip({'~1': {'x/y': 1}}, {'~1': {}})
+assert patch == [{'op': 'remove', 'path': '/~01/x~1y'}]
+
+# Type changes: equal in Python, not in JSON
+
+for source, target in [(1, 1.0), (1.0, 1), (1, True), (True, 1), (0, False), (False, 0), (1, '1'), (None, 0)]:
+    patch = assert_round_trip({'k': source}, {'k': target})
+    assert patch == [{'op': 'replace', 'path': '/k', 'value': target}], (source, target, patch)
+
+assert diff({'k': 1}, {'k': 1}) == []
+assert diff({'k': True}, {'k': True}) == []
+
+# Object and scalar replacements
+
+patch = assert_round_trip({'a': {'b': 1}}, {'a': 1})
+assert patch == [{'op': 'replace', 'path': '/a', 'value': 1}]
+
+patch = assert_round_trip({'a': 1}, {'a': {'b': 1}})
+assert patch == [{'op': 'replace', 'path': '/a', 'value': {'b': 1}}]
+
+patch = assert_round_trip({'a': {'b': 1}}, {'a': [1]})
+assert patch == [{'op': 'replace', 'path': '/a', 'value': [1]}]
+
+patch = assert_round_trip({'a': 1}, 'scalar')
+assert patch == [{'op': 'replace', 'path': '', 'value': 'scalar'}]
+
+assert_round_trip('scalar', {'a': 1})
+
+# Round-trip
+
+documents = [
+    {},
+    {'a': 1},
+    {'a': 1, 'b': {'c': 'd', 'e': [1, 2, 3]}},
+    {'a': 2, 'b': {'c': 'd', 'e': [1, 3]}, 'f': None},
+    {'b': {'c': {'d': 1.5}}, 'g': False},
+    {'db': {'host': 'localhost', 'port': 5432, 'ssl': True}},
+    {'db': {'host': 'example.com', 'port': 5432.0}, 'a/b': {'c~d': ''}},
+]
+for source in documents:
+    for target in documents:
+        assert_round_trip(source, target)
+
+# Apply patches to a copy
+
+source = {'a': {'b': 1}}
+apply(source, [{'op': 'replace', 'path': '/a/b', 'value': 2}])
+assert source == {'a': {'b': 1}}
+
+value = {'c': 1}
+result = apply({}, [{'op': 'add', 'path': '/a', 'value': value}])
+value['c'] = 2
+assert result == {'a': {'c': 1}}
+
+assert apply({'a': [1, 2]}, [{'op': 'add', 'path': '/a/-', 'value': 3}]) == {'a': [1, 2, 3]}
+assert apply({'a': [1, 2]}, [{'op': 'remove', 'path': '/a/0'}]) == {'a': [2]}
+assert apply({'a': [1, 2]}, [{'op': 'add', 'path': '/a/2', 'value': 3}]) == {'a': [1, 2, 3]}
+assert apply({'a': [1, 2]}, [{'op': 'replace', 'path': '/a/1', 'value': 3}]) == {'a': [1, 3]}
+assert apply({'a': [{'b': 1}]}, [{'op': 'add', 'path': '/a/0/c', 'value': 2}]) == {'a': [{'b': 1, 'c': 2}]}
+
+# Invalid patches
+
+for patch in [
+    [{'op': 'move', 'path': '/a', 'from': '/b'}],
+    [{'op': 'remove', 'path': ''}],
+    [{'op': 'remove', 'path': '/missing'}],
+    [{'op': 'replace', 'path': '/missing', 'value': 1}],
+    [{'op': 'add', 'path': '/missing/a', 'value': 1}],
+    [{'op': 'add', 'path': '/a/b', 'value': 1}],
+    [{'op': 'replace', 'path': '/l/5', 'value': 1}],
+    [{'op': 'replace', 'path': '/l/x', 'value': 1}],
+    # Negative indexes and indexes past the end
+    [{'op': 'replace', 'path': '/l/-1', 'value': 1}],
+    [{'op': 'remove', 'path': '/l/-1'}],
+    [{'op': 'add', 'path': '/l/-1', 'value': 1}],
+    [{'op': 'replace', 'path': '/l/1', 'value': 1}],
+    [{'op': 'remove', 'path': '/l/1'}],
+    [{'op': 'add', 'path': '/l/2', 'value': 1}],
+    [{'op': 'add', 'path': '/n/-1/a', 'value': 1}],
+    [{'op': 'add', 'path': '/n/1/a', 'value': 1}],
+    # Indexes with leading zeros, and `-` outside of additions
+    [{'op': 'replace', 'path': '/l/00', 'value': 1}],
+    [{'op': 'replace', 'path': '/l/-', 'value': 1}],
+    [{'op': 'remove', 'path': '/l/-'}],
+]:
+    try:
+        apply({'a': 1, 'l': [0], 'n': [{}]}, patch)
+    except ValueError:
+        pass
+    else:
+        raise Exception(f'Invalid patch applied: {patch}')
+
+print('JSON Patch tests successfull')
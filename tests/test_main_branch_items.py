@@ -94,7 +94,7 @@ async def main() -> None:
 
     # Get item
 
-    item = await conn.items.get(
+    item, _ = await conn.items.get(
        client=client,
        current_user_id=current_user_id,
        project_id=project_id,
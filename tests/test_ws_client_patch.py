@@ -0,0 +1,53 @@
+import asyncio
+import json
+from websockets.client import connect
+from websockets.exceptions import ConnectionClosed
+
+from src.watsh.lib import json_patch
+
+SECURE = False
+HOST = 'localhost:80'
+ACCESS_TOKEN = 'XXXXXXX'
+PROJECT_ID = '659a7464d5816ca92d6b2559'
+ENVIRONMENT_ID = '659a7464d5816ca92d6b255b'
+BRANCH_ID = '659a7464d5816ca92d6b255c'
+
+WS_HOST = f"{'ws' if not SECURE else 'wss'}://{HOST}/v1/{PROJECT_ID}/{ENVIRONMENT_ID}/{BRANCH_ID}"
+PATCH_PROTOCOL = 'watsh.patch.v1'
+
+
+async def main():
+
+    values, commit = None, None
+    while True:
+
+        # Reconnect from the last commit applied: nothing is sent if it is still the head
+        url = WS_HOST+"?token="+ACCESS_TOKEN + (f"&last_commit={commit}" if commit else "")
+        try:
+            async with connect(url, subprotocols=[PATCH_PROTOCOL]) as websocket:
+                if websocket.subprotocol != PATCH_PROTOCOL:
+                    raise Exception('Patch protocol not negotiated')
+
+                async for rcv in websocket:
+                    message = json.loads(rcv)
+
+                    # A whole snapshot first, then patches from the commit we have
+                    if message['type'] == 'snapshot':
+                        values = message['values']
+
+                    elif message['type'] == 'patch':
+                        if message['base'] != commit:
+                            print('Missed a commit, resync')
+                            await websocket.send(json.dumps({'type': 'resync'}))
+                            continue
+                        values = json_patch.apply(values, message['patch'])
+
+                    commit = message['commit']
+                    print(commit, values)
+
+        except ConnectionClosed:
+            print('Disconnected, reconnecting')
+            await asyncio.sleep(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())